@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la carga de la tabla de hechos: DataFrame completo frente a shards Parquet
+
+Compara, para tablas de hechos sintéticas de distinto tamaño:
+- dataframe: el frame completo en memoria serializado a un único Parquet,
+  que es lo que hace load_table_from_dataframe antes de subir un solo payload
+- shards: lotes de --tamano-lote filas escritos como shards Parquet comprimidos
+  y subidos en paralelo (escribir_y_subir_shards del DAG)
+
+Cada caso corre en un proceso aparte para medir su pico de memoria (RSS).
+Sin --bucket solo se mide la serialización; con --bucket también la subida a GCS
+(los objetos se borran al terminar).
+
+Uso:
+    python benchmarks/bench_carga_hechos.py --filas 1000000 5000000 10000000
+    python benchmarks/bench_carga_hechos.py --filas 1000000 --bucket mi-bucket
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DIRECTORIO_DAGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dags')
+sys.path.insert(0, DIRECTORIO_DAGS)
+
+PREFIJO_BENCHMARK = 'staging/benchmarks/carga_hechos/'
+
+
+def generar_hechos(filas, semilla=7):
+    """
+    Tabla de hechos sintética con los tipos que produce transformar_lote_hechos
+    """
+    rng = np.random.default_rng(semilla)
+    fechas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, filas), unit='D')
+    fechas = pd.DatetimeIndex(fechas)
+    
+    return pd.DataFrame({
+        'ID_Tiempo': (fechas.year * 10000 + fechas.month * 100 + fechas.day).astype('int64'),
+        'ID_Vehiculo': pd.array(rng.integers(1, 2 ** 62, filas), dtype='Int64'),
+        'ID_Transaccion': pd.array(rng.integers(1, 2 ** 62, filas), dtype='Int64'),
+        'ID_Ubicacion': pd.array(rng.integers(1, 2 ** 62, filas), dtype='Int64'),
+        'CantidadRegistros': np.ones(filas, dtype='int64'),
+        'MontoAvaluo': rng.lognormal(9, 1, filas).round(2),
+        'FechaProceso': fechas.date,
+        'ID_Registro': rng.integers(1, 2 ** 62, filas),
+    })
+
+
+def lotes_hechos(filas, tamano_lote):
+    """
+    Genera la tabla por lotes, como la lee el modo streaming desde staging
+    """
+    for numero, inicio in enumerate(range(0, filas, tamano_lote)):
+        lote = generar_hechos(min(tamano_lote, filas - inicio), semilla=numero)
+        yield pa.Table.from_pandas(lote, preserve_index=False)
+
+
+def caso_dataframe(filas, tamano_lote, bucket_nombre, directorio):
+    """
+    Frame completo -> un Parquet -> un objeto
+    """
+    df = generar_hechos(filas)
+    ruta = os.path.join(directorio, 'hechos.parquet')
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), ruta, compression='snappy')
+    
+    if bucket_nombre:
+        from sri_etl.backends.gcp import AlmacenamientoGCS
+        almacenamiento = AlmacenamientoGCS(bucket_nombre)
+        nombre = f'{PREFIJO_BENCHMARK}dataframe/hechos.parquet'
+        almacenamiento.subir_archivo(ruta, nombre)
+        almacenamiento.eliminar([nombre])
+    return os.path.getsize(ruta)
+
+
+def caso_shards(filas, tamano_lote, bucket_nombre, directorio):
+    """
+    Lotes -> shards Parquet -> subida en paralelo
+    """
+    if bucket_nombre:
+        from sri_etl.backends.gcp import AlmacenamientoGCS
+        from sri_etl.hechos import escribir_y_subir_shards
+        almacenamiento = AlmacenamientoGCS(bucket_nombre)
+        prefijo = f'{PREFIJO_BENCHMARK}shards/'
+        shards = escribir_y_subir_shards(lotes_hechos(filas, tamano_lote), almacenamiento, prefijo, directorio)
+        tamano = sum(almacenamiento.metadatos(nombre)['tamano'] for nombre in shards)
+        almacenamiento.eliminar(shards)
+        return tamano
+    
+    tamano = 0
+    for numero, tabla in enumerate(lotes_hechos(filas, tamano_lote)):
+        ruta = os.path.join(directorio, f'shard-{numero:05d}.parquet')
+        pq.write_table(tabla, ruta, compression='snappy')
+        tamano += os.path.getsize(ruta)
+        os.remove(ruta)
+    return tamano
+
+
+def ejecutar_caso(metodo, filas, tamano_lote, bucket_nombre, cola):
+    """
+    Corre un caso en el proceso hijo y devuelve (segundos, bytes, pico RSS en MB)
+    """
+    funcion = {'dataframe': caso_dataframe, 'shards': caso_shards}[metodo]
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        tamano = funcion(filas, tamano_lote, bucket_nombre, directorio)
+        segundos = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    cola.put((segundos, tamano, pico))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000_000, 5_000_000, 10_000_000])
+    parser.add_argument('--tamano-lote', type=int, default=250_000)
+    parser.add_argument('--bucket', default=None, help='Bucket de GCS para medir también la subida')
+    args = parser.parse_args()
+    
+    contexto = multiprocessing.get_context('spawn')
+    
+    print(f"{'filas':>12} {'método':>10} {'segundos':>10} {'filas/s':>14} {'MB parquet':>11} {'pico RSS MB':>12}")
+    for filas in args.filas:
+        for metodo in ('dataframe', 'shards'):
+            cola = contexto.Queue()
+            proceso = contexto.Process(target=ejecutar_caso,
+                                       args=(metodo, filas, args.tamano_lote, args.bucket, cola))
+            proceso.start()
+            segundos, tamano, pico = cola.get()
+            proceso.join()
+            print(f"{filas:>12,} {metodo:>10} {segundos:>10.2f} {filas / segundos:>14,.0f} "
+                  f"{tamano / 1024 ** 2:>11.1f} {pico:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalamiento de las tareas ETL sobre archivos SRI sintéticos
+
+Para cada tamaño de --filas genera un archivo con scripts/generar_datos_sinteticos.py
+y ejecuta, con el backend local (directorio + DuckDB), la extracción y cada tarea
+etl_* del DAG en orden, pasando los XCom entre ellas. Cada tarea corre en un
+proceso aparte para medir su tiempo, filas/s y pico de memoria (RSS).
+
+Con --compresion gzip zstd cada tamaño se mide también con el archivo fuente
+comprimido (.csv.gz / .csv.zst) y se agrega una fila `total` por ejecución
+(tiempo de punta a punta, pico de memoria y tamaño del archivo fuente) para
+comparar con el CSV plano.
+
+Con --guardar-base los resultados se guardan como línea base; en las siguientes
+ejecuciones se comparan contra ella y el benchmark falla (código 1) si alguna
+tarea es más lenta o usa más memoria que la base más --tolerancia, o si no
+existe la base. El repositorio incluye benchmarks/linea_base_escalamiento.json
+como referencia; la base depende de la máquina, así que se regenera con
+--guardar-base en la misma máquina (o runner de CI) que compara.
+
+Requiere las dependencias del DAG (airflow, pandas, pyarrow) y duckdb.
+
+Uso:
+    python benchmarks/bench_escalamiento.py --filas 10000 100000 1000000 --guardar-base
+    python benchmarks/bench_escalamiento.py --filas 10000 100000 1000000 --tolerancia 0.25
+    python benchmarks/bench_escalamiento.py --filas 1000000 --compresion ninguna gzip zstd
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import yaml
+
+DIRECTORIO_REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(DIRECTORIO_REPO, 'scripts'))
+from generar_datos_sinteticos import aprender_perfil, escribir_csv  # noqa: E402
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base_escalamiento.json')
+
+# (módulo, tarea) en el orden del DAG
+TAREAS = [
+    ('staging', 'extraer_datos_fuente'),
+    ('dimensiones', 'etl_dim_tiempo'),
+    ('dimensiones', 'etl_dim_vehiculo'),
+    ('dimensiones', 'etl_dim_transaccion'),
+    ('dimensiones', 'etl_dim_ubicacion'),
+    ('hechos', 'etl_fact_registro_vehiculos'),
+]
+
+# Extensión del archivo fuente según la compresión
+EXTENSIONES_COMPRESION = {'ninguna': '.csv', 'gzip': '.csv.gz', 'zstd': '.csv.zst'}
+
+# Holgura absoluta para que el ruido en tareas de milisegundos no cuente como regresión
+HOLGURA_SEGUNDOS = 0.5
+HOLGURA_RSS_MB = 20
+
+
+class InstanciaTareaLocal:
+    """
+    Sustituto mínimo de TaskInstance: los XCom se guardan en un JSON compartido
+    """
+
+    def __init__(self, ruta_xcom, task_id):
+        self.ruta_xcom = ruta_xcom
+        self.task_id = task_id
+        self.xcom = {}
+        if os.path.exists(ruta_xcom):
+            with open(ruta_xcom) as archivo:
+                self.xcom = json.load(archivo)
+
+    def xcom_push(self, key, value):
+        self.xcom.setdefault(self.task_id, {})[key] = value
+
+    def xcom_pull(self, task_ids, key='return_value'):
+        return self.xcom.get(task_ids, {}).get(key)
+
+    def guardar(self):
+        with open(self.ruta_xcom, 'w') as archivo:
+            json.dump(self.xcom, archivo, default=str)
+
+
+class EjecucionLocal:
+    """
+    Sustituto mínimo de DagRun con la configuración del disparo
+    """
+
+    def __init__(self, conf):
+        self.dag_id = 'sri_vehiculos_etl_proceso'
+        self.conf = conf
+        self.start_date = None
+
+
+def ejecutar_tarea(modulo, tarea, directorio, conf, cola):
+    """
+    Corre una tarea en el proceso hijo y devuelve (segundos, pico RSS en MB)
+    El backend y la configuración se fijan antes de importar sri_etl
+    """
+    os.environ['SRI_ETL_BACKEND'] = 'local'
+    os.environ['SRI_ETL_CONFIG'] = os.path.join(directorio, 'variables.yaml')
+    sys.path.insert(0, os.path.join(DIRECTORIO_REPO, 'dags'))
+    
+    from importlib import import_module
+    funcion = getattr(import_module(f'sri_etl.{modulo}'), tarea)
+    
+    ti = InstanciaTareaLocal(os.path.join(directorio, 'xcom.json'), tarea)
+    context = {'ti': ti, 'run_id': 'benchmark', 'dag_run': EjecucionLocal(conf)}
+    
+    inicio = time.perf_counter()
+    ti.xcom_push('return_value', funcion(**context))
+    segundos = time.perf_counter() - inicio
+    ti.guardar()
+    
+    cola.put((segundos, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def preparar_directorio(directorio, perfil, filas, semilla, compresion='ninguna'):
+    """
+    Configuración del backend local y archivo fuente sintético en su bucket
+    """
+    with open(os.path.join(directorio, 'variables.yaml'), 'w') as archivo:
+        yaml.safe_dump({'backend': 'local', 'local': {'directorio': directorio}}, archivo)
+    
+    ruta_fuente = os.path.join(directorio, 'bucket', 'raw-data', f'sri_vehiculos{EXTENSIONES_COMPRESION[compresion]}')
+    os.makedirs(os.path.dirname(ruta_fuente))
+    return escribir_csv(perfil, filas, ruta_fuente, semilla=semilla)
+
+
+def medir_tamano(perfil, filas, conf, semilla, contexto, compresion='ninguna'):
+    """
+    Resultados por tarea para un tamaño de archivo, más el total de punta a punta
+    """
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        tamano = preparar_directorio(directorio, perfil, filas, semilla, compresion)
+        print(f"📄 {filas:,} filas, compresión {compresion} ({tamano / 1024 ** 2:,.1f} MB)")
+        
+        for modulo, tarea in TAREAS:
+            cola = contexto.Queue()
+            proceso = contexto.Process(target=ejecutar_tarea, args=(modulo, tarea, directorio, conf, cola))
+            proceso.start()
+            proceso.join()
+            if proceso.exitcode != 0:
+                raise RuntimeError(f"{tarea} falló con {filas} filas (código {proceso.exitcode})")
+            
+            segundos, pico = cola.get()
+            resultados[tarea] = {
+                'segundos': round(segundos, 3),
+                'filas_por_segundo': round(filas / segundos),
+                'pico_rss_mb': round(pico, 1)
+            }
+            print(f"{filas:>12,} {tarea:>30} {segundos:>10.2f} {filas / segundos:>14,.0f} {pico:>12.1f}")
+    
+    segundos = sum(resultado['segundos'] for resultado in resultados.values())
+    pico = max(resultado['pico_rss_mb'] for resultado in resultados.values())
+    resultados['total'] = {
+        'segundos': round(segundos, 3),
+        'filas_por_segundo': round(filas / segundos),
+        'pico_rss_mb': pico,
+        'fuente_mb': round(tamano / 1024 ** 2, 2)
+    }
+    print(f"{filas:>12,} {'total':>30} {segundos:>10.2f} {filas / segundos:>14,.0f} {pico:>12.1f}")
+    return resultados
+
+def clave_resultado(filas, compresion):
+    """
+    Clave de resultados y línea base; el CSV plano conserva la clave de solo filas
+    """
+    return str(filas) if compresion == 'ninguna' else f'{filas}-{compresion}'
+
+def imprimir_comparacion_compresion(resultados, filas, compresiones):
+    """
+    Tiempo total, pico de memoria y tamaño de la fuente de cada compresión frente al CSV plano
+    """
+    print(f"\n{'filas':>12} {'compresión':>10} {'fuente MB':>10} {'total s':>10} {'vs plano':>9} {'pico RSS MB':>12}")
+    for cantidad in filas:
+        plano = resultados.get(clave_resultado(cantidad, 'ninguna'), {}).get('total')
+        for compresion in compresiones:
+            total = resultados[clave_resultado(cantidad, compresion)]['total']
+            relativo = f"{total['segundos'] / plano['segundos']:.2f}x" if plano else '-'
+            print(f"{cantidad:>12,} {compresion:>10} {total['fuente_mb']:>10.1f} {total['segundos']:>10.2f} "
+                  f"{relativo:>9} {total['pico_rss_mb']:>12.1f}")
+
+
+def comparar_con_base(resultados, base, tolerancia):
+    """
+    Regresiones respecto de la línea base (solo tamaños y tareas presentes en ambas)
+    """
+    fallas = []
+    for filas, tareas in resultados.items():
+        for tarea, actual in tareas.items():
+            anterior = base.get(filas, {}).get(tarea)
+            if anterior is None:
+                continue
+            limite_segundos = anterior['segundos'] * (1 + tolerancia) + HOLGURA_SEGUNDOS
+            if actual['segundos'] > limite_segundos:
+                fallas.append(f"{tarea} ({filas} filas): {actual['segundos']:.2f}s "
+                              f"frente a {anterior['segundos']:.2f}s de la base")
+            limite_rss = anterior['pico_rss_mb'] * (1 + tolerancia) + HOLGURA_RSS_MB
+            if actual['pico_rss_mb'] > limite_rss:
+                fallas.append(f"{tarea} ({filas} filas): {actual['pico_rss_mb']:.0f} MB "
+                              f"frente a {anterior['pico_rss_mb']:.0f} MB de la base")
+    return fallas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--modo-hechos', default=None, help="'memoria', 'streaming' o 'paralelo' (por defecto el configurado)")
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--compresion', nargs='+', default=['ninguna'], choices=list(EXTENSIONES_COMPRESION),
+                        help='Compresiones del archivo fuente a medir')
+    parser.add_argument('--linea-base', default=LINEA_BASE)
+    parser.add_argument('--guardar-base', action='store_true', help='Guarda los resultados como nueva línea base')
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Aumento relativo permitido de tiempo y memoria frente a la base')
+    args = parser.parse_args()
+    
+    conf = {'modo_hechos': args.modo_hechos} if args.modo_hechos else {}
+    perfil = aprender_perfil()
+    contexto = multiprocessing.get_context('spawn')
+    
+    print(f"{'filas':>12} {'tarea':>30} {'segundos':>10} {'filas/s':>14} {'pico RSS MB':>12}")
+    resultados = {
+        clave_resultado(filas, compresion): medir_tamano(perfil, filas, conf, args.semilla, contexto, compresion)
+        for filas in args.filas for compresion in args.compresion
+    }
+    if len(args.compresion) > 1:
+        imprimir_comparacion_compresion(resultados, args.filas, args.compresion)
+    
+    if args.guardar_base:
+        with open(args.linea_base, 'w') as archivo:
+            json.dump(resultados, archivo, indent=2)
+            archivo.write('\n')
+        print(f"💾 Línea base guardada en {args.linea_base}")
+        return
+    
+    if not os.path.exists(args.linea_base):
+        print(f"❌ No existe {args.linea_base}; ejecute con --guardar-base para crearla")
+        sys.exit(1)
+    
+    with open(args.linea_base) as archivo:
+        fallas = comparar_con_base(resultados, json.load(archivo), args.tolerancia)
+    
+    for falla in fallas:
+        print(f"❌ {falla}")
+    if not fallas:
+        print("✅ Sin regresiones frente a la línea base")
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de lookup de claves frente a la cadena de merges original
+
+Compara, para la tabla de hechos:
+- merges: los cuatro DataFrame.merge encadenados que usaba etl_fact_registro_vehiculos
+- motor: resolver_claves (factorización en códigos enteros + indexación)
+
+Uso:
+    python benchmarks/bench_lookup_hechos.py --filas 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'dags'))
+from sri_etl.claves import resolver_claves  # noqa: E402
+
+COLUMNAS_VEHICULO = ['CÓDIGO DE VEHÍCULO', 'MARCA', 'MODELO', 'CLASE', 'COLOR 1']
+COLUMNAS_TRANSACCION = ['TIPO TRANSACCIÓN', 'TIPO SERVICIO']
+
+
+def generar_datos(filas, semilla=7):
+    """
+    Genera registros sintéticos con cardinalidades parecidas al archivo del SRI
+    """
+    rng = np.random.default_rng(semilla)
+    vehiculos = max(filas // 10, 1)
+    codigos = rng.integers(9_000_000, 9_000_000 + vehiculos, filas)
+    marcas = np.array([f'MARCA_{i}' for i in range(300)])
+    clases = np.array(['MOTOCICLETA', 'JEEP', 'CAMION', 'OMNIBUS', 'AUTOMOVIL'])
+    colores = np.array(['NEG', 'PLO', 'ROJ', 'BLA', 'AZU', 'GRI'])
+    fechas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, filas), unit='D')
+    
+    return pd.DataFrame({
+        'FECHA_PROCESO_DATE': fechas.date,
+        'CÓDIGO DE VEHÍCULO': codigos,
+        'MARCA': marcas[codigos % len(marcas)],
+        'MODELO': np.char.add('MODELO_', (codigos % 5000).astype(str)),
+        'CLASE': clases[codigos % len(clases)],
+        'COLOR 1': colores[codigos % len(colores)],
+        'TIPO TRANSACCIÓN': rng.choice(['COMPRA LOCAL', 'IMPORTACIÓN DIRECTA'], filas),
+        'TIPO SERVICIO': rng.choice(['PAR', 'ALQ', 'EST'], filas),
+        'CANTÓN': rng.integers(10101, 10101 + 220, filas),
+        'AVALÚO': rng.lognormal(9, 1, filas).round(2),
+    })
+
+
+def construir_dimensiones(df):
+    """
+    Dimensiones con claves posicionales, como las construía el DAG original
+    """
+    dim_tiempo = pd.DataFrame({'FechaCompleta': pd.unique(df['FECHA_PROCESO_DATE'])})
+    dim_vehiculo = df[['CÓDIGO DE VEHÍCULO']].drop_duplicates().rename(
+        columns={'CÓDIGO DE VEHÍCULO': 'CodigoVehiculo'})
+    dim_transaccion = df[COLUMNAS_TRANSACCION].drop_duplicates().rename(
+        columns={'TIPO TRANSACCIÓN': 'TipoTransaccion', 'TIPO SERVICIO': 'TipoServicio'})
+    dim_ubicacion = pd.DataFrame({'CodigoCanton': pd.unique(df['CANTÓN']).astype(str)})
+    
+    for dim, columna_id in [(dim_tiempo, 'ID_Tiempo'), (dim_vehiculo, 'ID_Vehiculo'),
+                            (dim_transaccion, 'ID_Transaccion'), (dim_ubicacion, 'ID_Ubicacion')]:
+        dim[columna_id] = range(1, len(dim) + 1)
+    return dim_tiempo, dim_vehiculo, dim_transaccion, dim_ubicacion
+
+
+def lookup_merges(df, dimensiones):
+    """
+    Cadena de merges de la versión original de la tabla de hechos
+    """
+    dim_tiempo, dim_vehiculo, dim_transaccion, dim_ubicacion = dimensiones
+    df = df.merge(dim_tiempo, left_on='FECHA_PROCESO_DATE', right_on='FechaCompleta', how='left')
+    df = df.merge(dim_vehiculo, left_on='CÓDIGO DE VEHÍCULO', right_on='CodigoVehiculo', how='left')
+    df = df.merge(dim_transaccion, left_on=COLUMNAS_TRANSACCION,
+                  right_on=['TipoTransaccion', 'TipoServicio'], how='left')
+    df['CANTÓN'] = df['CANTÓN'].astype(str)
+    df = df.merge(dim_ubicacion, left_on='CANTÓN', right_on='CodigoCanton', how='left')
+    return df[['ID_Tiempo', 'ID_Vehiculo', 'ID_Transaccion', 'ID_Ubicacion', 'AVALÚO']]
+
+
+def lookup_motor(df, claves_validas):
+    """
+    Resolución de claves con el motor de códigos enteros
+    """
+    claves = {}
+    for nombre, columnas in [('ID_Tiempo', ['FECHA_PROCESO_DATE']),
+                             ('ID_Vehiculo', COLUMNAS_VEHICULO),
+                             ('ID_Transaccion', COLUMNAS_TRANSACCION),
+                             ('ID_Ubicacion', ['CANTÓN'])]:
+        claves[nombre] = resolver_claves(df, columnas, claves_validas[nombre])
+    return claves
+
+
+def medir(funcion, *args):
+    """
+    Devuelve (segundos, pico de memoria en MB) de una llamada
+    """
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion(*args)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    
+    print(f"{'filas':>12} {'método':>8} {'segundos':>10} {'filas/s':>14} {'pico MB':>10}")
+    for filas in args.filas:
+        df = generar_datos(filas)
+        dimensiones = construir_dimensiones(df)
+        
+        claves_validas = {
+            'ID_Tiempo': pd.unique(resolver_claves(df, ['FECHA_PROCESO_DATE'])[0]),
+            'ID_Vehiculo': pd.unique(resolver_claves(df, COLUMNAS_VEHICULO)[0]),
+            'ID_Transaccion': pd.unique(resolver_claves(df, COLUMNAS_TRANSACCION)[0]),
+            'ID_Ubicacion': pd.unique(resolver_claves(df, ['CANTÓN'])[0]),
+        }
+        
+        for metodo, funcion, extra in [('merges', lookup_merges, dimensiones),
+                                       ('motor', lookup_motor, claves_validas)]:
+            segundos, pico = medir(funcion, df, extra)
+            print(f"{filas:>12,} {metodo:>8} {segundos:>10.2f} {filas / segundos:>14,.0f} {pico:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tiempo de parseo del DAG, pensado para correr en CI
+
+Cada repetición importa dags/sri_vehiculos_etl_dag.py en un proceso nuevo,
+como hace el procesador de DAGs del scheduler, y mide:
+- el tiempo de importar airflow (ya cargado en el scheduler, se informa aparte)
+- el tiempo de importar el archivo del DAG una vez cargado airflow
+
+Falla (código 1) si el parseo importa alguna librería pesada de la lógica ETL
+(que no haya cargado ya airflow), si la mediana supera la de la línea base
+(benchmarks/linea_base_parseo_dag.json) más --tolerancia o si supera --max-segundos.
+La línea base se regenera con --guardar-base en la máquina (o runner de CI) que compara.
+
+Uso:
+    python benchmarks/bench_parseo_dag.py --repeticiones 10
+    python benchmarks/bench_parseo_dag.py --repeticiones 10 --max-segundos 0.5
+    python benchmarks/bench_parseo_dag.py --repeticiones 10 --guardar-base
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DIRECTORIO_DAGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dags')
+ARCHIVO_DAG = os.path.join(DIRECTORIO_DAGS, 'sri_vehiculos_etl_dag.py')
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base_parseo_dag.json')
+
+# Holgura absoluta para que el ruido en un parseo de milisegundos no cuente como regresión
+HOLGURA_SEGUNDOS = 0.05
+
+# Módulos que no deben cargarse al parsear el DAG
+MODULOS_PESADOS = ['pandas', 'numpy', 'pyarrow', 'google.cloud.bigquery', 'google.cloud.storage', 'sri_etl']
+
+SCRIPT_PARSEO = """
+import importlib.util, json, sys, time
+sys.path.insert(0, {directorio!r})
+inicio = time.perf_counter()
+import airflow
+import airflow.operators.python
+import airflow.operators.empty
+segundos_airflow = time.perf_counter() - inicio
+cargados_por_airflow = set(sys.modules)
+inicio = time.perf_counter()
+spec = importlib.util.spec_from_file_location('sri_vehiculos_etl_dag', {archivo!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+segundos_dag = time.perf_counter() - inicio
+pesados = [m for m in {pesados!r} if m in sys.modules and m not in cargados_por_airflow]
+print(json.dumps({{'airflow': segundos_airflow, 'dag': segundos_dag, 'pesados': pesados}}))
+"""
+
+
+def medir_parseo():
+    """
+    Importa el DAG en un proceso nuevo y devuelve las mediciones
+    """
+    script = SCRIPT_PARSEO.format(directorio=DIRECTORIO_DAGS, archivo=ARCHIVO_DAG, pesados=MODULOS_PESADOS)
+    salida = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--max-segundos', type=float, default=None,
+                        help='Umbral absoluto para la mediana del tiempo de parseo del DAG')
+    parser.add_argument('--linea-base', default=LINEA_BASE)
+    parser.add_argument('--guardar-base', action='store_true', help='Guarda la medición como nueva línea base')
+    parser.add_argument('--tolerancia', type=float, default=0.5,
+                        help='Aumento relativo permitido de la mediana frente a la base')
+    args = parser.parse_args()
+    
+    mediciones = [medir_parseo() for _ in range(args.repeticiones)]
+    tiempos_dag = [m['dag'] for m in mediciones]
+    tiempos_airflow = [m['airflow'] for m in mediciones]
+    pesados = sorted({modulo for m in mediciones for modulo in m['pesados']})
+    mediana = statistics.median(tiempos_dag)
+    
+    print(f"{'repeticiones':>14} {'airflow s':>10} {'dag mediana s':>14} {'dag máx s':>10}")
+    print(f"{args.repeticiones:>14} {statistics.median(tiempos_airflow):>10.3f} {mediana:>14.3f} {max(tiempos_dag):>10.3f}")
+    
+    fallas = []
+    if pesados:
+        fallas.append(f"el parseo importa módulos pesados: {', '.join(pesados)}")
+    if args.max_segundos is not None and mediana > args.max_segundos:
+        fallas.append(f"mediana {mediana:.3f}s supera el umbral de {args.max_segundos:.3f}s")
+    
+    if args.guardar_base:
+        with open(args.linea_base, 'w') as archivo:
+            json.dump({'repeticiones': args.repeticiones, 'dag_mediana_segundos': round(mediana, 4),
+                       'airflow_mediana_segundos': round(statistics.median(tiempos_airflow), 4)}, archivo, indent=2)
+            archivo.write('\n')
+        print(f"💾 Línea base guardada en {args.linea_base}")
+    elif not os.path.exists(args.linea_base):
+        fallas.append(f"no existe {args.linea_base}; ejecute con --guardar-base para crearla")
+    else:
+        with open(args.linea_base) as archivo:
+            base = json.load(archivo)['dag_mediana_segundos']
+        limite = base * (1 + args.tolerancia) + HOLGURA_SEGUNDOS
+        if mediana > limite:
+            fallas.append(f"mediana {mediana:.3f}s frente a {base:.3f}s de la base (límite {limite:.3f}s)")
+    
+    for falla in fallas:
+        print(f"❌ {falla}")
+    if not fallas:
+        print("✅ Sin regresiones frente a la línea base")
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Módulos compartidos por el DAG ETL SRI Vehículos y los scripts de soporte
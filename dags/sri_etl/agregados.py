@@ -0,0 +1,104 @@
+# agregados.py
+# Agregados de la tabla de hechos mantenidos de forma incremental por año
+
+import logging
+from datetime import date
+
+from sri_etl.backends import obtener_bodega
+from sri_etl.constantes import COLUMNA_PARTICION_HECHOS, TABLA_AGREGADO
+from sri_etl.metricas import MedidorEtapas, ESPERA_CONSULTA
+
+# ===============================
+# AGREGADOS INCREMENTALES
+# ===============================
+
+def construir_consulta_agregado(bodega, filtro_fechas=''):
+    """
+    Agregado de hechos por año, marca y provincia
+    Se usan LEFT JOIN para no perder filas con claves huérfanas; las consultas
+    de métricas excluyen los grupos nulos como hacían los INNER JOIN originales
+    El año sale de la fecha de proceso: cada año es un rango exacto de particiones
+    """
+    return f"""
+    SELECT
+        EXTRACT(YEAR FROM f.{COLUMNA_PARTICION_HECHOS}) as Anio,
+        v.Marca,
+        u.Provincia,
+        u.Region,
+        COUNT(*) as TotalRegistros,
+        SUM(f.MontoAvaluo) as MontoTotalAvaluo,
+        COUNT(f.MontoAvaluo) as RegistrosConAvaluo
+    FROM {bodega.tabla('fact_registro_vehiculos')} f
+    LEFT JOIN {bodega.tabla('dim_vehiculo')} v ON f.ID_Vehiculo = v.ID_Vehiculo
+    LEFT JOIN {bodega.tabla('dim_ubicacion')} u ON f.ID_Ubicacion = u.ID_Ubicacion
+    {filtro_fechas}
+    GROUP BY Anio, v.Marca, u.Provincia, u.Region
+    """
+
+def reconstruir_agregado(bodega):
+    """
+    Recalcula el agregado completo desde la tabla de hechos
+    """
+    query = f"""
+    CREATE OR REPLACE TABLE {bodega.tabla(TABLA_AGREGADO)} AS
+    {construir_consulta_agregado(bodega)}
+    """
+    bodega.ejecutar(query)
+
+def recalcular_anios_agregado(bodega, anio_desde, anio_hasta):
+    """
+    Reemplaza las filas del agregado de los años anio_desde..anio_hasta por su
+    recálculo desde la tabla de hechos (solo se escanean esas particiones).
+    Repetirlo deja el mismo resultado, por lo que un reintento no suma dos veces
+    """
+    bodega.reemplazar_filas(
+        TABLA_AGREGADO,
+        construir_consulta_agregado(
+            bodega, f'WHERE f.{COLUMNA_PARTICION_HECHOS} BETWEEN @fecha_desde AND @fecha_hasta'
+        ),
+        'T.Anio BETWEEN @anio_desde AND @anio_hasta',
+        {
+            'fecha_desde': date(anio_desde, 1, 1),
+            'fecha_hasta': date(anio_hasta, 12, 31),
+            'anio_desde': anio_desde,
+            'anio_hasta': anio_hasta
+        }
+    )
+
+def actualizar_agregados(**context):
+    """
+    Mantiene agg_registros_anio_marca_provincia: recalcula los años del rango
+    que cargó la tabla de hechos en esta ejecución
+    """
+    try:
+        logging.info("🧮 Actualizando tablas agregadas...")
+        
+        medidor = MedidorEtapas(context, 'actualizar_agregados')
+        bodega = obtener_bodega()
+        rango = context['ti'].xcom_pull(task_ids='etl_fact_registro_vehiculos', key='rango_carga') or {}
+        
+        if not bodega.existe_tabla(TABLA_AGREGADO) or rango.get('modo_carga') == 'full_refresh':
+            logging.info("🔄 Reconstruyendo el agregado completo")
+            reconstruir_agregado(bodega)
+            medidor.cerrar_etapa(ESPERA_CONSULTA)
+            medidor.publicar()
+            return "Agregado reconstruido"
+        
+        if not rango.get('total_registros'):
+            logging.info("⏭️ Sin registros nuevos; el agregado no cambia")
+            medidor.publicar()
+            return "Agregado sin cambios"
+        
+        # Se recalculan completos los años que tocó la carga (incremental o de particiones)
+        anio_desde = date.fromisoformat(rango['fecha_inicio']).year
+        anio_hasta = date.fromisoformat(rango['fecha_fin']).year
+        logging.info(f"🔁 Recalculando los años {anio_desde} a {anio_hasta} del agregado")
+        recalcular_anios_agregado(bodega, anio_desde, anio_hasta)
+        medidor.cerrar_etapa(ESPERA_CONSULTA, filas_entrada=rango['total_registros'])
+        medidor.publicar()
+        
+        return f"Agregado actualizado con {rango['total_registros']} registros nuevos"
+        
+    except Exception as e:
+        logging.error(f"❌ Error actualizando agregados: {str(e)}")
+        raise
@@ -0,0 +1,79 @@
+# Backends de almacenamiento y bodega de datos
+# 'gcp' (Cloud Storage + BigQuery) o 'local' (directorio + DuckDB)
+
+import os
+import threading
+
+from sri_etl.backends.base import Almacenamiento, Bodega, MODO_AGREGAR, MODO_REEMPLAZAR
+from sri_etl.configuracion import cargar_configuracion, resolver_ruta
+
+BACKENDS = ['gcp', 'local']
+
+_instancias = {}
+_candado = threading.Lock()
+
+def nombre_backend():
+    """
+    Backend activo: variable de entorno SRI_ETL_BACKEND o `backend` en la configuración
+    """
+    nombre = os.environ.get('SRI_ETL_BACKEND') or cargar_configuracion().get('backend', 'gcp')
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend no soportado: {nombre} (opciones: {BACKENDS})")
+    return nombre
+
+def directorio_local():
+    """
+    Directorio de datos del backend local (`local.directorio` en la configuración)
+    """
+    config_local = cargar_configuracion().get('local') or {}
+    return resolver_ruta(config_local.get('directorio', 'local-data'))
+
+def crear_almacenamiento(nombre):
+    from sri_etl.constantes import BUCKET_NAME
+    
+    if nombre == 'local':
+        from sri_etl.backends.local import AlmacenamientoLocal
+        return AlmacenamientoLocal(os.path.join(directorio_local(), 'bucket'))
+    
+    from sri_etl.backends.gcp import AlmacenamientoGCS
+    return AlmacenamientoGCS(BUCKET_NAME)
+
+def crear_bodega(nombre):
+    from sri_etl.constantes import PROJECT_ID, DATASET_ID
+    
+    if nombre == 'local':
+        from sri_etl.backends.local import BodegaDuckDB
+        return BodegaDuckDB(os.path.join(directorio_local(), f'{DATASET_ID}.duckdb'))
+    
+    from sri_etl.backends.gcp import BodegaBigQuery
+    return BodegaBigQuery(PROJECT_ID, DATASET_ID)
+
+def obtener_instancia(tipo, fabrica):
+    clave = (os.getpid(), tipo, nombre_backend())
+    with _candado:
+        if clave not in _instancias:
+            _instancias[clave] = fabrica(clave[2])
+        return _instancias[clave]
+
+def obtener_almacenamiento():
+    """
+    Almacenamiento de objetos del backend activo, compartido en el proceso
+    """
+    return obtener_instancia('almacenamiento', crear_almacenamiento)
+
+def obtener_bodega():
+    """
+    Bodega de datos del backend activo, compartida en el proceso
+    """
+    return obtener_instancia('bodega', crear_bodega)
+
+def registrar_backend(almacenamiento=None, bodega=None):
+    """
+    Reemplaza las instancias del backend activo (p. ej. con dobles en pruebas)
+    """
+    clave = (os.getpid(), nombre_backend())
+    with _candado:
+        if almacenamiento is not None:
+            _instancias[(clave[0], 'almacenamiento', clave[1])] = almacenamiento
+        if bodega is not None:
+            _instancias[(clave[0], 'bodega', clave[1])] = bodega
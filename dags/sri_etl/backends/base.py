@@ -0,0 +1,216 @@
+# base.py
+# Interfaces de almacenamiento de objetos y bodega de datos usadas por las tareas ETL
+
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+
+# Modos de escritura de las cargas
+MODO_REEMPLAZAR = 'reemplazar'
+MODO_AGREGAR = 'agregar'
+
+
+class Contadores:
+    """
+    Contadores acumulados de un backend (bytes transferidos, jobs y sus
+    estadísticas); las métricas por etapa se calculan como diferencias
+    """
+    
+    def __init__(self):
+        self.valores = Counter()
+        self.candado = threading.Lock()
+    
+    def sumar(self, **valores):
+        with self.candado:
+            self.valores.update({clave: valor for clave, valor in valores.items() if valor})
+    
+    def copia(self):
+        with self.candado:
+            return dict(self.valores)
+
+
+class Almacenamiento(ABC):
+    """
+    Almacenamiento de objetos (bucket): archivos fuente, staging y mapas de claves
+    Los nombres son rutas relativas al bucket, p. ej. 'raw-data/sri_vehiculos.csv'
+    Las implementaciones suman bytes_descargados y bytes_subidos en self.contadores
+    """
+    
+    def __init__(self):
+        self.contadores = Contadores()
+    
+    @abstractmethod
+    def metadatos(self, nombre):
+        """
+        Metadatos de un objeto o None si no existe:
+        {'nombre', 'generacion', 'tamano', 'md5', 'crc32c', 'metadata'}
+        """
+    
+    def existe(self, nombre):
+        return self.metadatos(nombre) is not None
+    
+    @abstractmethod
+    def descargar_archivo(self, nombre, ruta, generacion=None):
+        """
+        Descarga un objeto a disco; con generación, falla si el objeto cambió
+        """
+    
+    @abstractmethod
+    def descargar_bytes(self, nombre):
+        """
+        Contenido completo de un objeto
+        """
+    
+    @abstractmethod
+    def subir_archivo(self, ruta, nombre):
+        """
+        Sube un archivo local como objeto
+        """
+    
+    @abstractmethod
+    def subir_bytes(self, datos, nombre, metadata=None):
+        """
+        Sube un contenido en memoria, con metadatos personalizados opcionales
+        """
+    
+    @abstractmethod
+    def listar(self, prefijo):
+        """
+        Nombres de los objetos bajo un prefijo
+        """
+    
+    @abstractmethod
+    def eliminar(self, nombres):
+        """
+        Elimina objetos; los que no existen se ignoran
+        """
+    
+    @abstractmethod
+    def uri(self, nombre):
+        """
+        URI de un objeto (o patrón con comodines) que entiende la bodega asociada
+        """
+
+
+class Bodega(ABC):
+    """
+    Bodega de datos: tablas del modelo dimensional y consultas SQL
+    Las tablas se nombran sin proyecto ni dataset ('dim_tiempo'); en el SQL se
+    usa tabla(nombre) y los parámetros se escriben como @nombre
+    Las implementaciones suman jobs, bytes_procesados, bytes_facturados y slot_ms
+    en self.contadores
+    """
+    
+    def __init__(self):
+        self.contadores = Contadores()
+    
+    @abstractmethod
+    def tabla(self, nombre):
+        """
+        Identificador calificado y entrecomillado de una tabla para usar en SQL
+        """
+    
+    @abstractmethod
+    def consultar(self, sql, parametros=None):
+        """
+        Ejecuta una consulta y devuelve sus filas como diccionarios
+        """
+    
+    @abstractmethod
+    def consultar_df(self, sql, parametros=None):
+        """
+        Ejecuta una consulta y devuelve un DataFrame
+        """
+    
+    def consultar_varias(self, consultas):
+        """
+        Ejecuta consultas independientes {nombre: (sql, parametros)}
+        Devuelve {nombre: filas}; las implementaciones pueden ejecutarlas en paralelo
+        """
+        return {nombre: self.consultar(sql, parametros) for nombre, (sql, parametros) in consultas.items()}
+    
+    @abstractmethod
+    def ejecutar(self, sql, parametros=None):
+        """
+        Ejecuta una sentencia DDL o DML sin resultado
+        """
+    
+    @abstractmethod
+    def cargar_dataframe(self, df, tabla, modo, esquema=None, particion=None, clustering=None):
+        """
+        Carga un DataFrame en una tabla (MODO_REEMPLAZAR o MODO_AGREGAR)
+        esquema: lista opcional de (columna, tipo) con tipos INTEGER, FLOAT, STRING, DATE, TIMESTAMP
+        """
+    
+    @abstractmethod
+    def cargar_parquet(self, uri, tabla, modo, particion=None, clustering=None):
+        """
+        Carga uno o varios archivos Parquet (la URI admite comodines)
+        Devuelve la cantidad de filas cargadas
+        """
+    
+    @abstractmethod
+    def existe_tabla(self, tabla):
+        pass
+    
+    @abstractmethod
+    def eliminar_tabla(self, tabla):
+        """
+        Elimina una tabla si existe
+        """
+    
+    @abstractmethod
+    def particion_tabla(self, tabla):
+        """
+        Columna de partición diaria de la tabla o None
+        """
+    
+    @abstractmethod
+    def clustering_tabla(self, tabla):
+        """
+        Columnas de clustering de la tabla o None
+        """
+    
+    @abstractmethod
+    def actualizar_clustering(self, tabla, columnas):
+        pass
+    
+    @abstractmethod
+    def etiquetas_tabla(self, tabla):
+        """
+        Etiquetas (clave -> valor) de la tabla
+        """
+    
+    @abstractmethod
+    def actualizar_etiquetas(self, tabla, etiquetas):
+        """
+        Agrega o reemplaza etiquetas de la tabla
+        """
+    
+    @abstractmethod
+    def upsert_fila(self, tabla, fila, claves):
+        """
+        Inserta una fila o actualiza la existente con las mismas columnas clave
+        """
+    
+    @abstractmethod
+    def reemplazar_particiones(self, tabla_origen, tabla_destino, columna):
+        """
+        Reemplaza de forma atómica en tabla_destino las fechas de `columna` que
+        aparecen en tabla_origen. Devuelve las fechas reemplazadas, ordenadas
+        """
+    
+    @abstractmethod
+    def agregar_filas_nuevas(self, tabla_origen, tabla_destino, clave, columna):
+        """
+        Agrega de forma atómica a tabla_destino las filas de tabla_origen cuya `clave`
+        no existe todavía; solo se buscan en las fechas de `columna` que aparecen en
+        tabla_origen (cada clave tiene siempre la misma fecha). Devuelve las filas agregadas
+        """
+    
+    @abstractmethod
+    def reemplazar_filas(self, tabla_destino, consulta, condicion, parametros=None):
+        """
+        Reemplaza de forma atómica las filas de tabla_destino que cumplen
+        `condicion` (con alias T) por el resultado de `consulta`
+        """
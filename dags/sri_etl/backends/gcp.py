@@ -0,0 +1,281 @@
+# gcp.py
+# Backend de Google Cloud: Cloud Storage y BigQuery
+
+import os
+from datetime import date, datetime
+
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+
+from sri_etl.backends.base import Almacenamiento, Bodega, MODO_REEMPLAZAR
+from sri_etl.clientes import obtener_cliente_bigquery, obtener_cliente_storage
+
+
+def parametro_bigquery(nombre, valor):
+    """
+    Parámetro de consulta de BigQuery con el tipo inferido del valor de Python
+    """
+    if isinstance(valor, (list, tuple)):
+        tipo = tipo_parametro(valor[0]) if valor else 'STRING'
+        return bigquery.ArrayQueryParameter(nombre, tipo, list(valor))
+    return bigquery.ScalarQueryParameter(nombre, tipo_parametro(valor), valor)
+
+def tipo_parametro(valor):
+    if isinstance(valor, bool):
+        return 'BOOL'
+    if isinstance(valor, int):
+        return 'INT64'
+    if isinstance(valor, float):
+        return 'FLOAT64'
+    if isinstance(valor, datetime):
+        return 'TIMESTAMP'
+    if isinstance(valor, date):
+        return 'DATE'
+    return 'STRING'
+
+def configuracion_consulta(parametros):
+    if not parametros:
+        return None
+    return bigquery.QueryJobConfig(query_parameters=[
+        parametro_bigquery(nombre, valor) for nombre, valor in parametros.items()
+    ])
+
+
+class AlmacenamientoGCS(Almacenamiento):
+    """
+    Bucket de Cloud Storage
+    """
+    
+    def __init__(self, bucket_nombre):
+        super().__init__()
+        self.bucket_nombre = bucket_nombre
+        self.bucket = obtener_cliente_storage().bucket(bucket_nombre)
+    
+    def metadatos(self, nombre):
+        blob = self.bucket.get_blob(nombre)
+        if blob is None:
+            return None
+        return {
+            'nombre': blob.name,
+            'generacion': blob.generation,
+            'tamano': blob.size,
+            'md5': blob.md5_hash,
+            'crc32c': blob.crc32c,
+            'metadata': blob.metadata or {}
+        }
+    
+    def existe(self, nombre):
+        return self.bucket.blob(nombre).exists()
+    
+    def descargar_archivo(self, nombre, ruta, generacion=None):
+        # Fijar la generación evita mezclar versiones si el objeto cambia a mitad de la descarga
+        # raw_download: los objetos con Content-Encoding gzip se bajan tal como están guardados
+        # (sin transcodificación), así que se transfieren comprimidos aunque se llamen .csv;
+        # la compresión se reconoce después por el contenido y los descomprime el parser
+        self.bucket.blob(nombre).download_to_filename(ruta, if_generation_match=generacion, raw_download=True)
+        self.contadores.sumar(bytes_descargados=os.path.getsize(ruta))
+    
+    def descargar_bytes(self, nombre):
+        datos = self.bucket.blob(nombre).download_as_bytes()
+        self.contadores.sumar(bytes_descargados=len(datos))
+        return datos
+    
+    def subir_archivo(self, ruta, nombre):
+        self.bucket.blob(nombre).upload_from_filename(ruta)
+        self.contadores.sumar(bytes_subidos=os.path.getsize(ruta))
+    
+    def subir_bytes(self, datos, nombre, metadata=None):
+        blob = self.bucket.blob(nombre)
+        blob.metadata = metadata
+        blob.upload_from_string(datos, content_type='application/octet-stream')
+        self.contadores.sumar(bytes_subidos=len(datos))
+    
+    def listar(self, prefijo):
+        return [blob.name for blob in self.bucket.list_blobs(prefix=prefijo)]
+    
+    def eliminar(self, nombres):
+        self.bucket.delete_blobs([self.bucket.blob(nombre) for nombre in nombres], on_error=lambda blob: None)
+    
+    def uri(self, nombre):
+        return f'gs://{self.bucket_nombre}/{nombre}'
+
+
+class BodegaBigQuery(Bodega):
+    """
+    Dataset de BigQuery
+    """
+    
+    def __init__(self, project_id, dataset_id):
+        super().__init__()
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.client = obtener_cliente_bigquery(project_id)
+    
+    def id_tabla(self, tabla):
+        return f'{self.project_id}.{self.dataset_id}.{tabla}'
+    
+    def tabla(self, nombre):
+        return f'`{self.id_tabla(nombre)}`'
+    
+    def registrar_job(self, job):
+        """
+        Suma las estadísticas de un job terminado (las cargas no facturan bytes)
+        """
+        self.contadores.sumar(
+            jobs=1,
+            bytes_procesados=getattr(job, 'total_bytes_processed', None),
+            bytes_facturados=getattr(job, 'total_bytes_billed', None),
+            slot_ms=getattr(job, 'slot_millis', None)
+        )
+    
+    def esperar_filas(self, job):
+        filas = [dict(fila.items()) for fila in job.result()]
+        self.registrar_job(job)
+        return filas
+    
+    def consultar(self, sql, parametros=None):
+        return self.esperar_filas(self.client.query(sql, job_config=configuracion_consulta(parametros)))
+    
+    def consultar_df(self, sql, parametros=None):
+        job = self.client.query(sql, job_config=configuracion_consulta(parametros))
+        df = job.to_dataframe()
+        self.registrar_job(job)
+        return df
+    
+    def consultar_varias(self, consultas):
+        # Se envían todas antes de esperar ninguna: el tiempo total es el de la más lenta
+        jobs = {
+            nombre: self.client.query(sql, job_config=configuracion_consulta(parametros))
+            for nombre, (sql, parametros) in consultas.items()
+        }
+        return {nombre: self.esperar_filas(job) for nombre, job in jobs.items()}
+    
+    def ejecutar(self, sql, parametros=None):
+        job = self.client.query(sql, job_config=configuracion_consulta(parametros))
+        job.result()
+        self.registrar_job(job)
+    
+    def configuracion_carga(self, modo, esquema=None, particion=None, clustering=None, **kwargs):
+        return bigquery.LoadJobConfig(
+            write_disposition="WRITE_TRUNCATE" if modo == MODO_REEMPLAZAR else "WRITE_APPEND",
+            schema=[bigquery.SchemaField(columna, tipo) for columna, tipo in esquema] if esquema else None,
+            time_partitioning=bigquery.TimePartitioning(
+                type_=bigquery.TimePartitioningType.DAY, field=particion
+            ) if particion else None,
+            clustering_fields=clustering,
+            **kwargs
+        )
+    
+    def cargar_dataframe(self, df, tabla, modo, esquema=None, particion=None, clustering=None):
+        job_config = self.configuracion_carga(modo, esquema, particion, clustering)
+        job = self.client.load_table_from_dataframe(df, self.id_tabla(tabla), job_config=job_config)
+        job.result()
+        self.registrar_job(job)
+    
+    def cargar_parquet(self, uri, tabla, modo, particion=None, clustering=None):
+        job_config = self.configuracion_carga(
+            modo, particion=particion, clustering=clustering, source_format=bigquery.SourceFormat.PARQUET
+        )
+        job = self.client.load_table_from_uri(uri, self.id_tabla(tabla), job_config=job_config)
+        job.result()
+        self.registrar_job(job)
+        return job.output_rows
+    
+    def obtener_tabla(self, tabla):
+        try:
+            return self.client.get_table(self.id_tabla(tabla))
+        except NotFound:
+            return None
+    
+    def existe_tabla(self, tabla):
+        return self.obtener_tabla(tabla) is not None
+    
+    def eliminar_tabla(self, tabla):
+        self.client.delete_table(self.id_tabla(tabla), not_found_ok=True)
+    
+    def particion_tabla(self, tabla):
+        particion = self.client.get_table(self.id_tabla(tabla)).time_partitioning
+        return particion.field if particion is not None else None
+    
+    def clustering_tabla(self, tabla):
+        return self.client.get_table(self.id_tabla(tabla)).clustering_fields
+    
+    def actualizar_clustering(self, tabla, columnas):
+        tabla_bq = self.client.get_table(self.id_tabla(tabla))
+        tabla_bq.clustering_fields = columnas
+        self.client.update_table(tabla_bq, ['clustering_fields'])
+    
+    def etiquetas_tabla(self, tabla):
+        # Leer etiquetas es una llamada de metadatos: no ejecuta consulta ni escanea bytes
+        return self.client.get_table(self.id_tabla(tabla)).labels or {}
+    
+    def actualizar_etiquetas(self, tabla, etiquetas):
+        tabla_bq = self.client.get_table(self.id_tabla(tabla))
+        tabla_bq.labels = {**(tabla_bq.labels or {}), **etiquetas}
+        self.client.update_table(tabla_bq, ['labels'])
+    
+    def upsert_fila(self, tabla, fila, claves):
+        columnas = list(fila)
+        actualizables = [col for col in columnas if col not in claves]
+        query = f"""
+        MERGE {self.tabla(tabla)} T
+        USING (SELECT {', '.join(f'@{col} AS {col}' for col in columnas)}) S
+        ON {' AND '.join(f'T.{col} = S.{col}' for col in claves)}
+        WHEN MATCHED THEN
+            UPDATE SET {', '.join(f'{col} = S.{col}' for col in actualizables)}
+        WHEN NOT MATCHED THEN
+            INSERT ({', '.join(columnas)})
+            VALUES ({', '.join(f'S.{col}' for col in columnas)})
+        """
+        self.ejecutar(query, fila)
+    
+    def reemplazar_particiones(self, tabla_origen, tabla_destino, columna):
+        query_fechas = f"SELECT ARRAY_AGG(DISTINCT {columna}) as fechas FROM {self.tabla(tabla_origen)}"
+        fechas = sorted(self.consultar(query_fechas)[0]['fechas'] or [])
+        if not fechas:
+            return fechas
+        
+        # Un solo MERGE: borra las particiones afectadas e inserta las nuevas de forma atómica
+        query = f"""
+        MERGE {self.tabla(tabla_destino)} T
+        USING {self.tabla(tabla_origen)} S
+        ON FALSE
+        WHEN NOT MATCHED BY SOURCE AND T.{columna} IN UNNEST(@fechas) THEN
+            DELETE
+        WHEN NOT MATCHED THEN
+            INSERT ROW
+        """
+        self.ejecutar(query, {'fechas': fechas})
+        return fechas
+    
+    def agregar_filas_nuevas(self, tabla_origen, tabla_destino, clave, columna):
+        query_fechas = f"SELECT ARRAY_AGG(DISTINCT {columna}) as fechas FROM {self.tabla(tabla_origen)}"
+        fechas = sorted(self.consultar(query_fechas)[0]['fechas'] or [])
+        if not fechas:
+            return 0
+        
+        # Un solo MERGE; el filtro de fechas en la condición limita las particiones leídas
+        query = f"""
+        MERGE {self.tabla(tabla_destino)} T
+        USING {self.tabla(tabla_origen)} S
+        ON T.{clave} = S.{clave} AND T.{columna} IN UNNEST(@fechas)
+        WHEN NOT MATCHED THEN
+            INSERT ROW
+        """
+        job = self.client.query(query, job_config=configuracion_consulta({'fechas': fechas}))
+        job.result()
+        self.registrar_job(job)
+        return job.num_dml_affected_rows or 0
+    
+    def reemplazar_filas(self, tabla_destino, consulta, condicion, parametros=None):
+        # Un solo MERGE: borra las filas que cumplen la condición e inserta las nuevas
+        query = f"""
+        MERGE {self.tabla(tabla_destino)} T
+        USING ({consulta}) S
+        ON FALSE
+        WHEN NOT MATCHED BY SOURCE AND {condicion} THEN
+            DELETE
+        WHEN NOT MATCHED THEN
+            INSERT ROW
+        """
+        self.ejecutar(query, parametros)
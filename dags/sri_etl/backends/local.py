@@ -0,0 +1,356 @@
+# local.py
+# Backend local: directorio como bucket y DuckDB como bodega de datos
+# Permite ejecutar y perfilar el DAG completo sin Google Cloud
+
+import base64
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+from sri_etl.backends.base import Almacenamiento, Bodega, MODO_REEMPLAZAR
+
+# Segundos que se espera el bloqueo del archivo DuckDB (tareas paralelas en procesos distintos)
+ESPERA_BLOQUEO_DUCKDB = 120
+
+# Tipos del esquema de carga (nombres de BigQuery) a tipos de DuckDB
+TIPOS_DUCKDB = {
+    'INTEGER': 'BIGINT',
+    'INT64': 'BIGINT',
+    'FLOAT': 'DOUBLE',
+    'FLOAT64': 'DOUBLE',
+    'STRING': 'VARCHAR',
+    'DATE': 'DATE',
+    'TIMESTAMP': 'TIMESTAMP',
+    'BOOLEAN': 'BOOLEAN',
+}
+
+DIRECTORIO_METADATOS = '.metadatos'
+
+
+class AlmacenamientoLocal(Almacenamiento):
+    """
+    Directorio que hace de bucket; los metadatos personalizados se guardan
+    en archivos JSON bajo .metadatos/
+    """
+    
+    def __init__(self, directorio):
+        super().__init__()
+        self.directorio = os.path.abspath(directorio)
+        os.makedirs(self.directorio, exist_ok=True)
+    
+    def ruta(self, nombre):
+        return os.path.join(self.directorio, *nombre.split('/'))
+    
+    def ruta_metadatos(self, nombre):
+        return os.path.join(self.directorio, DIRECTORIO_METADATOS, *nombre.split('/')) + '.json'
+    
+    def metadatos(self, nombre):
+        ruta = self.ruta(nombre)
+        if not os.path.isfile(ruta):
+            return None
+        
+        md5 = hashlib.md5()
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+                md5.update(bloque)
+        
+        metadata = {}
+        if os.path.exists(self.ruta_metadatos(nombre)):
+            with open(self.ruta_metadatos(nombre)) as archivo:
+                metadata = json.load(archivo)
+        
+        return {
+            'nombre': nombre,
+            'generacion': os.stat(ruta).st_mtime_ns,
+            'tamano': os.path.getsize(ruta),
+            'md5': base64.b64encode(md5.digest()).decode(),
+            'crc32c': None,
+            'metadata': metadata
+        }
+    
+    def existe(self, nombre):
+        return os.path.isfile(self.ruta(nombre))
+    
+    def descargar_archivo(self, nombre, ruta, generacion=None):
+        if generacion is not None and os.stat(self.ruta(nombre)).st_mtime_ns != generacion:
+            raise RuntimeError(f"{nombre} cambió durante la descarga (generación {generacion})")
+        shutil.copyfile(self.ruta(nombre), ruta)
+        self.contadores.sumar(bytes_descargados=os.path.getsize(ruta))
+    
+    def descargar_bytes(self, nombre):
+        with open(self.ruta(nombre), 'rb') as archivo:
+            datos = archivo.read()
+        self.contadores.sumar(bytes_descargados=len(datos))
+        return datos
+    
+    def subir_archivo(self, ruta, nombre):
+        os.makedirs(os.path.dirname(self.ruta(nombre)), exist_ok=True)
+        shutil.copyfile(ruta, self.ruta(nombre))
+        self.contadores.sumar(bytes_subidos=os.path.getsize(ruta))
+    
+    def subir_bytes(self, datos, nombre, metadata=None):
+        os.makedirs(os.path.dirname(self.ruta(nombre)), exist_ok=True)
+        with open(self.ruta(nombre), 'wb') as archivo:
+            archivo.write(datos)
+        self.contadores.sumar(bytes_subidos=len(datos))
+        
+        ruta_metadatos = self.ruta_metadatos(nombre)
+        if metadata:
+            os.makedirs(os.path.dirname(ruta_metadatos), exist_ok=True)
+            with open(ruta_metadatos, 'w') as archivo:
+                json.dump(metadata, archivo)
+        elif os.path.exists(ruta_metadatos):
+            os.remove(ruta_metadatos)
+    
+    def listar(self, prefijo):
+        nombres = []
+        for raiz, directorios, archivos in os.walk(self.directorio):
+            directorios[:] = [d for d in directorios if d != DIRECTORIO_METADATOS]
+            for archivo in archivos:
+                nombre = os.path.relpath(os.path.join(raiz, archivo), self.directorio).replace(os.sep, '/')
+                if nombre.startswith(prefijo):
+                    nombres.append(nombre)
+        return sorted(nombres)
+    
+    def eliminar(self, nombres):
+        for nombre in nombres:
+            for ruta in (self.ruta(nombre), self.ruta_metadatos(nombre)):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+    
+    def uri(self, nombre):
+        return self.ruta(nombre)
+
+
+class BodegaDuckDB(Bodega):
+    """
+    Base de datos DuckDB en un archivo local
+    Particiones, clustering y etiquetas no existen en DuckDB: se registran en
+    un JSON junto a la base para que las tareas vean el mismo estado que en BigQuery
+    """
+    
+    def __init__(self, ruta_base_datos):
+        super().__init__()
+        self.ruta_base_datos = os.path.abspath(ruta_base_datos)
+        self.ruta_metadatos = f'{self.ruta_base_datos}.metadatos.json'
+        os.makedirs(os.path.dirname(self.ruta_base_datos), exist_ok=True)
+    
+    @contextlib.contextmanager
+    def conexion(self):
+        """
+        Conexión de corta duración: DuckDB admite un solo proceso escritor,
+        así que las tareas paralelas esperan el bloqueo en lugar de fallar
+        """
+        import duckdb
+        
+        limite = time.monotonic() + ESPERA_BLOQUEO_DUCKDB
+        while True:
+            try:
+                con = duckdb.connect(self.ruta_base_datos)
+                break
+            except duckdb.IOException:
+                if time.monotonic() > limite:
+                    raise
+                time.sleep(0.5)
+        try:
+            yield con
+        finally:
+            con.close()
+            # Cada conexión atiende una operación: cuenta como un job (DuckDB no factura bytes)
+            self.contadores.sumar(jobs=1)
+    
+    @staticmethod
+    def traducir_sql(sql):
+        """
+        Los parámetros @nombre del SQL de BigQuery se escriben $nombre en DuckDB
+        """
+        return re.sub(r'@(\w+)', r'$\1', sql)
+    
+    def tabla(self, nombre):
+        return f'"{nombre}"'
+    
+    def consultar(self, sql, parametros=None):
+        with self.conexion() as con:
+            cursor = con.execute(self.traducir_sql(sql), parametros or {})
+            columnas = [descripcion[0] for descripcion in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    
+    def consultar_df(self, sql, parametros=None):
+        with self.conexion() as con:
+            return con.execute(self.traducir_sql(sql), parametros or {}).df()
+    
+    def ejecutar(self, sql, parametros=None):
+        with self.conexion() as con:
+            con.execute(self.traducir_sql(sql), parametros or {})
+    
+    def escribir_tabla(self, con, seleccion, tabla, modo):
+        """
+        Crea o reemplaza la tabla con el resultado de `seleccion`, o lo agrega
+        (por nombre de columna) si la tabla ya existe
+        """
+        if modo == MODO_REEMPLAZAR or not self.existe_tabla_en(con, tabla):
+            con.execute(f"CREATE OR REPLACE TABLE {self.tabla(tabla)} AS {seleccion}")
+        else:
+            con.execute(f"INSERT INTO {self.tabla(tabla)} BY NAME {seleccion}")
+    
+    def cargar_dataframe(self, df, tabla, modo, esquema=None, particion=None, clustering=None):
+        # Las categorías se cargarían como ENUM: se cargan como texto, igual que en BigQuery
+        categoricas = df.select_dtypes('category').columns
+        if len(categoricas):
+            df = df.astype({col: object for col in categoricas})
+        
+        tipos = dict(esquema or [])
+        columnas = [
+            f'CAST("{col}" AS {TIPOS_DUCKDB[tipos[col]]}) AS "{col}"' if col in tipos else f'"{col}"'
+            for col in df.columns
+        ]
+        with self.conexion() as con:
+            con.register('df_carga', df)
+            try:
+                self.escribir_tabla(con, f"SELECT {', '.join(columnas)} FROM df_carga", tabla, modo)
+            finally:
+                con.unregister('df_carga')
+        self.registrar_estructura(tabla, modo, particion, clustering)
+    
+    def cargar_parquet(self, uri, tabla, modo, particion=None, clustering=None):
+        archivos = sorted(glob.glob(uri))
+        if not archivos:
+            raise FileNotFoundError(f"No hay archivos Parquet en {uri}")
+        
+        # Sin hive_partitioning: las rutas de staging (run_id=.../generation=...) no son columnas
+        origen = f"read_parquet({archivos!r}, hive_partitioning = false)"
+        with self.conexion() as con:
+            filas = con.execute(f"SELECT COUNT(*) FROM {origen}").fetchone()[0]
+            self.escribir_tabla(con, f"SELECT * FROM {origen}", tabla, modo)
+        self.registrar_estructura(tabla, modo, particion, clustering)
+        return filas
+    
+    def existe_tabla_en(self, con, tabla):
+        return con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [tabla]
+        ).fetchone()[0] > 0
+    
+    def existe_tabla(self, tabla):
+        with self.conexion() as con:
+            return self.existe_tabla_en(con, tabla)
+    
+    def eliminar_tabla(self, tabla):
+        with self.metadatos_bloqueados() as metadatos:
+            with self.conexion() as con:
+                con.execute(f"DROP TABLE IF EXISTS {self.tabla(tabla)}")
+            metadatos.pop(tabla, None)
+    
+    # Metadatos de tabla (partición, clustering y etiquetas)
+    
+    def leer_metadatos(self):
+        if not os.path.exists(self.ruta_metadatos):
+            return {}
+        with open(self.ruta_metadatos) as archivo:
+            return json.load(archivo)
+    
+    @contextlib.contextmanager
+    def metadatos_bloqueados(self):
+        """
+        Lee y reescribe el JSON de metadatos con un bloqueo entre procesos
+        (un archivo creado en modo exclusivo)
+        """
+        ruta_bloqueo = f'{self.ruta_metadatos}.lock'
+        limite = time.monotonic() + ESPERA_BLOQUEO_DUCKDB
+        while True:
+            try:
+                descriptor = os.open(ruta_bloqueo, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() > limite:
+                    raise
+                time.sleep(0.1)
+        try:
+            metadatos = self.leer_metadatos()
+            yield metadatos
+            with open(self.ruta_metadatos, 'w') as archivo:
+                json.dump(metadatos, archivo, indent=2)
+        finally:
+            os.close(descriptor)
+            os.remove(ruta_bloqueo)
+    
+    def registrar_estructura(self, tabla, modo, particion, clustering):
+        """
+        Igual que en BigQuery, la partición y el clustering se fijan al crear la tabla
+        """
+        with self.metadatos_bloqueados() as metadatos:
+            actual = metadatos.get(tabla)
+            if modo == MODO_REEMPLAZAR or not actual:
+                etiquetas = (actual or {}).get('etiquetas', {})
+                metadatos[tabla] = {'particion': particion, 'clustering': clustering, 'etiquetas': etiquetas}
+    
+    def particion_tabla(self, tabla):
+        return self.leer_metadatos().get(tabla, {}).get('particion')
+    
+    def clustering_tabla(self, tabla):
+        return self.leer_metadatos().get(tabla, {}).get('clustering')
+    
+    def actualizar_clustering(self, tabla, columnas):
+        with self.metadatos_bloqueados() as metadatos:
+            metadatos.setdefault(tabla, {})['clustering'] = columnas
+    
+    def etiquetas_tabla(self, tabla):
+        return self.leer_metadatos().get(tabla, {}).get('etiquetas', {})
+    
+    def actualizar_etiquetas(self, tabla, etiquetas):
+        with self.metadatos_bloqueados() as metadatos:
+            metadatos.setdefault(tabla, {}).setdefault('etiquetas', {}).update(etiquetas)
+    
+    # Operaciones DML que en BigQuery se resuelven con MERGE
+    
+    def upsert_fila(self, tabla, fila, claves):
+        columnas = list(fila)
+        with self.conexion() as con:
+            con.execute("BEGIN TRANSACTION")
+            con.execute(
+                f"DELETE FROM {self.tabla(tabla)} WHERE {' AND '.join(f'{col} = ${col}' for col in claves)}",
+                {col: fila[col] for col in claves}
+            )
+            con.execute(
+                f"INSERT INTO {self.tabla(tabla)} ({', '.join(columnas)}) "
+                f"VALUES ({', '.join(f'${col}' for col in columnas)})",
+                fila
+            )
+            con.execute("COMMIT")
+    
+    def reemplazar_particiones(self, tabla_origen, tabla_destino, columna):
+        origen, destino = self.tabla(tabla_origen), self.tabla(tabla_destino)
+        with self.conexion() as con:
+            fechas = [fila[0] for fila in con.execute(
+                f"SELECT DISTINCT {columna} FROM {origen} WHERE {columna} IS NOT NULL ORDER BY 1"
+            ).fetchall()]
+            if fechas:
+                con.execute("BEGIN TRANSACTION")
+                con.execute(f"DELETE FROM {destino} WHERE {columna} IN (SELECT {columna} FROM {origen})")
+                con.execute(f"INSERT INTO {destino} BY NAME SELECT * FROM {origen}")
+                con.execute("COMMIT")
+        return fechas
+    
+    def agregar_filas_nuevas(self, tabla_origen, tabla_destino, clave, columna):
+        origen, destino = self.tabla(tabla_origen), self.tabla(tabla_destino)
+        with self.conexion() as con:
+            return con.execute(
+                f"INSERT INTO {destino} BY NAME SELECT * FROM {origen} S WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {destino} T WHERE T.{clave} = S.{clave} AND T.{columna} = S.{columna})"
+            ).fetchone()[0]
+    
+    def reemplazar_filas(self, tabla_destino, consulta, condicion, parametros=None):
+        destino = self.tabla(tabla_destino)
+        with self.conexion() as con:
+            con.execute("BEGIN TRANSACTION")
+            # DuckDB rechaza parámetros que la sentencia no usa: cada una recibe los suyos
+            for sql in [f"DELETE FROM {destino} T WHERE {condicion}", f"INSERT INTO {destino} BY NAME ({consulta})"]:
+                con.execute(
+                    self.traducir_sql(sql),
+                    {nombre: valor for nombre, valor in (parametros or {}).items() if f'@{nombre}' in sql}
+                )
+            con.execute("COMMIT")
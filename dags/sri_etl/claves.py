@@ -0,0 +1,235 @@
+# claves.py
+# Claves subrogadas deterministas, fechas de proceso y mapas de claves
+
+import hashlib
+import logging
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from sri_etl.backends import obtener_almacenamiento
+from sri_etl.constantes import (
+    MAPAS_CLAVES_FOLDER, CLAVES_DIMENSIONES,
+    CANDIDATAS_FECHA, FORMATOS_FECHA_PROCESO
+)
+
+# ===============================
+# CLAVES SUBROGADAS DETERMINISTAS
+# ===============================
+
+def normalizar_valores_clave(serie):
+    """
+    Normaliza una columna de clave natural a texto estable entre ejecuciones
+    Los flotantes enteros (p. ej. 2025.0 por la presencia de nulos) se tratan como enteros
+    """
+    if pd.api.types.is_float_dtype(serie):
+        no_nulos = serie.dropna()
+        if (no_nulos == no_nulos.round()).all():
+            serie = serie.astype('Int64')
+    return serie.astype('string').str.strip().str.upper().fillna('')
+
+def normalizar_texto(serie):
+    """
+    Limpia una columna de texto (mayúsculas, sin espacios en los extremos) sobre sus
+    valores únicos, o las categorías si es categórica, y reparte el resultado con los
+    códigos por fila. Devuelve un categórico; los nulos se conservan como nulos, así
+    que la clave subrogada es la misma que la de la columna sin limpiar
+    """
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        return serie
+    
+    # Valores que solo difieren en mayúsculas o espacios comparten categoría
+    codigos_limpios, categorias = pd.factorize(pd.Index(unicos).astype(str).str.strip().str.upper())
+    codigos = np.where(codigos >= 0, codigos_limpios[codigos], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categorias), index=serie.index, name=serie.name)
+
+def codificar_claves(df, columnas):
+    """
+    Factoriza las columnas de clave natural en un código entero por combinación única
+    Devuelve (códigos por fila, posición de la primera fila de cada combinación)
+    Cada paso es una factorización por hash, así que el costo es casi lineal
+    """
+    codigos = np.zeros(len(df), dtype='int64')
+    for col in columnas:
+        # Los nulos reciben el código 0 para que formen su propia combinación
+        codigos_col, valores_unicos = pd.factorize(df[col])
+        combinados = codigos * (len(valores_unicos) + 1) + (codigos_col.astype('int64') + 1)
+        codigos = pd.factorize(combinados)[0].astype('int64')
+    
+    total_combinaciones = int(codigos.max()) + 1 if len(codigos) else 0
+    
+    # Con índices repetidos gana la última asignación: al recorrer al revés queda la primera fila
+    primeras = np.empty(total_combinaciones, dtype='int64')
+    primeras[codigos[::-1]] = np.arange(len(codigos) - 1, -1, -1)
+    return codigos, primeras
+
+def hashear_claves(df, columnas):
+    """
+    Hash determinista de 63 bits de las columnas de clave natural normalizadas
+    """
+    valores = pd.DataFrame({
+        str(posicion): normalizar_valores_clave(df[col]) for posicion, col in enumerate(columnas)
+    }, index=df.index)
+    hashes = pd.util.hash_pandas_object(valores, index=False).to_numpy()
+    return (hashes & np.uint64(0x7FFFFFFFFFFFFFFF)).astype('int64')
+
+def resolver_claves(df, columnas, claves_validas=None):
+    """
+    Motor de lookup de claves subrogadas
+    Normaliza y hashea solo las combinaciones únicas de la clave natural y reparte
+    el resultado por indexación con los códigos enteros, sin DataFrames intermedios
+    Devuelve (claves por fila, máscara de claves con miembro en claves_validas o None)
+    """
+    codigos, primeras = codificar_claves(df, columnas)
+    unicos = pd.DataFrame({col: df[col].iloc[primeras].reset_index(drop=True) for col in columnas})
+    claves_unicas = hashear_claves(unicos, columnas)
+    
+    validos = None
+    if claves_validas is not None:
+        # Pertenencia por tabla hash, consultada solo con las combinaciones únicas
+        validos = pd.Index(claves_unicas).isin(claves_validas)[codigos]
+    
+    return claves_unicas[codigos], validos
+
+def generar_clave_subrogada(df, columnas):
+    """
+    Genera claves subrogadas deterministas de 63 bits a partir de columnas de clave natural
+    La misma combinación de valores produce la misma clave en cualquier ejecución,
+    por lo que dimensiones y hechos pueden calcularlas de forma independiente
+    """
+    return resolver_claves(df, columnas)[0]
+
+def generar_clave_registro(artefacto, filas):
+    """
+    Genera el ID de cada registro de hechos a partir del artefacto de staging del que
+    viene (archivo fuente y generación) y de su número de fila dentro de él
+    Cada lote o shard lo calcula por su cuenta, sin estado compartido entre lotes
+    """
+    base = pd.util.hash_pandas_object(pd.Series([artefacto or ''], dtype=object), index=False).to_numpy()[0]
+    filas = np.asarray(filas, dtype='int64')
+    hashes = pd.util.hash_pandas_object(
+        pd.DataFrame({'base': np.full(len(filas), base, dtype='uint64'), 'fila': filas}), index=False
+    ).to_numpy()
+    return (hashes & np.uint64(0x7FFFFFFFFFFFFFFF)).astype('int64')
+
+# Clave del miembro genérico de ubicación (archivo sin columna de cantón)
+CLAVE_UBICACION_NO_ESPECIFICADA = 1
+
+# ===============================
+# FECHAS DE PROCESO
+# ===============================
+
+def resolver_columna_fecha(columnas):
+    """
+    Devuelve la columna de fecha de proceso del archivo
+    Acepta los nombres candidatos y cualquier variante que empiece por 'FECHA PROCESO'
+    """
+    for col in CANDIDATAS_FECHA:
+        if col in columnas:
+            return col
+    for col in columnas:
+        if str(col).upper().replace('_', ' ').startswith('FECHA PROCESO'):
+            return col
+    return None
+
+def detectar_formato_fecha(valores):
+    """
+    Elige entre FORMATOS_FECHA_PROCESO el formato que interpreta más valores únicos
+    """
+    valores = pd.Index(pd.unique(pd.Series(valores).dropna().astype(str)))
+    mejor_formato, mejor_validas = FORMATOS_FECHA_PROCESO[0], -1
+    for formato in FORMATOS_FECHA_PROCESO:
+        validas = pd.to_datetime(valores, format=formato, errors='coerce').notna().sum()
+        if validas > mejor_validas:
+            mejor_formato, mejor_validas = formato, validas
+    return mejor_formato
+
+def parsear_fechas(serie, formato):
+    """
+    Interpreta una columna de fechas con formato explícito sobre sus valores únicos
+    Un archivo tiene unos cientos de fechas distintas frente a millones de filas
+    Devuelve (códigos por fila, fechas únicas); los nulos tienen código -1
+    """
+    codigos, valores_unicos = pd.factorize(serie)
+    fechas_unicas = pd.to_datetime(
+        pd.Index(valores_unicos).astype(str), format=formato, errors='coerce'
+    )
+    return codigos, pd.DatetimeIndex(fechas_unicas)
+
+def calcular_id_tiempo(fechas):
+    """
+    Clave de tiempo aritmética AAAAMMDD, compartida por dim_tiempo y la tabla de hechos
+    """
+    fechas = pd.DatetimeIndex(fechas)
+    return (fechas.year * 10000 + fechas.month * 100 + fechas.day).to_numpy().astype('int64')
+
+# ===============================
+# CACHÉ DE MAPAS DE CLAVES DE DIMENSIONES
+# ===============================
+
+def calcular_huella_claves(ids):
+    """
+    Huella del contenido de una dimensión: SHA-256 de sus claves ordenadas
+    Se recorta a 32 caracteres para poder guardarla como etiqueta de BigQuery
+    """
+    ids_ordenados = np.sort(np.asarray(ids, dtype='int64'))
+    return hashlib.sha256(ids_ordenados.tobytes()).hexdigest()[:32]
+
+def publicar_mapa_claves(bodega, tabla, ids):
+    """
+    Guarda en staging las claves (IDs) de una dimensión recién cargada
+    y etiqueta la tabla de la bodega con la huella de su contenido
+    """
+    columna_id = CLAVES_DIMENSIONES[tabla]
+    ids = np.asarray(ids, dtype='int64')
+    huella = calcular_huella_claves(ids)
+    
+    buffer = BytesIO()
+    pd.DataFrame({columna_id: ids}).to_parquet(buffer, index=False, compression='snappy')
+    
+    obtener_almacenamiento().subir_bytes(
+        buffer.getvalue(), f'{MAPAS_CLAVES_FOLDER}{tabla}.parquet', metadata={'huella': huella}
+    )
+    bodega.actualizar_etiquetas(tabla, {'huella_claves': huella})
+    
+    logging.info(f"🗝️ Mapa de claves de {tabla} publicado ({len(ids)} claves, huella {huella})")
+    return huella
+
+def leer_mapa_publicado(bodega, tabla):
+    """
+    Lee las claves del mapa publicado en staging si su huella coincide
+    con la etiqueta de la tabla; devuelve None si no existe o no coincide
+    """
+    huella_tabla = bodega.etiquetas_tabla(tabla).get('huella_claves')
+    
+    almacenamiento = obtener_almacenamiento()
+    nombre_mapa = f'{MAPAS_CLAVES_FOLDER}{tabla}.parquet'
+    metadatos = almacenamiento.metadatos(nombre_mapa)
+    
+    if metadatos is None or not huella_tabla or metadatos['metadata'].get('huella') != huella_tabla:
+        return None
+    
+    logging.info(f"🗝️ Claves de {tabla} desde caché (huella {huella_tabla})")
+    columna_id = CLAVES_DIMENSIONES[tabla]
+    archivo = pq.ParquetFile(BytesIO(almacenamiento.descargar_bytes(nombre_mapa)))
+    return archivo.read(columns=[columna_id]).column(columna_id).to_numpy()
+
+def cargar_claves_dimension(bodega, tabla):
+    """
+    Devuelve las claves vigentes de una dimensión
+    Usa el mapa en staging si su huella coincide con la etiqueta de la tabla;
+    si no, consulta en la bodega solo la columna de clave y vuelve a publicar el mapa
+    """
+    ids = leer_mapa_publicado(bodega, tabla)
+    if ids is not None:
+        return ids
+    
+    logging.info(f"🔍 Huella de {tabla} no coincide con la caché: consultando la bodega")
+    columna_id = CLAVES_DIMENSIONES[tabla]
+    query = f"SELECT {columna_id} FROM {bodega.tabla(tabla)}"
+    ids = bodega.consultar_df(query)[columna_id].to_numpy()
+    publicar_mapa_claves(bodega, tabla, ids)
+    return ids
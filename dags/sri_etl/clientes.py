@@ -0,0 +1,95 @@
+# clientes.py
+# Proveedor de clientes de Google Cloud compartidos por las tareas del DAG
+
+import logging
+import os
+import threading
+
+# Conexiones HTTP reutilizables por cliente (subidas y consultas en paralelo)
+TAMANO_POOL_HTTP = 32
+
+_clientes = {}
+_fabricas = {}
+_candado = threading.Lock()
+
+def configurar_pool_http(cliente, tamano=TAMANO_POOL_HTTP):
+    """
+    Amplía el pool de conexiones de la sesión HTTP autenticada del cliente
+    (requests usa 10 por defecto, que se agotan con subidas en paralelo)
+    """
+    from requests.adapters import HTTPAdapter
+    
+    sesion = getattr(cliente, '_http', None)
+    if sesion is None or not hasattr(sesion, 'mount'):
+        return cliente
+    
+    adaptador = HTTPAdapter(pool_connections=tamano, pool_maxsize=tamano)
+    sesion.mount('https://', adaptador)
+    sesion.mount('http://', adaptador)
+    return cliente
+
+def _crear_cliente_storage(project=None):
+    from google.cloud import storage
+    return configurar_pool_http(storage.Client(project=project))
+
+def _crear_cliente_bigquery(project=None):
+    from google.cloud import bigquery
+    return configurar_pool_http(bigquery.Client(project=project))
+
+_FABRICAS_POR_DEFECTO = {
+    'storage': _crear_cliente_storage,
+    'bigquery': _crear_cliente_bigquery,
+}
+
+def registrar_fabrica(tipo, fabrica):
+    """
+    Reemplaza la fábrica de un tipo de cliente ('storage' o 'bigquery'),
+    por ejemplo con un cliente falso en pruebas. None restaura la original
+    """
+    if tipo not in _FABRICAS_POR_DEFECTO:
+        raise ValueError(f"Tipo de cliente no soportado: {tipo}")
+    
+    with _candado:
+        if fabrica is None:
+            _fabricas.pop(tipo, None)
+        else:
+            _fabricas[tipo] = fabrica
+        limpiar_clientes(tipo)
+
+def limpiar_clientes(tipo=None):
+    """
+    Descarta los clientes en caché (todos o los de un tipo)
+    """
+    for clave in [clave for clave in _clientes if tipo is None or clave[1] == tipo]:
+        _clientes.pop(clave, None)
+
+def obtener_cliente(tipo, project=None):
+    """
+    Devuelve el cliente en caché para este proceso, creándolo la primera vez
+    La clave incluye el PID: un cliente heredado por fork no comparte sockets
+    """
+    clave = (os.getpid(), tipo, project)
+    cliente = _clientes.get(clave)
+    if cliente is not None:
+        return cliente
+    
+    with _candado:
+        cliente = _clientes.get(clave)
+        if cliente is None:
+            fabrica = _fabricas.get(tipo) or _FABRICAS_POR_DEFECTO[tipo]
+            logging.info(f"🔌 Creando cliente {tipo} (proyecto: {project or 'por defecto'})")
+            cliente = fabrica(project)
+            _clientes[clave] = cliente
+        return cliente
+
+def obtener_cliente_storage(project=None):
+    """
+    Cliente de Cloud Storage compartido en el proceso
+    """
+    return obtener_cliente('storage', project)
+
+def obtener_cliente_bigquery(project=None):
+    """
+    Cliente de BigQuery compartido en el proceso
+    """
+    return obtener_cliente('bigquery', project)
@@ -0,0 +1,42 @@
+# configuracion.py
+# Lectura de config/variables.yaml para el DAG ETL SRI Vehículos
+
+import logging
+import os
+from functools import lru_cache
+
+import yaml
+
+# Ruta por defecto: config/variables.yaml en la raíz del repositorio
+RUTA_CONFIGURACION = os.environ.get(
+    'SRI_ETL_CONFIG',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'variables.yaml')
+)
+
+@lru_cache(maxsize=None)
+def cargar_configuracion(ruta=RUTA_CONFIGURACION):
+    """
+    Lee el archivo de configuración una vez por proceso
+    Si no existe se devuelve una configuración vacía y se usan los valores por defecto
+    """
+    if not os.path.exists(ruta):
+        logging.warning(f"⚠️ No existe {ruta}; se usan los valores por defecto")
+        return {}
+    
+    with open(ruta, 'r') as archivo:
+        return yaml.safe_load(archivo) or {}
+
+def resolver_ruta(ruta):
+    """
+    Las rutas relativas de la configuración se resuelven desde la raíz del repositorio
+    (el directorio que contiene config/)
+    """
+    if os.path.isabs(ruta):
+        return ruta
+    return os.path.normpath(os.path.join(os.path.dirname(RUTA_CONFIGURACION), '..', ruta))
+
+def configuracion_bigquery():
+    """
+    Sección `bigquery` de la configuración
+    """
+    return cargar_configuracion().get('bigquery') or {}
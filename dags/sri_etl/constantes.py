@@ -0,0 +1,174 @@
+# constantes.py
+# Constantes y esquemas compartidos por las tareas ETL
+
+import os
+
+import numpy as np
+import pyarrow as pa
+
+from sri_etl.configuracion import cargar_configuracion, resolver_ruta
+
+# Variables de configuración, desde config/variables.yaml (ver sri_etl.configuracion)
+_config = cargar_configuracion()
+PROJECT_ID = _config.get('project_id', 'sri-vehiculos-etl')
+DATASET_ID = _config.get('dataset_id', 'sri_vehiculos_dw')
+BUCKET_NAME = _config.get('bucket_name', 'sri-vehiculos-etl-bucket-angel')
+
+# Rutas dentro del bucket: los archivos fuente son los CSV publicados bajo el prefijo,
+# planos o comprimidos (se descomprimen en flujo al convertirlos a Parquet)
+PREFIJO_FUENTE = _config.get('source_prefix', 'raw-data/')
+EXTENSIONES_FUENTE = ('.csv', '.csv.gz', '.csv.zst')
+# La compresión se reconoce por los primeros bytes del archivo descargado y no por su
+# nombre: un .csv subido con Content-Encoding gzip se descarga comprimido
+FIRMAS_COMPRESION = {b'\x1f\x8b': 'gzip', b'\x28\xb5\x2f\xfd': 'zstd'}
+STAGING_FOLDER = 'staging/'
+MAPAS_CLAVES_FOLDER = f'{STAGING_FOLDER}mapas_claves/'
+
+# Cada archivo fuente se convierte a Parquet una sola vez por generación;
+# el manifiesto registra los convertidos y si ya se cargaron a la bodega
+FUENTES_STAGING_FOLDER = f'{STAGING_FOLDER}fuentes/'
+MANIFIESTO_FUENTES = f'{STAGING_FOLDER}manifiesto_fuentes.json'
+HILOS_INGESTA = 4
+
+# Variable de Airflow con la huella del archivo fuente de la última ejecución exitosa
+VARIABLE_HUELLA_FUENTE = 'sri_vehiculos_huella_fuente'
+
+# Columna de clave subrogada de cada dimensión
+CLAVES_DIMENSIONES = {
+    'dim_tiempo': 'ID_Tiempo',
+    'dim_vehiculo': 'ID_Vehiculo',
+    'dim_transaccion': 'ID_Transaccion',
+    'dim_ubicacion': 'ID_Ubicacion',
+}
+
+# Procesamiento de la tabla de hechos: 'memoria' (archivo completo), 'streaming' (por lotes)
+# o 'paralelo' (un shard por mes de proceso en varios procesos)
+MODO_HECHOS = 'memoria'
+TAMANO_LOTE_HECHOS = 250_000
+
+# Procesos que transforman los shards mensuales en modo paralelo
+PROCESOS_HECHOS = os.cpu_count() or 1
+
+# En modo streaming cada lote se sube como un shard Parquet en paralelo
+# y la tabla se carga con un único job sobre el prefijo de shards
+HILOS_SUBIDA_SHARDS = 8
+
+# Carga de la tabla de hechos: 'incremental' (solo fechas posteriores a la marca de agua),
+# 'particiones' (reemplaza solo las fechas presentes en el archivo)
+# o 'full_refresh' (reconstrucción completa)
+MODOS_CARGA_HECHOS = ['incremental', 'particiones', 'full_refresh']
+MODO_CARGA_HECHOS = 'incremental'
+COLUMNA_PARTICION_HECHOS = 'FechaProceso'
+
+# Columnas de fact_registro_vehiculos
+COLUMNAS_FACT = [
+    'ID_Registro',
+    'ID_Tiempo',
+    'ID_Vehiculo', 
+    'ID_Transaccion',
+    'ID_Ubicacion',
+    'CantidadRegistros',
+    'MontoAvaluo',
+    COLUMNA_PARTICION_HECHOS
+]
+
+# BigQuery admite como máximo cuatro columnas de clustering
+MAX_COLUMNAS_CLUSTERING = 4
+
+# Agregado de hechos que lee generar_metricas_negocio
+TABLA_AGREGADO = 'agg_registros_anio_marca_provincia'
+
+# Métricas por etapa de cada tarea (XCom y tabla de la bodega)
+TABLA_METRICAS = 'etl_run_metrics'
+CLAVE_XCOM_METRICAS = 'metricas_etapas'
+TAREAS_INSTRUMENTADAS = [
+    'extraer_datos_fuente', 'etl_dim_tiempo', 'etl_dim_vehiculo', 'etl_dim_transaccion',
+    'etl_dim_ubicacion', 'etl_fact_registro_vehiculos', 'actualizar_agregados',
+    'validar_calidad_datos', 'generar_metricas_negocio'
+]
+
+# Columnas que lee cada tarea desde el artefacto de staging
+COLUMNAS_VEHICULO = [
+    'CÓDIGO DE VEHÍCULO', 'MARCA', 'MODELO', 'PAÍS',
+    'AÑO MODELO', 'CLASE', 'SUB CLASE', 'TIPO',
+    'CILINDRAJE', 'TIPO COMBUSTIBLE', 'COLOR 1', 'COLOR 2'
+]
+COLUMNAS_TRANSACCION = [
+    'TIPO TRANSACCIÓN', 'TIPO SERVICIO',
+    'PERSONA NATURAL - JURÍDICA', 'CATEGORÍA'
+]
+CANDIDATAS_CANTON = ['CANTON', 'CANTÓN', 'canton', 'cantón']
+
+# Referencia de cantones (código SRI, cantón, provincia y región) que se une con
+# dim_ubicacion; por defecto la empaquetada en sri_etl/referencias/, con los cantones
+# de la DPA del INEC. El código SRI antepone al código DPA de 4 dígitos un prefijo
+# por provincia: 1 costa (con Santa Elena), 2 sierra (con Santo Domingo), 3 amazonía, 4 Galápagos
+RUTA_REFERENCIA_CANTONES = resolver_ruta(_config.get(
+    'canton_reference_file',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'referencias', 'cantones.csv')
+))
+COLUMNAS_REFERENCIA_CANTONES = ['CodigoCanton', 'NombreCanton', 'Provincia', 'Region']
+CANDIDATAS_FECHA = [
+    'FECHA PROCESO (DD/MM/AA)', 'FECHA PROCESO', 'FECHA_PROCESO', 'fecha_proceso', 'FECHA'
+]
+
+# Formatos aceptados para la fecha de proceso, en orden de preferencia ante empates
+# El encabezado dice DD/MM/AA, pero los archivos publicados traen M/D/AAAA
+FORMATOS_FECHA_PROCESO = ['%m/%d/%Y', '%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d']
+
+# Días que dim_tiempo cubre más allá de la última fecha de proceso de los datos
+HORIZONTE_CALENDARIO_DIAS = 365
+NOMBRES_MES = np.array([
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+    'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+], dtype=object)
+NOMBRES_DIA_SEMANA = np.array([
+    'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'
+], dtype=object)
+CANDIDATAS_CODIGO_VEHICULO = ['CÓDIGO DE VEHÍCULO', 'CODIGO_VEHICULO', 'codigo_vehiculo']
+CANDIDATAS_AVALUO = ['AVALUO', 'AVALÚO', 'avaluo', 'avalúo']
+COLUMNAS_HECHOS = (
+    CANDIDATAS_FECHA + COLUMNAS_VEHICULO + COLUMNAS_TRANSACCION
+    + CANDIDATAS_CANTON + CANDIDATAS_AVALUO
+)
+
+# Esquema de ingesta del archivo VEHICULOS_SRI.csv
+# Los campos 'category' son texto de baja cardinalidad: se guardan como texto
+# (codificado por diccionario en Parquet) y se leen como categóricos desde staging
+ESQUEMA_SRI = {
+    'CATEGORÍA': 'Int64',
+    'CÓDIGO DE VEHÍCULO': 'Int64',
+    'TIPO TRANSACCIÓN': 'category',
+    'MARCA': 'category',
+    'MODELO': 'category',
+    'PAÍS': 'category',
+    'AÑO MODELO': 'Int16',
+    'CLASE': 'category',
+    'SUB CLASE': 'category',
+    'TIPO': 'category',
+    'AVALÚO': 'float64',
+    'FECHA PROCESO (DD/MM/AA)': 'category',
+    'TIPO SERVICIO': 'category',
+    'CILINDRAJE': 'Int32',
+    'TIPO COMBUSTIBLE': 'category',
+    'FECHA COMPRA (DD/MM/AA)': 'category',
+    'CANTÓN': 'Int32',
+    'COLOR 1': 'category',
+    'COLOR 2': 'category',
+    'PERSONA NATURAL - JURÍDICA': 'category',
+}
+
+# Tipo Arrow con el que se escribe cada tipo del esquema en staging
+TIPOS_ARROW = {
+    'Int64': pa.int64(),
+    'Int32': pa.int32(),
+    'Int16': pa.int16(),
+    'float64': pa.float64(),
+    'category': pa.string(),
+}
+
+# Solo se ingieren las columnas que usa alguna tarea
+COLUMNAS_INGESTA = list(dict.fromkeys(
+    COLUMNAS_HECHOS + COLUMNAS_VEHICULO + COLUMNAS_TRANSACCION + CANDIDATAS_CANTON
+))
+TAMANO_LOTE_INGESTA = 250_000
@@ -0,0 +1,488 @@
+# dimensiones.py
+# Tareas ETL de las dimensiones
+
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from sri_etl.backends import obtener_bodega, MODO_AGREGAR, MODO_REEMPLAZAR
+from sri_etl.constantes import (
+    COLUMNAS_VEHICULO, COLUMNAS_TRANSACCION, CANDIDATAS_CANTON,
+    CANDIDATAS_FECHA, HORIZONTE_CALENDARIO_DIAS, NOMBRES_MES, NOMBRES_DIA_SEMANA,
+    RUTA_REFERENCIA_CANTONES, COLUMNAS_REFERENCIA_CANTONES, CLAVES_DIMENSIONES
+)
+from sri_etl.staging import leer_datos_staging, rutas_staging, obtener_conf
+from sri_etl.metricas import MedidorEtapas, EXTRACCION, TRANSFORMACION, CARGA, ESPERA_CONSULTA
+from sri_etl.claves import (
+    normalizar_valores_clave, normalizar_texto, generar_clave_subrogada, CLAVE_UBICACION_NO_ESPECIFICADA,
+    resolver_columna_fecha, detectar_formato_fecha, parsear_fechas, calcular_id_tiempo,
+    publicar_mapa_claves, cargar_claves_dimension
+)
+
+# ===============================
+# FUNCIONES ETL PARA DIMENSIONES
+# ===============================
+
+def construir_calendario(inicio, fin):
+    """
+    Construye los días de la dimensión tiempo entre dos fechas (inclusive)
+    Los nombres en español se obtienen por índice, sin depender del locale
+    """
+    fechas = pd.date_range(start=inicio, end=fin, freq='D')
+    return pd.DataFrame({
+        'ID_Tiempo': calcular_id_tiempo(fechas),
+        'FechaCompleta': fechas.date,
+        'Anio': fechas.year,
+        'Trimestre': fechas.quarter,
+        'Mes': fechas.month,
+        'Dia': fechas.day,
+        'NombreMes': NOMBRES_MES[fechas.month.to_numpy() - 1],
+        'NombreDiaSemana': NOMBRES_DIA_SEMANA[fechas.dayofweek.to_numpy()]
+    })
+
+def rango_fechas_proceso(context, solo_pendientes=False):
+    """
+    Fecha de proceso mínima y máxima de los archivos en staging (con solo_pendientes,
+    solo de los que ninguna ejecución exitosa cargó todavía)
+    Sin columna de fecha se usa la fecha actual, igual que en la tabla de hechos
+    """
+    df = leer_datos_staging(context, CANDIDATAS_FECHA, solo_pendientes=solo_pendientes)
+    col_fecha = resolver_columna_fecha(df.columns)
+    if col_fecha is None:
+        hoy = datetime.now().date()
+        return hoy, hoy
+    
+    _, fechas_unicas = parsear_fechas(df[col_fecha], detectar_formato_fecha(df[col_fecha]))
+    fechas_unicas = fechas_unicas.dropna()
+    if len(fechas_unicas) == 0:
+        return None, None
+    return fechas_unicas.min().date(), fechas_unicas.max().date()
+
+@lru_cache(maxsize=None)
+def cargar_referencia_cantones(ruta=RUTA_REFERENCIA_CANTONES):
+    """
+    Lee la referencia de cantones una vez por proceso (worker)
+    Los códigos se normalizan igual que el cantón de los datos, que se ingiere como entero
+    """
+    referencia = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+    faltantes = [col for col in COLUMNAS_REFERENCIA_CANTONES if col not in referencia.columns]
+    if faltantes:
+        raise ValueError(f"La referencia de cantones {ruta} no tiene las columnas {faltantes}")
+    
+    referencia = referencia[COLUMNAS_REFERENCIA_CANTONES].apply(lambda col: col.str.strip().str.upper())
+    referencia['CodigoCanton'] = normalizar_valores_clave(referencia['CodigoCanton'])
+    duplicados = referencia['CodigoCanton'].duplicated()
+    if duplicados.any():
+        raise ValueError(f"Códigos de cantón repetidos en {ruta}: "
+                         f"{sorted(referencia.loc[duplicados, 'CodigoCanton'].unique())}")
+    
+    logging.info(f"🗺️ Referencia de cantones cargada: {len(referencia)} cantones desde {ruta}")
+    return referencia
+
+def modo_carga_dimension(context, bodega, tabla):
+    """
+    Decide cómo se mantiene una dimensión en esta ejecución:
+    MODO_REEMPLAZAR (full_refresh o tabla inexistente) la reconstruye desde todos los archivos,
+    MODO_AGREGAR le agrega los miembros nuevos de las fuentes pendientes
+    y None indica que no hay fuentes pendientes (la dimensión no cambia)
+    """
+    if obtener_conf(context).get('full_refresh'):
+        logging.info(f"🔄 full_refresh: {tabla} se reconstruye")
+        return MODO_REEMPLAZAR
+    if not bodega.existe_tabla(tabla):
+        logging.info(f"🆕 {tabla} no existe: se crea con todos los archivos fuente")
+        return MODO_REEMPLAZAR
+    if not rutas_staging(context, solo_pendientes=True):
+        return None
+    return MODO_AGREGAR
+
+def cargar_miembros_nuevos(bodega, tabla, dim_df, modo):
+    """
+    Carga una dimensión en solo-agregar: anti-join de los miembros entrantes contra las
+    claves de los existentes (solo la columna de ID, que es el hash de la clave natural)
+    y se agregan solo los nuevos, que conservan las filas e IDs previos.
+    En MODO_REEMPLAZAR se carga la dimensión completa
+    Devuelve la cantidad de filas cargadas
+    """
+    columna_id = CLAVES_DIMENSIONES[tabla]
+    if modo == MODO_REEMPLAZAR:
+        bodega.cargar_dataframe(dim_df, tabla, MODO_REEMPLAZAR)
+        publicar_mapa_claves(bodega, tabla, dim_df[columna_id])
+        return len(dim_df)
+    
+    existentes = cargar_claves_dimension(bodega, tabla)
+    nuevos = dim_df[~dim_df[columna_id].isin(existentes)]
+    logging.info(f"🆕 {tabla}: {len(nuevos)} miembros nuevos de {len(dim_df)} entrantes "
+                 f"({len(existentes)} existentes)")
+    
+    if len(nuevos):
+        bodega.cargar_dataframe(nuevos, tabla, MODO_AGREGAR)
+        publicar_mapa_claves(bodega, tabla, np.concatenate([existentes, nuevos[columna_id].to_numpy()]))
+    return len(nuevos)
+
+# Esquema explícito de dim_tiempo (FechaCompleta como DATE)
+ESQUEMA_DIM_TIEMPO = [
+    ('ID_Tiempo', 'INTEGER'),
+    ('FechaCompleta', 'DATE'),
+    ('Anio', 'INTEGER'),
+    ('Trimestre', 'INTEGER'),
+    ('Mes', 'INTEGER'),
+    ('Dia', 'INTEGER'),
+    ('NombreMes', 'STRING'),
+    ('NombreDiaSemana', 'STRING'),
+]
+
+def leer_rango_calendario(bodega):
+    """
+    Rango de fechas cubierto por dim_tiempo y si su contenido es un calendario
+    contiguo con claves AAAAMMDD (si no, hay que reconstruirlo)
+    """
+    if not bodega.existe_tabla('dim_tiempo'):
+        return None, None, False
+    
+    query = f"""
+    SELECT
+        MIN(FechaCompleta) as fecha_min,
+        MAX(FechaCompleta) as fecha_max,
+        COUNT(*) as total_registros,
+        COUNT(CASE WHEN ID_Tiempo != EXTRACT(YEAR FROM FechaCompleta) * 10000
+                   + EXTRACT(MONTH FROM FechaCompleta) * 100
+                   + EXTRACT(DAY FROM FechaCompleta) THEN 1 END) as claves_distintas
+    FROM {bodega.tabla('dim_tiempo')}
+    """
+    fila = bodega.consultar(query)[0]
+    
+    if fila['fecha_min'] is None:
+        return None, None, False
+    
+    dias_esperados = (fila['fecha_max'] - fila['fecha_min']).days + 1
+    valido = fila['claves_distintas'] == 0 and fila['total_registros'] == dias_esperados
+    return fila['fecha_min'], fila['fecha_max'], valido
+
+def etl_dim_tiempo(**context):
+    """
+    Proceso ETL para la dimensión Tiempo
+    Cubre las fechas de proceso del archivo más un horizonte configurable
+    y solo agrega los días que faltan en el calendario existente
+    Si el calendario es válido (y no es full_refresh) basta leer las fechas de las
+    fuentes pendientes: las de los archivos ya cargados ya están cubiertas
+    """
+    try:
+        logging.info("🕐 Iniciando ETL para Dim_Tiempo...")
+        
+        medidor = MedidorEtapas(context, 'etl_dim_tiempo')
+        bodega = obtener_bodega()
+        
+        # Rango existente
+        fecha_min_actual, fecha_max_actual, calendario_valido = leer_rango_calendario(bodega)
+        medidor.cerrar_etapa(ESPERA_CONSULTA)
+        
+        solo_pendientes = calendario_valido and not obtener_conf(context).get('full_refresh')
+        if solo_pendientes and not rutas_staging(context, solo_pendientes=True):
+            logging.info("⏭️ Sin fuentes pendientes: dim_tiempo sin cambios")
+            medidor.publicar()
+            return "Dim_Tiempo sin cambios: no hay fuentes pendientes"
+        
+        # Rango requerido según los datos
+        fecha_min_datos, fecha_max_datos = rango_fechas_proceso(context, solo_pendientes)
+        medidor.cerrar_etapa(EXTRACCION)
+        if fecha_min_datos is None:
+            logging.warning("No hay fechas de proceso válidas. Se mantiene el calendario actual.")
+            medidor.publicar()
+            return "Dim_Tiempo sin cambios: no hay fechas de proceso válidas"
+        
+        inicio = fecha_min_datos
+        fin = fecha_max_datos + timedelta(days=HORIZONTE_CALENDARIO_DIAS)
+        logging.info(f"📅 Rango requerido: {inicio} a {fin}")
+        
+        if calendario_valido:
+            if fecha_min_actual <= inicio and fecha_max_actual >= fin:
+                logging.info(f"⏭️ dim_tiempo ya cubre el rango ({fecha_min_actual} a {fecha_max_actual})")
+                medidor.publicar()
+                return f"Dim_Tiempo sin cambios: cubre {fecha_min_actual} a {fecha_max_actual}"
+            
+            # Solo los días que faltan antes y después del rango existente
+            tramos = []
+            if inicio < fecha_min_actual:
+                tramos.append(construir_calendario(inicio, fecha_min_actual - timedelta(days=1)))
+            if fin > fecha_max_actual:
+                tramos.append(construir_calendario(fecha_max_actual + timedelta(days=1), fin))
+            dim_tiempo = pd.concat(tramos, ignore_index=True)
+            inicio, fin = min(inicio, fecha_min_actual), max(fin, fecha_max_actual)
+            modo = MODO_AGREGAR
+        else:
+            if fecha_min_actual is not None:
+                logging.warning("⚠️ dim_tiempo no es un calendario AAAAMMDD contiguo; se reconstruye")
+            dim_tiempo = construir_calendario(inicio, fin)
+            modo = MODO_REEMPLAZAR
+        
+        medidor.cerrar_etapa(TRANSFORMACION, filas_salida=len(dim_tiempo))
+        logging.info(f"📅 Agregando {len(dim_tiempo)} días a dim_tiempo ({modo})")
+        
+        # Cargar a la bodega
+        bodega.cargar_dataframe(dim_tiempo, 'dim_tiempo', modo, esquema=ESQUEMA_DIM_TIEMPO)
+        
+        # El mapa de claves cubre el calendario completo, no solo los días agregados
+        calendario = construir_calendario(inicio, fin)
+        publicar_mapa_claves(bodega, 'dim_tiempo', calendario['ID_Tiempo'])
+        medidor.cerrar_etapa(CARGA, filas_entrada=len(dim_tiempo))
+        medidor.publicar()
+        
+        logging.info(f"✅ Cargados {len(dim_tiempo)} registros en dim_tiempo")
+        return f"Dim_Tiempo cargada exitosamente: {len(dim_tiempo)} registros"
+        
+    except Exception as e:
+        logging.error(f"❌ Error en ETL Dim_Tiempo: {str(e)}")
+        raise
+
+def etl_dim_vehiculo(**context):
+    """
+    Proceso ETL para la dimensión Vehículo
+    Extrae características únicas de vehículos del archivo CSV
+    """
+    try:
+        logging.info("🚗 Iniciando ETL para Dim_Vehiculo...")
+        
+        medidor = MedidorEtapas(context, 'etl_dim_vehiculo')
+        bodega = obtener_bodega()
+        
+        # Solo se agregan los miembros nuevos: basta leer las fuentes pendientes
+        modo = modo_carga_dimension(context, bodega, 'dim_vehiculo')
+        if modo is None:
+            logging.info("⏭️ Sin fuentes pendientes: dim_vehiculo sin cambios")
+            medidor.publicar()
+            return "Dim_Vehiculo sin cambios: no hay fuentes pendientes"
+        
+        # Leer solo las columnas de vehículo desde staging
+        df = leer_datos_staging(context, COLUMNAS_VEHICULO, solo_pendientes=modo == MODO_AGREGAR)
+        medidor.cerrar_etapa(EXTRACCION, filas_salida=len(df))
+        
+        logging.info(f"📊 Datos extraídos: {len(df)} registros originales")
+        
+        # Seleccionar columnas para la dimensión vehículo
+        columnas_vehiculo = COLUMNAS_VEHICULO
+        
+        # Verificar que las columnas existen
+        columnas_existentes = [col for col in columnas_vehiculo if col in df.columns]
+        if len(columnas_existentes) != len(columnas_vehiculo):
+            logging.warning(f"Algunas columnas no encontradas. Usando: {columnas_existentes}")
+        
+        # Limpiar y estandarizar datos sobre los valores únicos de cada columna,
+        # antes de deduplicar para que las variantes de mayúsculas o espacios se unan
+        df = df[columnas_existentes].copy()
+        for col in ['MARCA', 'MODELO', 'PAÍS', 'CLASE', 'SUB CLASE', 'TIPO', 'TIPO COMBUSTIBLE']:
+            if col in df.columns:
+                df[col] = normalizar_texto(df[col])
+        
+        # Crear dimensión con registros únicos
+        dim_vehiculo = df.drop_duplicates().reset_index(drop=True)
+        
+        # Generar clave subrogada determinista desde la clave natural
+        # (la clave también unifica las variantes de las columnas que no se limpian)
+        dim_vehiculo['ID_Vehiculo'] = generar_clave_subrogada(dim_vehiculo, columnas_existentes)
+        dim_vehiculo = dim_vehiculo.drop_duplicates(subset=['ID_Vehiculo']).reset_index(drop=True)
+        
+        # Manejar valores nulos
+        if 'COLOR 2' in dim_vehiculo.columns:
+            dim_vehiculo['COLOR 2'] = dim_vehiculo['COLOR 2'].astype(object).fillna('N/A')
+        
+        # Renombrar columnas para la bodega (sin espacios ni caracteres especiales)
+        rename_dict = {
+            'CÓDIGO DE VEHÍCULO': 'CodigoVehiculo',
+            'MARCA': 'Marca',
+            'MODELO': 'Modelo',
+            'PAÍS': 'Pais',
+            'AÑO MODELO': 'AnioModelo',
+            'CLASE': 'Clase',
+            'SUB CLASE': 'SubClase',
+            'TIPO': 'Tipo',
+            'CILINDRAJE': 'Cilindraje',
+            'TIPO COMBUSTIBLE': 'TipoCombustible',
+            'COLOR 1': 'Color1',
+            'COLOR 2': 'Color2'
+        }
+        
+        # Solo renombrar columnas que existen
+        rename_dict_filtered = {k: v for k, v in rename_dict.items() if k in dim_vehiculo.columns}
+        dim_vehiculo = dim_vehiculo.rename(columns=rename_dict_filtered)
+        
+        # Reordenar columnas (solo las que existen)
+        columnas_orden = ['ID_Vehiculo'] + [v for k, v in rename_dict_filtered.items()]
+        dim_vehiculo = dim_vehiculo[columnas_orden]
+        
+        # Las columnas categóricas se cargan como texto plano
+        categoricas = dim_vehiculo.select_dtypes('category').columns
+        dim_vehiculo[categoricas] = dim_vehiculo[categoricas].astype(object)
+        
+        logging.info(f"🔧 Transformación completada: {len(dim_vehiculo)} vehículos únicos")
+        
+        medidor.cerrar_etapa(TRANSFORMACION, filas_entrada=len(df), filas_salida=len(dim_vehiculo))
+        
+        # Cargar a la bodega solo los miembros nuevos (o la dimensión completa si se reconstruye)
+        cargados = cargar_miembros_nuevos(bodega, 'dim_vehiculo', dim_vehiculo, modo)
+        medidor.cerrar_etapa(CARGA, filas_entrada=cargados)
+        medidor.publicar()
+        
+        logging.info(f"✅ Cargados {cargados} registros en dim_vehiculo ({len(dim_vehiculo)} entrantes)")
+        return f"Dim_Vehiculo cargada exitosamente: {cargados} registros ({modo})"
+        
+    except Exception as e:
+        logging.error(f"❌ Error en ETL Dim_Vehiculo: {str(e)}")
+        raise
+
+def etl_dim_transaccion(**context):
+    """
+    Proceso ETL para la dimensión Transacción
+    Crea combinaciones únicas de tipos de transacción y servicio
+    """
+    try:
+        logging.info("💼 Iniciando ETL para Dim_Transaccion...")
+        
+        medidor = MedidorEtapas(context, 'etl_dim_transaccion')
+        bodega = obtener_bodega()
+        
+        # Solo se agregan los miembros nuevos: basta leer las fuentes pendientes
+        modo = modo_carga_dimension(context, bodega, 'dim_transaccion')
+        if modo is None:
+            logging.info("⏭️ Sin fuentes pendientes: dim_transaccion sin cambios")
+            medidor.publicar()
+            return "Dim_Transaccion sin cambios: no hay fuentes pendientes"
+        
+        # Leer solo las columnas de transacción desde staging
+        df = leer_datos_staging(context, COLUMNAS_TRANSACCION, solo_pendientes=modo == MODO_AGREGAR)
+        medidor.cerrar_etapa(EXTRACCION, filas_salida=len(df))
+        
+        # Seleccionar columnas para dimensión transacción
+        columnas_transaccion = COLUMNAS_TRANSACCION
+        
+        # Verificar columnas existentes
+        columnas_existentes = [col for col in columnas_transaccion if col in df.columns]
+        logging.info(f"Columnas encontradas: {columnas_existentes}")
+        
+        # Limpiar datos sobre los valores únicos de cada columna, antes de deduplicar
+        df = df[columnas_existentes].copy()
+        for col in columnas_existentes:
+            df[col] = normalizar_texto(df[col])
+        
+        # Crear dimensión con combinaciones únicas
+        dim_transaccion = df.drop_duplicates().reset_index(drop=True)
+        
+        # Generar clave subrogada determinista desde la clave natural
+        dim_transaccion['ID_Transaccion'] = generar_clave_subrogada(dim_transaccion, columnas_existentes)
+        
+        # Renombrar columnas
+        rename_dict = {
+            'TIPO TRANSACCIÓN': 'TipoTransaccion',
+            'TIPO SERVICIO': 'TipoServicio',
+            'PERSONA NATURAL - JURÍDICA': 'PersonaTipo',
+            'CATEGORÍA': 'Categoria'
+        }
+        
+        rename_dict_filtered = {k: v for k, v in rename_dict.items() if k in dim_transaccion.columns}
+        dim_transaccion = dim_transaccion.rename(columns=rename_dict_filtered)
+        
+        # Reordenar columnas
+        columnas_orden = ['ID_Transaccion'] + [v for k, v in rename_dict_filtered.items()]
+        dim_transaccion = dim_transaccion[columnas_orden]
+        
+        # Las columnas categóricas se cargan como texto plano
+        categoricas = dim_transaccion.select_dtypes('category').columns
+        dim_transaccion[categoricas] = dim_transaccion[categoricas].astype(object)
+        
+        logging.info(f"🔧 Transformación completada: {len(dim_transaccion)} tipos de transacción únicos")
+        
+        medidor.cerrar_etapa(TRANSFORMACION, filas_entrada=len(df), filas_salida=len(dim_transaccion))
+        
+        # Cargar a la bodega solo los miembros nuevos (o la dimensión completa si se reconstruye)
+        cargados = cargar_miembros_nuevos(bodega, 'dim_transaccion', dim_transaccion, modo)
+        medidor.cerrar_etapa(CARGA, filas_entrada=cargados)
+        medidor.publicar()
+        
+        logging.info(f"✅ Cargados {cargados} registros en dim_transaccion ({len(dim_transaccion)} entrantes)")
+        return f"Dim_Transaccion cargada exitosamente: {cargados} registros ({modo})"
+        
+    except Exception as e:
+        logging.error(f"❌ Error en ETL Dim_Transaccion: {str(e)}")
+        raise
+
+def etl_dim_ubicacion(**context):
+    """
+    Proceso ETL para la dimensión Ubicación
+    Mapea códigos de cantón a información geográfica completa
+    """
+    try:
+        logging.info("🌎 Iniciando ETL para Dim_Ubicacion...")
+        
+        medidor = MedidorEtapas(context, 'etl_dim_ubicacion')
+        bodega = obtener_bodega()
+        
+        # Solo se agregan los miembros nuevos: basta leer las fuentes pendientes
+        modo = modo_carga_dimension(context, bodega, 'dim_ubicacion')
+        if modo is None:
+            logging.info("⏭️ Sin fuentes pendientes: dim_ubicacion sin cambios")
+            medidor.publicar()
+            return "Dim_Ubicacion sin cambios: no hay fuentes pendientes"
+        
+        # Leer solo la columna de cantón desde staging
+        df = leer_datos_staging(context, CANDIDATAS_CANTON, solo_pendientes=modo == MODO_AGREGAR)
+        medidor.cerrar_etapa(EXTRACCION, filas_salida=len(df))
+        
+        # Verificar si la columna CANTON existe
+        col_canton = None
+        for col in CANDIDATAS_CANTON:
+            if col in df.columns:
+                col_canton = col
+                break
+        
+        if col_canton is None:
+            logging.warning("No se encontró columna de cantón. Usando ubicación genérica.")
+            # Crear una ubicación por defecto
+            dim_ubicacion = pd.DataFrame([{
+                'ID_Ubicacion': CLAVE_UBICACION_NO_ESPECIFICADA,
+                'CodigoCanton': '99999',
+                'NombreCanton': 'NO_ESPECIFICADO',
+                'Provincia': 'NO_ESPECIFICADA',
+                'Region': 'NO_ESPECIFICADA',
+                'Pais': 'ECUADOR'
+            }])
+        else:
+            # Obtener cantones únicos del dataset
+            cantones_dataset = df[[col_canton]].dropna().drop_duplicates()
+            
+            # Claves deterministas y códigos normalizados igual que en la tabla de hechos
+            ids_canton = generar_clave_subrogada(cantones_dataset, [col_canton])
+            codigos_canton = normalizar_valores_clave(cantones_dataset[col_canton])
+            
+            # Unir con la referencia; los códigos sin referencia quedan como cantón genérico
+            dim_ubicacion = pd.DataFrame({
+                'ID_Ubicacion': ids_canton,
+                'CodigoCanton': codigos_canton.to_numpy()
+            }).merge(cargar_referencia_cantones(), on='CodigoCanton', how='left')
+            
+            no_mapeados = dim_ubicacion['NombreCanton'].isna()
+            dim_ubicacion['NombreCanton'] = dim_ubicacion['NombreCanton'].fillna('CANTON_' + dim_ubicacion['CodigoCanton'])
+            dim_ubicacion[['Provincia', 'Region']] = dim_ubicacion[['Provincia', 'Region']].fillna('NO_IDENTIFICADA')
+            dim_ubicacion['Pais'] = 'ECUADOR'
+            
+            if no_mapeados.any():
+                logging.warning(f"⚠️ {int(no_mapeados.sum())} códigos de cantón sin referencia: "
+                                f"{sorted(dim_ubicacion.loc[no_mapeados, 'CodigoCanton'])[:20]}")
+        
+        logging.info(f"🔧 Transformación completada: {len(dim_ubicacion)} ubicaciones únicas")
+        
+        medidor.cerrar_etapa(TRANSFORMACION, filas_entrada=len(df), filas_salida=len(dim_ubicacion))
+        
+        # Cargar a la bodega solo los miembros nuevos (o la dimensión completa si se reconstruye)
+        cargados = cargar_miembros_nuevos(bodega, 'dim_ubicacion', dim_ubicacion, modo)
+        medidor.cerrar_etapa(CARGA, filas_entrada=cargados)
+        medidor.publicar()
+        
+        logging.info(f"✅ Cargados {cargados} registros en dim_ubicacion ({len(dim_ubicacion)} entrantes)")
+        return f"Dim_Ubicacion cargada exitosamente: {cargados} registros ({modo})"
+        
+    except Exception as e:
+        logging.error(f"❌ Error en ETL Dim_Ubicacion: {str(e)}")
+        raise
@@ -0,0 +1,799 @@
+# hechos.py
+# Tarea ETL de la tabla de hechos: marcas de agua, particiones y cargas
+
+import logging
+import multiprocessing
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from sri_etl.backends import obtener_almacenamiento, obtener_bodega, MODO_REEMPLAZAR
+from sri_etl.configuracion import configuracion_bigquery
+from sri_etl.constantes import (
+    CLAVES_DIMENSIONES, MODO_HECHOS, PROCESOS_HECHOS,
+    TAMANO_LOTE_HECHOS, HILOS_SUBIDA_SHARDS, MODOS_CARGA_HECHOS, MODO_CARGA_HECHOS,
+    COLUMNA_PARTICION_HECHOS, COLUMNAS_FACT, MAX_COLUMNAS_CLUSTERING, COLUMNAS_VEHICULO,
+    COLUMNAS_TRANSACCION, CANDIDATAS_CANTON, CANDIDATAS_AVALUO, COLUMNAS_HECHOS, HILOS_INGESTA
+)
+from sri_etl.staging import (
+    columnas_categoricas, obtener_conf, rutas_staging, columnas_comunes,
+    construir_prefijo_ejecucion, fuente_artefacto, rutas_recargadas
+)
+from sri_etl.metricas import MedidorEtapas, EXTRACCION, TRANSFORMACION, LOOKUP, CARGA, ESPERA_CONSULTA
+from sri_etl.claves import (
+    resolver_claves, generar_clave_registro, CLAVE_UBICACION_NO_ESPECIFICADA,
+    resolver_columna_fecha, detectar_formato_fecha, parsear_fechas, calcular_id_tiempo,
+    cargar_claves_dimension
+)
+
+# ===============================
+# FUNCIÓN ETL PARA TABLA DE HECHOS
+# ===============================
+
+def crear_tabla_watermarks(bodega):
+    """
+    Crea la tabla de control de marcas de agua si no existe
+    """
+    query = f"""
+    CREATE TABLE IF NOT EXISTS {bodega.tabla('etl_watermarks')} (
+        tabla STRING NOT NULL,
+        columna STRING,
+        valor DATE,
+        actualizado TIMESTAMP
+    )
+    """
+    bodega.ejecutar(query)
+
+def leer_watermark(bodega, tabla):
+    """
+    Lee la marca de agua (última fecha de proceso cargada) de una tabla
+    Devuelve None si la tabla nunca se ha cargado
+    """
+    crear_tabla_watermarks(bodega)
+    
+    query = f"""
+    SELECT valor
+    FROM {bodega.tabla('etl_watermarks')}
+    WHERE tabla = @tabla
+    """
+    filas = bodega.consultar(query, {'tabla': tabla})
+    
+    return filas[0]['valor'] if filas else None
+
+def actualizar_watermark(bodega, tabla, valor):
+    """
+    Registra la nueva marca de agua de una tabla tras una carga exitosa
+    """
+    bodega.upsert_fila('etl_watermarks', {
+        'tabla': tabla,
+        'columna': COLUMNA_PARTICION_HECHOS,
+        'valor': valor,
+        'actualizado': datetime.now()
+    }, ['tabla'])
+
+def clustering_hechos():
+    """
+    Columnas de clustering de la tabla de hechos según config/variables.yaml
+    Solo se usan las que existen en la tabla de hechos (máximo cuatro)
+    """
+    config = configuracion_bigquery()
+    
+    particion = config.get('partitioning_field', COLUMNA_PARTICION_HECHOS)
+    if particion != COLUMNA_PARTICION_HECHOS:
+        logging.warning(f"⚠️ partitioning_field={particion} no es una columna DATE de la tabla de hechos; "
+                        f"se particiona por {COLUMNA_PARTICION_HECHOS}")
+    
+    configuradas = config.get('clustering_fields') or []
+    ignoradas = [col for col in configuradas if col not in COLUMNAS_FACT]
+    if ignoradas:
+        logging.warning(f"⚠️ Columnas de clustering inexistentes en la tabla de hechos: {ignoradas}")
+    
+    return [col for col in configuradas if col in COLUMNAS_FACT][:MAX_COLUMNAS_CLUSTERING] or None
+
+def preparar_tabla_hechos(bodega, tabla, modo_carga):
+    """
+    En una carga completa elimina la tabla previa si no está particionada por
+    fecha de proceso, para que la carga la cree particionada.
+    Si el clustering difiere del configurado lo actualiza (aplica a datos nuevos)
+    """
+    if not bodega.existe_tabla(tabla):
+        return
+    
+    if bodega.particion_tabla(tabla) != COLUMNA_PARTICION_HECHOS:
+        if modo_carga == 'full_refresh':
+            logging.warning(f"⚠️ {tabla} no está particionada por {COLUMNA_PARTICION_HECHOS}; se recrea")
+            bodega.eliminar_tabla(tabla)
+            return
+        logging.warning(f"⚠️ {tabla} no está particionada por {COLUMNA_PARTICION_HECHOS}; "
+                        f"ejecute con full_refresh para recrearla")
+    
+    clustering = clustering_hechos()
+    clustering_actual = bodega.clustering_tabla(tabla)
+    if clustering_actual != clustering:
+        logging.info(f"🗂️ Clustering de {tabla}: {clustering_actual} -> {clustering}")
+        bodega.actualizar_clustering(tabla, clustering)
+
+def opciones_carga_hechos():
+    """
+    Modo, partición y clustering de las cargas de hechos. Todas reemplazan su
+    destino: la tabla completa (full_refresh) o una tabla intermedia
+    """
+    return {
+        'modo': MODO_REEMPLAZAR,
+        'particion': COLUMNA_PARTICION_HECHOS,
+        'clustering': clustering_hechos()
+    }
+
+def reemplazar_particiones(bodega, tabla_origen, tabla):
+    """
+    Reemplaza de forma atómica las particiones de la tabla cuyas fechas
+    aparecen en tabla_origen; el resto de la tabla no se toca.
+    Devuelve las fechas reemplazadas
+    """
+    fechas = bodega.reemplazar_particiones(tabla_origen, tabla, COLUMNA_PARTICION_HECHOS)
+    if fechas:
+        logging.info(f"🔁 Reemplazadas {len(fechas)} particiones ({fechas[0]} a {fechas[-1]})")
+    return fechas
+
+def agregar_registros_nuevos(bodega, tabla_origen, tabla, registros):
+    """
+    Agrega a la tabla solo los registros de tabla_origen cuyo ID_Registro no está
+    cargado: reintentar la tarea o volver a cargar un archivo que quedó pendiente
+    (p. ej. porque falló una tarea posterior) no duplica hechos
+    Devuelve los registros agregados
+    """
+    agregados = bodega.agregar_filas_nuevas(tabla_origen, tabla, 'ID_Registro', COLUMNA_PARTICION_HECHOS)
+    if agregados < registros:
+        logging.info(f"⏭️ {registros - agregados} registros ya estaban en {tabla} y se omiten")
+    return agregados
+
+def transformar_lote_hechos(df_hechos, claves_validas=None, formato_fecha=None, artefacto=None):
+    """
+    Transforma un lote de registros crudos en filas de la tabla de hechos
+    Las claves de dimensión se derivan de las claves naturales de cada fila,
+    sin consultar las dimensiones
+    Con claves_validas las claves que no existen en su dimensión quedan en NULL
+    formato_fecha se decide una vez por archivo para que todos los lotes coincidan
+    Todas las filas del lote vienen del artefacto de staging `artefacto` y el índice
+    del lote es la posición de cada fila en él; ambos forman ID_Registro
+    """
+    # Fechas de proceso: formato explícito, interpretado solo sobre los valores únicos
+    col_fecha = resolver_columna_fecha(df_hechos.columns)
+    if col_fecha:
+        if formato_fecha is None:
+            formato_fecha = detectar_formato_fecha(df_hechos[col_fecha])
+        codigos_fecha, fechas_unicas = parsear_fechas(df_hechos[col_fecha], formato_fecha)
+    else:
+        logging.warning("No se encontró columna de fecha. Usando fecha actual.")
+        codigos_fecha = np.zeros(len(df_hechos), dtype='int64')
+        fechas_unicas = pd.DatetimeIndex([pd.Timestamp(datetime.now().date())])
+    
+    # Conservar fechas válidas (las filas a cargar se eligen antes, por archivo)
+    conservar = (codigos_fecha >= 0) & np.append(fechas_unicas.notna(), False)[codigos_fecha]
+    
+    df_hechos = df_hechos[conservar]
+    codigos_fecha = codigos_fecha[conservar]
+    
+    # Fecha y clave de tiempo por fila a partir de los valores únicos
+    fechas_validas = fechas_unicas.fillna(pd.Timestamp('1900-01-01'))
+    ids_tiempo_unicos = calcular_id_tiempo(fechas_validas)
+    fechas_objeto_unicas = np.array(fechas_validas.date, dtype=object)
+    
+    fact_table = pd.DataFrame(index=df_hechos.index)
+    fact_table['ID_Tiempo'] = ids_tiempo_unicos[codigos_fecha]
+    validos_por_dimension = {'dim_tiempo': None}
+    if claves_validas is not None:
+        validos_por_dimension['dim_tiempo'] = (
+            pd.Index(ids_tiempo_unicos).isin(claves_validas['dim_tiempo'])[codigos_fecha]
+        )
+    
+    col_canton = None
+    for col in CANDIDATAS_CANTON:
+        if col in df_hechos.columns:
+            col_canton = col
+            break
+    
+    # Columnas de clave natural de cada dimensión presentes en el lote
+    columnas_por_dimension = {
+        'dim_vehiculo': [col for col in COLUMNAS_VEHICULO if col in df_hechos.columns],
+        'dim_transaccion': [col for col in COLUMNAS_TRANSACCION if col in df_hechos.columns],
+        'dim_ubicacion': [col_canton] if col_canton else [],
+    }
+    
+    # Claves de dimensión con el motor de lookup (mismas claves que calculan las dimensiones)
+    for tabla, columna_id in CLAVES_DIMENSIONES.items():
+        if tabla == 'dim_tiempo':
+            continue
+        columnas = columnas_por_dimension[tabla]
+        if columnas:
+            fact_table[columna_id], validos_por_dimension[tabla] = resolver_claves(
+                df_hechos, columnas, None if claves_validas is None else claves_validas[tabla]
+            )
+        elif tabla == 'dim_ubicacion':
+            fact_table[columna_id] = CLAVE_UBICACION_NO_ESPECIFICADA
+        else:
+            fact_table[columna_id] = pd.NA  # Sin clave natural disponible
+    
+    # Calcular métricas
+    fact_table['CantidadRegistros'] = 1
+    
+    # Buscar columna de avalúo
+    col_avaluo = None
+    for col in CANDIDATAS_AVALUO:
+        if col in df_hechos.columns:
+            col_avaluo = col
+            break
+    
+    if col_avaluo:
+        fact_table['MontoAvaluo'] = pd.to_numeric(df_hechos[col_avaluo], errors='coerce').fillna(0)
+    else:
+        fact_table['MontoAvaluo'] = 0
+    
+    # Fecha de proceso para particionar la tabla de hechos
+    fact_table[COLUMNA_PARTICION_HECHOS] = fechas_objeto_unicas[codigos_fecha]
+    
+    # ID del registro: artefacto y posición de la fila; no depende de cómo se divida en lotes
+    fact_table['ID_Registro'] = generar_clave_registro(artefacto, df_hechos.index)
+    
+    # Tipos fijos para que todos los lotes compartan el mismo esquema
+    for col in ['ID_Registro', 'CantidadRegistros']:
+        fact_table[col] = fact_table[col].astype('int64')
+    for col in CLAVES_DIMENSIONES.values():
+        fact_table[col] = fact_table[col].astype('Int64')
+    fact_table['MontoAvaluo'] = fact_table['MontoAvaluo'].astype('float64')
+    
+    # Claves huérfanas (sin miembro en su dimensión) quedan en NULL
+    for tabla, validos in validos_por_dimension.items():
+        if validos is not None and not validos.all():
+            columna_id = CLAVES_DIMENSIONES[tabla]
+            logging.warning(f"⚠️ {int((~validos).sum())} registros sin miembro en {tabla}")
+            fact_table.loc[~validos, columna_id] = pd.NA
+    
+    # Seleccionar columnas finales para la tabla de hechos
+    return fact_table[COLUMNAS_FACT].reset_index(drop=True)
+
+def cargar_hechos_memoria(context, bodega, tabla, modo_carga, medidor,
+                          fecha_minima=None, claves_validas=None):
+    """
+    Construye la tabla de hechos con cada archivo fuente completo en memoria
+    y la carga con un solo job
+    Devuelve (registros cargados, primera y última fecha de proceso cargadas)
+    """
+    almacenamiento = obtener_almacenamiento()
+    
+    with tempfile.TemporaryDirectory() as directorio_temporal:
+        # Leer desde staging solo las columnas usadas en la tabla de hechos
+        # (fuera de full_refresh, solo de los archivos fuente aún no cargados)
+        entradas, columnas, formato_fecha = descargar_staging_hechos(
+            context, almacenamiento, directorio_temporal, modo_carga, fecha_minima
+        )
+        col_fecha = resolver_columna_fecha(columnas)
+        datos = [leer_filas_entrada(entrada, columnas, col_fecha) for entrada in entradas]
+    filas_entrada = sum(len(df_archivo) for df_archivo in datos)
+    medidor.cerrar_etapa(EXTRACCION, filas_salida=filas_entrada)
+    logging.info(f"📊 Datos extraídos: {filas_entrada} registros de hechos en {len(datos)} archivos")
+    
+    # Cada archivo se transforma por separado: su artefacto entra en ID_Registro
+    logging.info("🔑 Generando claves de dimensión...")
+    partes = [
+        transformar_lote_hechos(df_archivo, claves_validas, formato_fecha, entrada['artefacto'])
+        for entrada, df_archivo in zip(entradas, datos)
+    ]
+    fact_table = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUMNAS_FACT)
+    total_registros = len(fact_table)
+    
+    medidor.cerrar_etapa(TRANSFORMACION, filas_entrada=filas_entrada, filas_salida=total_registros)
+    logging.info(f"🔧 Tabla de hechos creada: {total_registros} registros")
+    
+    if total_registros == 0:
+        return 0, None, None
+    
+    # Cargar a la bodega
+    bodega.cargar_dataframe(fact_table, tabla, **opciones_carga_hechos())
+    medidor.cerrar_etapa(CARGA, filas_entrada=total_registros)
+    
+    return total_registros, fact_table[COLUMNA_PARTICION_HECHOS].min(), fact_table[COLUMNA_PARTICION_HECHOS].max()
+
+def construir_prefijo_shards(run_id, tabla):
+    """
+    Prefijo de staging para los shards Parquet de una tabla en una ejecución
+    """
+    return f'{construir_prefijo_ejecucion(run_id)}{tabla}/'
+
+def descargar_staging_hechos(context, almacenamiento, directorio, modo_carga, fecha_minima=None):
+    """
+    Baja a disco los artefactos de staging que pueden entrar en la carga: solo los
+    de fuentes pendientes en modo incremental y todos en los demás modos (en
+    particiones, las fechas reemplazadas pueden tener filas de cualquier archivo),
+    y decide qué filas de cada uno se cargan (planificar_filas_hechos)
+    Devuelve (entradas {'ruta': ruta local, 'artefacto': ruta en staging, 'fuente': archivo fuente, ...},
+    columnas de hechos presentes en todos los artefactos, formato de fecha)
+    """
+    pendientes = set(rutas_staging(context, solo_pendientes=True))
+    recargados = set(rutas_recargadas(context))
+    
+    def descargar(numero_ruta):
+        numero, ruta_staging = numero_ruta
+        ruta_local = os.path.join(directorio, f'staging-{numero:05d}.parquet')
+        almacenamiento.descargar_archivo(ruta_staging, ruta_local)
+        return {
+            'ruta': ruta_local,
+            'artefacto': ruta_staging,
+            'fuente': fuente_artefacto(ruta_staging),
+            'pendiente': ruta_staging in pendientes,
+            'recargado': ruta_staging in recargados
+        }
+    
+    rutas = rutas_staging(context, solo_pendientes=modo_carga == 'incremental')
+    with ThreadPoolExecutor(max_workers=HILOS_INGESTA) as executor:
+        entradas = list(executor.map(descargar, enumerate(rutas)))
+    
+    disponibles = set(columnas_comunes([entrada['ruta'] for entrada in entradas]))
+    columnas = [col for col in dict.fromkeys(COLUMNAS_HECHOS) if col in disponibles]
+    entradas, formato_fecha = planificar_filas_hechos(
+        entradas, resolver_columna_fecha(columnas), modo_carga, fecha_minima
+    )
+    return entradas, columnas, formato_fecha
+
+def planificar_filas_hechos(entradas, col_fecha, modo_carga, fecha_minima=None):
+    """
+    Decide con los valores crudos de la fecha de proceso de cada archivo (solo se
+    lee esa columna) el formato de fecha, el mismo para lotes, shards y archivos,
+    y qué filas de cada archivo entran en la carga:
+    - incremental: de una fuente recargada solo las filas posteriores a fecha_minima,
+      las demás ya están en la bodega; las fuentes nuevas entran completas aunque
+      tengan fechas anteriores a la marca de agua
+    - particiones: de todos los archivos, las filas de las fechas que aparecen en
+      las fuentes pendientes, para que cada fecha reemplazada quede completa
+    Deja en cada entrada 'conteos' (filas por valor a cargar) y 'valores_fecha'
+    (valores a cargar; None si entran todas las filas)
+    Devuelve (entradas con filas a cargar, formato de fecha)
+    """
+    for entrada in entradas:
+        entrada['conteos'] = Counter()
+        entrada['valores_fecha'] = None
+    if not col_fecha or not entradas:
+        return entradas, None
+    
+    for entrada in entradas:
+        entrada['conteos'] = contar_valores_fecha([pq.ParquetFile(entrada['ruta'])], col_fecha)
+    valores = list(set().union(*(entrada['conteos'] for entrada in entradas)))
+    formato_fecha = detectar_formato_fecha(valores)
+    logging.info(f"📅 Formato de {col_fecha}: {formato_fecha}")
+    
+    _, fechas = parsear_fechas(pd.Series(valores, dtype=object), formato_fecha)
+    fecha_por_valor = {valor: fecha for valor, fecha in zip(valores, fechas) if pd.notna(fecha)}
+    
+    if modo_carga == 'particiones':
+        afectadas = {
+            fecha_por_valor[valor] for entrada in entradas if entrada['pendiente']
+            for valor in entrada['conteos'] if valor in fecha_por_valor
+        }
+        for entrada in entradas:
+            restringir_valores_entrada(entrada, lambda valor: fecha_por_valor.get(valor) in afectadas)
+        entradas = [entrada for entrada in entradas if entrada['valores_fecha']]
+        logging.info(f"🔁 {len(afectadas)} fechas de proceso con archivos pendientes; "
+                     f"se leen completas de {len(entradas)} archivos")
+        return entradas, formato_fecha
+    
+    if fecha_minima is None:
+        return entradas, formato_fecha
+    
+    # Los valores inválidos se conservan: la transformación los descarta como siempre
+    limite = pd.Timestamp(fecha_minima)
+    for entrada in entradas:
+        if not entrada['recargado']:
+            continue
+        descartadas = restringir_valores_entrada(
+            entrada, lambda valor: not fecha_por_valor.get(valor, pd.NaT) <= limite
+        )
+        logging.info(f"💧 {entrada['fuente']}: archivo ya cargado; {descartadas} registros hasta la marca "
+                     f"de agua ({fecha_minima}) ya están en la bodega y se omiten")
+    
+    return [entrada for entrada in entradas if entrada['valores_fecha'] != []], formato_fecha
+
+def restringir_valores_entrada(entrada, conservar):
+    """
+    Deja en la entrada solo los valores de fecha que cumplen `conservar`
+    Devuelve las filas descartadas
+    """
+    descartadas = sum(filas for valor, filas in entrada['conteos'].items() if not conservar(valor))
+    entrada['conteos'] = Counter({
+        valor: filas for valor, filas in entrada['conteos'].items() if conservar(valor)
+    })
+    entrada['valores_fecha'] = list(entrada['conteos'])
+    return descartadas
+
+def leer_filas_entrada(entrada, columnas, col_fecha, valores_fecha=None):
+    """
+    Lee de un artefacto local las filas planificadas para la carga; con
+    valores_fecha, solo las de esos valores crudos de la fecha de proceso (un shard)
+    El índice del DataFrame es la posición de cada fila en el artefacto
+    """
+    if entrada['valores_fecha'] is not None:
+        planificados = set(entrada['valores_fecha'])
+        valores_fecha = [
+            valor for valor in (entrada['valores_fecha'] if valores_fecha is None else valores_fecha)
+            if valor in planificados
+        ]
+    if valores_fecha is not None and not valores_fecha:
+        return pd.DataFrame()
+    
+    tabla = pq.read_table(entrada['ruta'], columns=columnas, read_dictionary=columnas_categoricas(columnas))
+    if valores_fecha is None:
+        return tabla.to_pandas()
+    
+    # Se filtra por posición para conservar el número de fila de cada registro
+    posiciones = np.flatnonzero(tabla.column(col_fecha).to_pandas().isin(valores_fecha).to_numpy())
+    df = tabla.take(posiciones).to_pandas()
+    df.index = posiciones
+    return df
+
+def subir_shard(almacenamiento, ruta_local, destino):
+    """
+    Sube un shard y libera el archivo local
+    """
+    almacenamiento.subir_archivo(ruta_local, destino)
+    os.remove(ruta_local)
+    return destino
+
+def escribir_y_subir_shards(tablas, almacenamiento, prefijo, directorio, hilos=HILOS_SUBIDA_SHARDS):
+    """
+    Escribe cada tabla Arrow como un shard Parquet comprimido y lo sube a
+    `prefijo` en paralelo mientras se genera el siguiente. Como mucho hay
+    2 * hilos shards pendientes en disco. Devuelve los nombres subidos
+    """
+    # Los shards de un intento anterior no deben entrar en la carga
+    almacenamiento.eliminar(almacenamiento.listar(prefijo))
+    
+    subidos = []
+    pendientes = set()
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        for numero, tabla in enumerate(tablas):
+            nombre = f'shard-{numero:05d}.parquet'
+            ruta_local = os.path.join(directorio, nombre)
+            pq.write_table(tabla, ruta_local, compression='snappy')
+            pendientes.add(executor.submit(subir_shard, almacenamiento, ruta_local, f'{prefijo}{nombre}'))
+            
+            if len(pendientes) >= 2 * hilos:
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                subidos.extend(futuro.result() for futuro in terminados)
+        
+        subidos.extend(futuro.result() for futuro in pendientes)
+    
+    return sorted(subidos)
+
+def cargar_shards_desde_uri(bodega, almacenamiento, tabla, prefijo):
+    """
+    Una sola carga sobre todos los shards del prefijo
+    """
+    uri = almacenamiento.uri(f'{prefijo}shard-*.parquet')
+    registros = bodega.cargar_parquet(uri, tabla, **opciones_carga_hechos())
+    logging.info(f"📤 Carga de {tabla}: {registros} registros desde {uri}")
+
+def cargar_hechos_streaming(context, bodega, tabla, modo_carga, medidor,
+                            fecha_minima=None, claves_validas=None):
+    """
+    Construye la tabla de hechos por lotes de tamaño fijo
+    El pico de memoria depende de TAMANO_LOTE_HECHOS y no del tamaño del archivo
+    Cada lote se sube como shard Parquet y se carga todo con una carga por URI
+    La transformación incluye la subida de shards, que corre en paralelo con ella
+    Devuelve (registros cargados, primera y última fecha de proceso cargadas)
+    """
+    almacenamiento = obtener_almacenamiento()
+    prefijo_shards = construir_prefijo_shards(context['run_id'], 'fact_registro_vehiculos')
+    
+    with tempfile.TemporaryDirectory() as directorio_temporal:
+        # Los artefactos se bajan a disco y se leen por lotes, nunca completos en memoria
+        # El formato de fecha se decide una vez con los valores únicos de todos los archivos
+        entradas, columnas, formato_fecha = descargar_staging_hechos(
+            context, almacenamiento, directorio_temporal, modo_carga, fecha_minima
+        )
+        medidor.cerrar_etapa(EXTRACCION)
+        archivos = [
+            pq.ParquetFile(entrada['ruta'], read_dictionary=columnas_categoricas(columnas)) for entrada in entradas
+        ]
+        col_fecha = resolver_columna_fecha(columnas)
+        
+        resumen = {'registros': 0, 'lotes': 0, 'fecha_inicio': None, 'fecha_fin': None, 'esquema': None}
+        
+        def lotes_transformados():
+            for entrada, archivo in zip(entradas, archivos):
+                # El índice de cada lote sigue la posición de sus filas en el artefacto
+                inicio = 0
+                for lote in archivo.iter_batches(batch_size=TAMANO_LOTE_HECHOS, columns=columnas):
+                    df_lote = lote.to_pandas()
+                    df_lote.index = pd.RangeIndex(inicio, inicio + len(df_lote))
+                    inicio += len(df_lote)
+                    if entrada['valores_fecha'] is not None:
+                        df_lote = df_lote[df_lote[col_fecha].isin(entrada['valores_fecha'])]
+                    if df_lote.empty:
+                        continue
+                    fact_lote = transformar_lote_hechos(df_lote, claves_validas, formato_fecha, entrada['artefacto'])
+                    if fact_lote.empty:
+                        continue
+                    resumen['registros'] += len(fact_lote)
+                    resumen['lotes'] += 1
+                    
+                    inicio_lote = fact_lote[COLUMNA_PARTICION_HECHOS].min()
+                    fin_lote = fact_lote[COLUMNA_PARTICION_HECHOS].max()
+                    if resumen['fecha_inicio'] is None or inicio_lote < resumen['fecha_inicio']:
+                        resumen['fecha_inicio'] = inicio_lote
+                    if resumen['fecha_fin'] is None or fin_lote > resumen['fecha_fin']:
+                        resumen['fecha_fin'] = fin_lote
+                    
+                    # Todos los shards comparten el esquema del primero
+                    tabla_lote = pa.Table.from_pandas(fact_lote, schema=resumen['esquema'], preserve_index=False)
+                    resumen['esquema'] = tabla_lote.schema
+                    yield tabla_lote
+        
+        shards = escribir_y_subir_shards(lotes_transformados(), almacenamiento, prefijo_shards, directorio_temporal)
+    
+    total_registros = resumen['registros']
+    filas_entrada = sum(archivo.metadata.num_rows for archivo in archivos)
+    medidor.cerrar_etapa(TRANSFORMACION, filas_entrada=filas_entrada, filas_salida=total_registros)
+    logging.info(f"🔧 Tabla de hechos creada por lotes: {total_registros} registros en {len(shards)} shards")
+    
+    if total_registros == 0:
+        return 0, None, None
+    
+    try:
+        cargar_shards_desde_uri(bodega, almacenamiento, tabla, prefijo_shards)
+    finally:
+        almacenamiento.eliminar(shards)
+    medidor.cerrar_etapa(CARGA, filas_entrada=total_registros)
+    
+    return total_registros, resumen['fecha_inicio'], resumen['fecha_fin']
+
+# Claves de dimensión vigentes en cada proceso de transformación
+_claves_proceso = {}
+
+def iniciar_proceso_hechos(claves_validas):
+    """
+    Recibe las claves de dimensión una vez por proceso y no una vez por shard
+    """
+    _claves_proceso['claves_validas'] = claves_validas
+
+def contar_valores_fecha(archivos, col_fecha):
+    """
+    Filas por valor crudo de la fecha de proceso, leyendo solo esa columna por lotes
+    """
+    conteos = Counter()
+    for archivo in archivos:
+        for lote in archivo.iter_batches(batch_size=TAMANO_LOTE_HECHOS, columns=[col_fecha]):
+            for fila in lote.column(0).value_counts().to_pylist():
+                if fila['values'] is not None:
+                    conteos[fila['values']] += fila['counts']
+    return conteos
+
+def planificar_shards_por_mes(conteos, formato_fecha):
+    """
+    Agrupa los valores crudos de la fecha de proceso por mes: [(AAAAMM, valores)],
+    primero los meses con más filas para repartir mejor el trabajo
+    Las fechas inválidas no generan shards
+    """
+    valores = list(conteos)
+    _, fechas = parsear_fechas(pd.Series(valores, dtype=object), formato_fecha)
+    
+    meses = {}
+    for valor, fecha in zip(valores, fechas):
+        if pd.isna(fecha):
+            continue
+        mes = meses.setdefault(fecha.strftime('%Y%m'), {'valores': [], 'filas': 0})
+        mes['valores'].append(valor)
+        mes['filas'] += conteos[valor]
+    
+    orden = sorted(meses.items(), key=lambda item: item[1]['filas'], reverse=True)
+    return [(nombre, mes['valores']) for nombre, mes in orden]
+
+def transformar_shard_hechos(entradas, columnas, col_fecha, valores_fecha, formato_fecha, ruta_salida):
+    """
+    Transforma en un proceso aparte las filas de un shard y las escribe en ruta_salida
+    Cada archivo de entrada se transforma por separado (su artefacto entra en ID_Registro)
+    Sin col_fecha el shard son los archivos completos
+    Devuelve (registros, primera y última fecha de proceso)
+    """
+    partes = []
+    for entrada in entradas:
+        df_archivo = leer_filas_entrada(entrada, columnas, col_fecha, valores_fecha)
+        if not df_archivo.empty:
+            partes.append(transformar_lote_hechos(
+                df_archivo, _claves_proceso.get('claves_validas'), formato_fecha, entrada['artefacto']
+            ))
+    
+    fact_shard = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    if fact_shard.empty:
+        return 0, None, None
+    
+    pq.write_table(pa.Table.from_pandas(fact_shard, preserve_index=False), ruta_salida, compression='snappy')
+    return len(fact_shard), fact_shard[COLUMNA_PARTICION_HECHOS].min(), fact_shard[COLUMNA_PARTICION_HECHOS].max()
+
+def cargar_hechos_paralelo(context, bodega, tabla, modo_carga, medidor,
+                           fecha_minima=None, claves_validas=None, procesos=PROCESOS_HECHOS):
+    """
+    Construye la tabla de hechos dividida por mes de proceso en un pool de procesos
+    Cada proceso lee de los artefactos locales solo las filas de su mes y escribe su
+    propio shard Parquet, que se sube apenas termina. Todos los shards se cargan
+    con un único job sobre su URI: la tabla cambia completa o no cambia
+    Devuelve (registros cargados, primera y última fecha de proceso cargadas)
+    """
+    almacenamiento = obtener_almacenamiento()
+    prefijo_shards = construir_prefijo_shards(context['run_id'], 'fact_registro_vehiculos')
+    
+    with tempfile.TemporaryDirectory() as directorio_temporal:
+        # El formato de fecha se decide una vez para todos los archivos
+        entradas, columnas, formato_fecha = descargar_staging_hechos(
+            context, almacenamiento, directorio_temporal, modo_carga, fecha_minima
+        )
+        medidor.cerrar_etapa(EXTRACCION)
+        archivos = [pq.ParquetFile(entrada['ruta']) for entrada in entradas]
+        
+        # Un shard por mes con las filas planificadas de todos los archivos
+        col_fecha = resolver_columna_fecha(columnas)
+        planes = [('completo', None)] if archivos else []
+        if col_fecha:
+            conteos = sum((entrada['conteos'] for entrada in entradas), Counter())
+            planes = planificar_shards_por_mes(conteos, formato_fecha)
+        
+        procesos = max(1, min(int(procesos), len(planes)))
+        logging.info(f"🧩 Modo paralelo: {len(planes)} shards mensuales en {procesos} procesos")
+        
+        # Los shards de un intento anterior no deben entrar en la carga
+        almacenamiento.eliminar(almacenamiento.listar(prefijo_shards))
+        
+        total_registros = 0
+        fecha_inicio = fecha_fin = None
+        subidas = []
+        # spawn: el proceso de la tarea ya tiene hilos y clientes abiertos que no deben heredarse
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=iniciar_proceso_hechos, initargs=(claves_validas,)) as executor, \
+                ThreadPoolExecutor(max_workers=HILOS_SUBIDA_SHARDS) as executor_subidas:
+            futuros = {
+                executor.submit(
+                    transformar_shard_hechos, entradas, columnas, col_fecha, valores_fecha,
+                    formato_fecha, os.path.join(directorio_temporal, f'shard-{mes}.parquet')
+                ): mes
+                for mes, valores_fecha in planes
+            }
+            for futuro in as_completed(futuros):
+                registros, inicio_shard, fin_shard = futuro.result()
+                if registros == 0:
+                    continue
+                total_registros += registros
+                fecha_inicio = inicio_shard if fecha_inicio is None else min(fecha_inicio, inicio_shard)
+                fecha_fin = fin_shard if fecha_fin is None else max(fecha_fin, fin_shard)
+                
+                nombre = f'shard-{futuros[futuro]}.parquet'
+                subidas.append(executor_subidas.submit(
+                    subir_shard, almacenamiento, os.path.join(directorio_temporal, nombre), f'{prefijo_shards}{nombre}'
+                ))
+            shards = sorted(subida.result() for subida in subidas)
+    
+    filas_entrada = sum(archivo.metadata.num_rows for archivo in archivos)
+    medidor.cerrar_etapa(TRANSFORMACION, filas_entrada=filas_entrada, filas_salida=total_registros)
+    logging.info(f"🔧 Tabla de hechos creada en paralelo: {total_registros} registros en {len(shards)} shards")
+    
+    if total_registros == 0:
+        return 0, None, None
+    
+    try:
+        cargar_shards_desde_uri(bodega, almacenamiento, tabla, prefijo_shards)
+    finally:
+        almacenamiento.eliminar(shards)
+    medidor.cerrar_etapa(CARGA, filas_entrada=total_registros)
+    
+    return total_registros, fecha_inicio, fecha_fin
+
+def etl_fact_registro_vehiculos(**context):
+    """
+    Proceso ETL para la tabla de hechos Fact_RegistroVehiculos
+    Deriva las claves de dimensión de las claves naturales y carga métricas
+    Con modo_hechos='streaming' procesa el archivo por lotes de tamaño fijo
+    y con modo_hechos='paralelo' por meses de proceso en varios procesos
+    En modo incremental agrega los archivos fuente nuevos completos y, de las
+    versiones nuevas de archivos ya cargados, solo los registros posteriores a la marca de agua;
+    los ID_Registro ya cargados se omiten, así que un reintento no duplica hechos
+    En modo particiones reemplaza solo las fechas de proceso presentes en los archivos
+    pendientes, con las filas de esas fechas de todos los archivos
+    """
+    try:
+        logging.info("📊 Iniciando ETL para Fact_RegistroVehiculos...")
+        
+        medidor = MedidorEtapas(context, 'etl_fact_registro_vehiculos')
+        bodega = obtener_bodega()
+        tabla = 'fact_registro_vehiculos'
+        
+        # Los modos se pueden sobrescribir al disparar el DAG:
+        # {"modo_hechos": "streaming", "modo_carga": "particiones"} o {"full_refresh": true}
+        # En modo paralelo {"procesos_hechos": 4} fija la cantidad de procesos
+        conf = obtener_conf(context)
+        modo = conf.get('modo_hechos', MODO_HECHOS)
+        modo_carga = 'full_refresh' if conf.get('full_refresh') else conf.get('modo_carga', MODO_CARGA_HECHOS)
+        if modo_carga not in MODOS_CARGA_HECHOS:
+            raise ValueError(f"Modo de carga no soportado: {modo_carga}")
+        
+        # Marca de agua de la última carga
+        marca_agua = leer_watermark(bodega, tabla)
+        if modo_carga != 'full_refresh' and (marca_agua is None or not bodega.existe_tabla(tabla)):
+            logging.info("🆕 Sin marca de agua previa o sin tabla: se realiza una carga completa")
+            modo_carga = 'full_refresh'
+        fecha_minima = marca_agua if modo_carga == 'incremental' else None
+        preparar_tabla_hechos(bodega, tabla, modo_carga)
+        medidor.cerrar_etapa(ESPERA_CONSULTA)
+        
+        # Las particiones y los registros nuevos se pasan a la tabla desde una tabla intermedia
+        destino = f'{tabla}__{modo_carga}' if modo_carga in ('particiones', 'incremental') else tabla
+        
+        logging.info(f"💧 Modo de carga: {modo_carga}, marca de agua: {marca_agua}")
+        
+        # Claves vigentes de cada dimensión (caché en staging validada por huella)
+        claves_validas = {
+            dimension: cargar_claves_dimension(bodega, dimension) for dimension in CLAVES_DIMENSIONES
+        }
+        medidor.cerrar_etapa(LOOKUP)
+        
+        if modo == 'streaming':
+            logging.info(f"🌊 Modo streaming: lotes de {TAMANO_LOTE_HECHOS} registros")
+            total_registros, fecha_inicio, fecha_fin = cargar_hechos_streaming(
+                context, bodega, destino, modo_carga, medidor, fecha_minima, claves_validas
+            )
+        elif modo == 'paralelo':
+            total_registros, fecha_inicio, fecha_fin = cargar_hechos_paralelo(
+                context, bodega, destino, modo_carga, medidor, fecha_minima, claves_validas,
+                procesos=conf.get('procesos_hechos', PROCESOS_HECHOS)
+            )
+        else:
+            total_registros, fecha_inicio, fecha_fin = cargar_hechos_memoria(
+                context, bodega, destino, modo_carga, medidor, fecha_minima, claves_validas
+            )
+        
+        if destino != tabla and total_registros:
+            try:
+                if modo_carga == 'particiones':
+                    reemplazar_particiones(bodega, destino, tabla)
+                else:
+                    total_registros = agregar_registros_nuevos(bodega, destino, tabla, total_registros)
+            finally:
+                bodega.eliminar_tabla(destino)
+            medidor.cerrar_etapa(CARGA, filas_entrada=total_registros)
+        
+        # La marca de agua no retrocede si solo entraron fechas anteriores (archivos nuevos)
+        fecha_maxima = fecha_fin
+        if modo_carga != 'full_refresh' and total_registros:
+            fecha_maxima = max(fecha_fin, marca_agua)
+        
+        # Rango de fechas cargado (inclusive); None si se recargó toda la tabla
+        if modo_carga == 'full_refresh':
+            fecha_inicio = fecha_fin = None
+        
+        # Rango cargado en esta ejecución, para validación y agregados
+        context['ti'].xcom_push(key='rango_carga', value={
+            'modo_carga': modo_carga,
+            'fecha_desde': fecha_minima.isoformat() if fecha_minima else None,
+            'fecha_inicio': fecha_inicio.isoformat() if fecha_inicio else None,
+            'fecha_fin': fecha_fin.isoformat() if fecha_fin else None,
+            'total_registros': int(total_registros)
+        })
+        
+        if total_registros == 0:
+            logging.info("⏭️ No hay registros nuevos para cargar")
+            medidor.publicar()
+            return "Fact_RegistroVehiculos sin registros nuevos"
+        
+        actualizar_watermark(bodega, tabla, fecha_maxima)
+        medidor.cerrar_etapa(ESPERA_CONSULTA)
+        medidor.publicar()
+        
+        logging.info(f"✅ Cargados {total_registros} registros en fact_registro_vehiculos ({modo_carga})")
+        return f"Fact_RegistroVehiculos cargada exitosamente: {total_registros} registros"
+        
+    except Exception as e:
+        logging.error(f"❌ Error en ETL Fact_RegistroVehiculos: {str(e)}")
+        raise
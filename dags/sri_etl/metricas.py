@@ -0,0 +1,138 @@
+# metricas.py
+# Métricas por etapa de las tareas ETL, publicadas en XCom y en etl_run_metrics
+
+import logging
+import resource
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from sri_etl.backends import obtener_almacenamiento, obtener_bodega, MODO_AGREGAR
+from sri_etl.constantes import TABLA_METRICAS, CLAVE_XCOM_METRICAS
+
+# Etapas de una tarea
+EXTRACCION = 'extraccion'
+PARSEO = 'parseo'
+TRANSFORMACION = 'transformacion'
+LOOKUP = 'lookup'
+CARGA = 'carga'
+ESPERA_CONSULTA = 'espera_consulta'
+
+# Contadores de los backends que se reportan por etapa
+CONTADORES_ALMACENAMIENTO = ['bytes_descargados', 'bytes_subidos']
+CONTADORES_BODEGA = ['jobs', 'bytes_procesados', 'bytes_facturados', 'slot_ms']
+
+ESQUEMA_METRICAS = [
+    ('dag_id', 'STRING'),
+    ('run_id', 'STRING'),
+    ('tarea', 'STRING'),
+    ('etapa', 'STRING'),
+    ('inicio', 'TIMESTAMP'),
+    ('segundos', 'FLOAT'),
+    ('filas_entrada', 'INTEGER'),
+    ('filas_salida', 'INTEGER'),
+    ('bytes_descargados', 'INTEGER'),
+    ('bytes_subidos', 'INTEGER'),
+    ('pico_memoria_mb', 'FLOAT'),
+    ('jobs', 'INTEGER'),
+    ('bytes_procesados', 'INTEGER'),
+    ('bytes_facturados', 'INTEGER'),
+    ('slot_ms', 'INTEGER'),
+]
+
+def pico_memoria_mb():
+    """
+    Pico de memoria residente del proceso de la tarea hasta el momento
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MedidorEtapas:
+    """
+    Mide las etapas de una tarea: duración, filas de entrada y salida, bytes
+    transferidos, pico de memoria y estadísticas de los jobs de la bodega
+    Cada etapa abarca desde el cierre de la anterior (o la creación del medidor):
+    
+        medidor = MedidorEtapas(context, 'etl_dim_vehiculo')
+        df = leer_datos_staging(context, COLUMNAS_VEHICULO)
+        medidor.cerrar_etapa(EXTRACCION, filas_salida=len(df))
+    """
+    
+    def __init__(self, context, tarea):
+        self.context = context
+        self.tarea = tarea
+        self.etapas = []
+        self.almacenamiento = obtener_almacenamiento()
+        self.bodega = obtener_bodega()
+        self.reiniciar()
+    
+    def contadores(self):
+        almacenamiento = self.almacenamiento.contadores.copia()
+        bodega = self.bodega.contadores.copia()
+        return {
+            **{clave: almacenamiento.get(clave, 0) for clave in CONTADORES_ALMACENAMIENTO},
+            **{clave: bodega.get(clave, 0) for clave in CONTADORES_BODEGA}
+        }
+    
+    def reiniciar(self):
+        """
+        Marca el inicio de la siguiente etapa
+        """
+        self.inicio = datetime.now()
+        self.reloj = time.perf_counter()
+        self.contadores_inicio = self.contadores()
+    
+    def cerrar_etapa(self, nombre, filas_entrada=None, filas_salida=None):
+        segundos = time.perf_counter() - self.reloj
+        contadores = self.contadores()
+        self.etapas.append({
+            'etapa': nombre,
+            'inicio': self.inicio.isoformat(),
+            'segundos': round(segundos, 3),
+            'filas_entrada': None if filas_entrada is None else int(filas_entrada),
+            'filas_salida': None if filas_salida is None else int(filas_salida),
+            'pico_memoria_mb': round(pico_memoria_mb(), 1),
+            **{clave: contadores[clave] - self.contadores_inicio[clave] for clave in contadores}
+        })
+        logging.info(f"⏱️ {self.tarea}.{nombre}: {segundos:.2f}s")
+        self.reiniciar()
+    
+    def publicar(self):
+        """
+        Publica las etapas en XCom y las agrega a etl_run_metrics
+        Una falla al guardar la tabla solo se registra: no debe fallar la tarea
+        """
+        self.context['ti'].xcom_push(key=CLAVE_XCOM_METRICAS, value=self.etapas)
+        if not self.etapas:
+            return self.etapas
+        
+        dag_run = self.context.get('dag_run')
+        filas = pd.DataFrame([{
+            'dag_id': getattr(dag_run, 'dag_id', None),
+            'run_id': self.context.get('run_id'),
+            'tarea': self.tarea,
+            **etapa
+        } for etapa in self.etapas])
+        filas['inicio'] = pd.to_datetime(filas['inicio'])
+        for columna, tipo in ESQUEMA_METRICAS:
+            if tipo == 'INTEGER':
+                filas[columna] = filas[columna].astype('Int64')
+        
+        try:
+            self.bodega.cargar_dataframe(
+                filas[[columna for columna, _ in ESQUEMA_METRICAS]], TABLA_METRICAS, MODO_AGREGAR,
+                esquema=ESQUEMA_METRICAS
+            )
+        except Exception as e:
+            logging.warning(f"⚠️ No se pudieron guardar las métricas de {self.tarea}: {str(e)}")
+        return self.etapas
+
+def resumir_etapas(etapas):
+    """
+    Segundos totales y por etapa de una tarea
+    """
+    por_etapa = {}
+    for etapa in etapas or []:
+        por_etapa[etapa['etapa']] = round(por_etapa.get(etapa['etapa'], 0) + etapa['segundos'], 3)
+    return {'total': round(sum(por_etapa.values()), 3), 'etapas': por_etapa}
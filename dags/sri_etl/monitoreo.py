@@ -0,0 +1,332 @@
+# monitoreo.py
+# Validación de calidad, métricas de negocio y notificación
+
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from sri_etl.backends import obtener_bodega
+from sri_etl.constantes import (
+    COLUMNA_PARTICION_HECHOS, TABLA_AGREGADO, CLAVE_XCOM_METRICAS, TAREAS_INSTRUMENTADAS
+)
+from sri_etl.staging import registrar_huella_fuente, marcar_fuentes_cargadas
+from sri_etl.metricas import MedidorEtapas, ESPERA_CONSULTA, resumir_etapas
+
+# ===============================
+# FUNCIONES DE VALIDACIÓN Y MONITOREO
+# ===============================
+
+def valor_serializable(valor):
+    """
+    Convierte fechas y decimales de la bodega a tipos que se pueden guardar en XCom
+    """
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+def ejecutar_consultas_concurrentes(bodega, consultas):
+    """
+    Ejecuta consultas independientes {nombre: (sql, parametros)} juntas: en
+    BigQuery corren en paralelo y el tiempo total es el de la más lenta.
+    Devuelve la primera fila de cada consulta como diccionario
+    """
+    resultados = {}
+    for nombre, filas in bodega.consultar_varias(consultas).items():
+        fila = filas[0] if filas else {}
+        resultados[nombre] = {clave: valor_serializable(valor) for clave, valor in fila.items()}
+    return resultados
+
+def construir_consulta_perfil_dimensiones(bodega):
+    """
+    Perfil de las cuatro dimensiones en un solo job (una pasada por tabla)
+    """
+    return f"""
+    SELECT
+        t.total_registros as tiempo_total_registros,
+        t.anios_unicos as tiempo_anios_unicos,
+        t.fecha_min as tiempo_fecha_min,
+        t.fecha_max as tiempo_fecha_max,
+        v.total_registros as vehiculo_total_registros,
+        v.marcas_unicas as vehiculo_marcas_unicas,
+        v.clases_unicas as vehiculo_clases_unicas,
+        tr.total_registros as transaccion_total_registros,
+        tr.tipos_transaccion as transaccion_tipos_transaccion,
+        u.total_registros as ubicacion_total_registros,
+        u.provincias_unicas as ubicacion_provincias_unicas,
+        u.regiones_unicas as ubicacion_regiones_unicas
+    FROM (
+        SELECT
+            COUNT(*) as total_registros,
+            COUNT(DISTINCT Anio) as anios_unicos,
+            MIN(FechaCompleta) as fecha_min,
+            MAX(FechaCompleta) as fecha_max
+        FROM {bodega.tabla('dim_tiempo')}
+    ) t
+    CROSS JOIN (
+        SELECT
+            COUNT(*) as total_registros,
+            COUNT(DISTINCT Marca) as marcas_unicas,
+            COUNT(DISTINCT Clase) as clases_unicas
+        FROM {bodega.tabla('dim_vehiculo')}
+    ) v
+    CROSS JOIN (
+        SELECT
+            COUNT(*) as total_registros,
+            COUNT(DISTINCT TipoTransaccion) as tipos_transaccion
+        FROM {bodega.tabla('dim_transaccion')}
+    ) tr
+    CROSS JOIN (
+        SELECT
+            COUNT(*) as total_registros,
+            COUNT(DISTINCT Provincia) as provincias_unicas,
+            COUNT(DISTINCT Region) as regiones_unicas
+        FROM {bodega.tabla('dim_ubicacion')}
+    ) u
+    """
+
+def construir_consulta_perfil_hechos(bodega, filtro_fechas=''):
+    """
+    Perfil de la tabla de hechos e integridad referencial en una sola pasada:
+    las dimensiones tienen claves únicas, así que los LEFT JOIN no duplican filas
+    Con filtro_fechas solo se leen las particiones de ese rango
+    """
+    return f"""
+    SELECT
+        COUNT(*) as total_registros,
+        SUM(f.CantidadRegistros) as total_cantidad,
+        AVG(f.MontoAvaluo) as avaluo_promedio,
+        COUNT(CASE WHEN f.ID_Tiempo IS NULL THEN 1 END) as registros_sin_tiempo,
+        COUNT(CASE WHEN f.ID_Vehiculo IS NULL THEN 1 END) as registros_sin_vehiculo,
+        COUNT(CASE WHEN t.ID_Tiempo IS NOT NULL
+                    AND v.ID_Vehiculo IS NOT NULL
+                    AND tr.ID_Transaccion IS NOT NULL
+                    AND u.ID_Ubicacion IS NOT NULL THEN 1 END) as registros_con_claves_validas
+    FROM {bodega.tabla('fact_registro_vehiculos')} f
+    LEFT JOIN {bodega.tabla('dim_tiempo')} t ON f.ID_Tiempo = t.ID_Tiempo
+    LEFT JOIN {bodega.tabla('dim_vehiculo')} v ON f.ID_Vehiculo = v.ID_Vehiculo
+    LEFT JOIN {bodega.tabla('dim_transaccion')} tr ON f.ID_Transaccion = tr.ID_Transaccion
+    LEFT JOIN {bodega.tabla('dim_ubicacion')} u ON f.ID_Ubicacion = u.ID_Ubicacion
+    {filtro_fechas}
+    """
+
+def validar_calidad_datos(**context):
+    """
+    Función para validar la calidad de los datos cargados
+    Agrupa los chequeos en dos consultas que se ejecutan en paralelo
+    La tabla de hechos se valida solo en las particiones cargadas por la ejecución
+    """
+    try:
+        logging.info("🔍 Iniciando validación de calidad de datos...")
+        
+        medidor = MedidorEtapas(context, 'validar_calidad_datos')
+        bodega = obtener_bodega()
+        
+        # Particiones cargadas por esta ejecución (sin rango se valida toda la tabla)
+        rango = context['ti'].xcom_pull(task_ids='etl_fact_registro_vehiculos', key='rango_carga') or {}
+        filtro_fechas = ''
+        parametros = None
+        ambito = 'tabla completa'
+        if rango.get('fecha_inicio') and rango.get('fecha_fin'):
+            filtro_fechas = f"WHERE f.{COLUMNA_PARTICION_HECHOS} BETWEEN @fecha_inicio AND @fecha_fin"
+            parametros = {
+                'fecha_inicio': date.fromisoformat(rango['fecha_inicio']),
+                'fecha_fin': date.fromisoformat(rango['fecha_fin'])
+            }
+            ambito = f"{rango['fecha_inicio']} a {rango['fecha_fin']}"
+        logging.info(f"🗓️ Ámbito de validación de hechos: {ambito}")
+        
+        resultados = ejecutar_consultas_concurrentes(bodega, {
+            'dimensiones': (construir_consulta_perfil_dimensiones(bodega), None),
+            'hechos': (construir_consulta_perfil_hechos(bodega, filtro_fechas), parametros)
+        })
+        medidor.cerrar_etapa(ESPERA_CONSULTA)
+        dims = resultados['dimensiones']
+        hechos = resultados['hechos']
+        
+        validaciones = [
+            f"Dim_Tiempo: {dims['tiempo_total_registros']} registros, "
+            f"años {dims['tiempo_anios_unicos']}, "
+            f"rango: {dims['tiempo_fecha_min']} a {dims['tiempo_fecha_max']}",
+            f"Dim_Vehiculo: {dims['vehiculo_total_registros']} registros, "
+            f"{dims['vehiculo_marcas_unicas']} marcas, "
+            f"{dims['vehiculo_clases_unicas']} clases",
+            f"Dim_Transaccion: {dims['transaccion_total_registros']} registros, "
+            f"{dims['transaccion_tipos_transaccion']} tipos de transacción",
+            f"Dim_Ubicacion: {dims['ubicacion_total_registros']} registros, "
+            f"{dims['ubicacion_provincias_unicas']} provincias, "
+            f"{dims['ubicacion_regiones_unicas']} regiones",
+            f"Fact_RegistroVehiculos ({ambito}): {hechos['total_registros']} registros, "
+            f"cantidad total: {hechos['total_cantidad']}, "
+            f"avalúo promedio: ${hechos['avaluo_promedio'] or 0:,.2f}"
+        ]
+        
+        # Log de todas las validaciones
+        for validacion in validaciones:
+            logging.info(f"✅ {validacion}")
+        
+        registros_validos = hechos['registros_con_claves_validas']
+        logging.info(f"🔗 Integridad referencial: {registros_validos} registros con todas las claves válidas")
+        
+        resumen_validacion = {
+            'dimensiones': dims,
+            'hechos': hechos,
+            'validaciones': validaciones,
+            'registros_con_integridad': registros_validos,
+            'registros_huerfanos': hechos['total_registros'] - registros_validos,
+            'ambito_hechos': ambito,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        medidor.publicar()
+        return resumen_validacion
+        
+    except Exception as e:
+        logging.error(f"❌ Error en validación de calidad: {str(e)}")
+        raise
+
+def generar_metricas_negocio(**context):
+    """
+    Genera métricas de negocio del proceso ETL
+    """
+    try:
+        logging.info("📈 Generando métricas de negocio...")
+        
+        medidor = MedidorEtapas(context, 'generar_metricas_negocio')
+        bodega = obtener_bodega()
+        tabla_agregado = bodega.tabla(TABLA_AGREGADO)
+        
+        # Las métricas se leen del agregado, no de la tabla de hechos
+        query_por_anio = f"""
+        SELECT 
+            Anio,
+            SUM(TotalRegistros) as total_registros,
+            SUM(MontoTotalAvaluo) as monto_total_avaluo,
+            SUM(MontoTotalAvaluo) / NULLIF(SUM(RegistrosConAvaluo), 0) as monto_promedio_avaluo
+        FROM {tabla_agregado}
+        WHERE Anio IS NOT NULL
+        GROUP BY Anio
+        ORDER BY Anio DESC
+        LIMIT 5
+        """
+        
+        query_por_marca = f"""
+        SELECT 
+            Marca,
+            SUM(TotalRegistros) as total_registros,
+            SUM(MontoTotalAvaluo) / NULLIF(SUM(RegistrosConAvaluo), 0) as avaluo_promedio
+        FROM {tabla_agregado}
+        WHERE Marca IS NOT NULL
+        GROUP BY Marca
+        ORDER BY total_registros DESC
+        LIMIT 10
+        """
+        
+        query_por_provincia = f"""
+        SELECT 
+            Provincia,
+            Region,
+            SUM(TotalRegistros) as total_registros,
+            SUM(MontoTotalAvaluo) as monto_total
+        FROM {tabla_agregado}
+        WHERE Provincia IS NOT NULL
+        GROUP BY Provincia, Region
+        ORDER BY total_registros DESC
+        LIMIT 10
+        """
+        
+        # Las tres consultas se envían juntas y se esperan después
+        metricas = bodega.consultar_varias({
+            'anio': (query_por_anio, None),
+            'marca': (query_por_marca, None),
+            'provincia': (query_por_provincia, None)
+        })
+        medidor.cerrar_etapa(ESPERA_CONSULTA)
+        metricas_anio, metricas_marca, metricas_provincia = (
+            pd.DataFrame(metricas[nombre]) for nombre in ('anio', 'marca', 'provincia')
+        )
+        
+        # Log de métricas
+        logging.info("📊 MÉTRICAS POR AÑO:")
+        for _, row in metricas_anio.iterrows():
+            logging.info(f"   {row['Anio']}: {row['total_registros']} registros, "
+                        f"avalúo total: ${row['monto_total_avaluo'] or 0:,.2f}")
+        
+        logging.info("🚗 TOP MARCAS:")
+        for _, row in metricas_marca.iterrows():
+            logging.info(f"   {row['Marca']}: {row['total_registros']} registros, "
+                        f"avalúo promedio: ${row['avaluo_promedio'] or 0:,.2f}")
+        
+        logging.info("🌎 TOP PROVINCIAS:")
+        for _, row in metricas_provincia.iterrows():
+            logging.info(f"   {row['Provincia']} ({row['Region']}): {row['total_registros']} registros")
+        
+        metricas_resumen = {
+            'metricas_por_anio': metricas_anio.to_dict('records'),
+            'metricas_por_marca': metricas_marca.to_dict('records'),
+            'metricas_por_provincia': metricas_provincia.to_dict('records'),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        medidor.publicar()
+        return metricas_resumen
+        
+    except Exception as e:
+        logging.error(f"❌ Error generando métricas: {str(e)}")
+        raise
+
+def notificar_finalizacion(**context):
+    """
+    Notifica la finalización exitosa del proceso ETL
+    """
+    try:
+        logging.info("📧 Enviando notificación de finalización...")
+        
+        # Obtener información del contexto
+        dag_run = context['dag_run']
+        execution_date = context['execution_date']
+        
+        # Crear resumen del proceso
+        resumen = {
+            'dag_id': dag_run.dag_id,
+            'execution_date': execution_date.isoformat(),
+            'estado': 'EXITOSO',
+            'duracion_total': str(datetime.now() - dag_run.start_date) if dag_run.start_date else 'N/A',
+            'timestamp_finalizacion': datetime.now().isoformat()
+        }
+        
+        logging.info("✅ PROCESO ETL FINALIZADO EXITOSAMENTE")
+        logging.info(f"   DAG: {resumen['dag_id']}")
+        logging.info(f"   Fecha de ejecución: {resumen['execution_date']}")
+        logging.info(f"   Duración: {resumen['duracion_total']}")
+        logging.info(f"   Estado: {resumen['estado']}")
+        
+        # Duraciones medidas por cada tarea (XCom de MedidorEtapas)
+        duracion_etapas = {}
+        for tarea in TAREAS_INSTRUMENTADAS:
+            etapas = context['ti'].xcom_pull(task_ids=tarea, key=CLAVE_XCOM_METRICAS)
+            if etapas is None:
+                continue
+            duracion_etapas[tarea] = resumir_etapas(etapas)
+            detalle = ', '.join(f"{etapa}: {segundos:.1f}s" for etapa, segundos in duracion_etapas[tarea]['etapas'].items())
+            logging.info(f"   ⏱️ {tarea}: {duracion_etapas[tarea]['total']:.1f}s ({detalle or 'sin etapas'})")
+        resumen['duracion_etapas'] = duracion_etapas
+        
+        # La huella y el manifiesto solo se actualizan cuando todo el proceso terminó bien
+        huella = registrar_huella_fuente(context)
+        resumen['archivos_fuente'] = len(huella['archivos']) if huella else 'N/A'
+        resumen['archivos_cargados'] = marcar_fuentes_cargadas(context)
+        
+        # Aquí se puede agregar lógica para enviar emails, Slack, etc.
+        # Por ejemplo:
+        # send_email_notification(resumen)
+        # send_slack_notification(resumen)
+        
+        return resumen
+        
+    except Exception as e:
+        logging.error(f"❌ Error en notificación: {str(e)}")
+        raise
@@ -0,0 +1,398 @@
+# staging.py
+# Verificación del archivo fuente, extracción y artefactos de staging
+
+import json
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from airflow.models import Variable
+
+from sri_etl.backends import obtener_almacenamiento
+from sri_etl.metricas import MedidorEtapas, EXTRACCION, PARSEO, CARGA
+from sri_etl.constantes import (
+    PREFIJO_FUENTE, EXTENSIONES_FUENTE, FIRMAS_COMPRESION, STAGING_FOLDER, FUENTES_STAGING_FOLDER, MANIFIESTO_FUENTES,
+    HILOS_INGESTA, VARIABLE_HUELLA_FUENTE, ESQUEMA_SRI, TIPOS_ARROW, COLUMNAS_INGESTA, TAMANO_LOTE_INGESTA
+)
+
+# ===============================
+# FUNCIONES DE EXTRACCIÓN Y STAGING
+# ===============================
+
+def tipo_columna(columna):
+    """
+    Tipo declarado de una columna; las columnas fuera del esquema se tratan como texto
+    """
+    return ESQUEMA_SRI.get(columna, 'category')
+
+def columnas_categoricas(columnas):
+    """
+    Columnas que se leen desde staging como categóricas
+    """
+    return [col for col in columnas if tipo_columna(col) == 'category']
+
+def construir_ruta_staging(nombre, generacion):
+    """
+    Construye la ruta del artefacto Parquet de una generación concreta
+    de un archivo fuente; no depende de la ejecución que lo convirtió
+    El nombre completo (con su extensión) se codifica sin pérdida: 'sri.csv' y
+    'sri.csv.gz' son fuentes distintas y no comparten artefacto
+    """
+    relativo = nombre[len(PREFIJO_FUENTE):] if nombre.startswith(PREFIJO_FUENTE) else nombre
+    return f'{FUENTES_STAGING_FOLDER}{quote(relativo, safe="")}/generation={generacion}.parquet'
+
+def fuente_artefacto(ruta_staging):
+    """
+    Nombre del archivo fuente de un artefacto de staging (relativo a PREFIJO_FUENTE),
+    sin la generación: es el mismo para todas las versiones del archivo
+    """
+    return unquote(ruta_staging[len(FUENTES_STAGING_FOLDER):].rsplit('/generation=', 1)[0])
+
+def construir_prefijo_ejecucion(run_id):
+    """
+    Prefijo de staging para los artefactos temporales de una ejecución
+    """
+    run_id_limpio = re.sub(r'[^A-Za-z0-9_.-]', '_', run_id)
+    return f'{STAGING_FOLDER}run_id={run_id_limpio}/'
+
+def obtener_conf(context):
+    """
+    Devuelve la configuración enviada al disparar el DAG (dag_run.conf)
+    """
+    dag_run = context.get('dag_run')
+    return (dag_run.conf or {}) if dag_run else {}
+
+def obtener_huella_fuente(metadatos):
+    """
+    Huella de un archivo fuente: generación, tamaño y checksum del objeto
+    """
+    return {
+        'archivo': metadatos['nombre'],
+        'generacion': metadatos['generacion'],
+        'tamano': metadatos['tamano'],
+        'md5': metadatos['md5'],
+        'crc32c': metadatos['crc32c']
+    }
+
+def obtener_huella_fuentes(fuentes):
+    """
+    Huella del conjunto de archivos fuente, ordenada por nombre
+    """
+    return {'archivos': [obtener_huella_fuente(metadatos) for metadatos in fuentes]}
+
+def metadatos_fuentes(almacenamiento):
+    """
+    Metadatos de los archivos fuente bajo PREFIJO_FUENTE, ordenados por nombre;
+    falla si no hay ninguno
+    """
+    nombres = [
+        nombre for nombre in almacenamiento.listar(PREFIJO_FUENTE)
+        if nombre.lower().endswith(EXTENSIONES_FUENTE)
+    ]
+    if not nombres:
+        raise FileNotFoundError(f"No hay archivos fuente en {almacenamiento.uri(PREFIJO_FUENTE)}")
+    
+    with ThreadPoolExecutor(max_workers=HILOS_INGESTA) as executor:
+        fuentes = list(executor.map(almacenamiento.metadatos, sorted(nombres)))
+    # Un archivo borrado entre el listado y la lectura de metadatos se ignora
+    return [metadatos for metadatos in fuentes if metadatos is not None]
+
+def leer_huella_registrada():
+    """
+    Huella guardada por la última ejecución exitosa (None si no existe)
+    """
+    return Variable.get(VARIABLE_HUELLA_FUENTE, default_var=None, deserialize_json=True)
+
+def verificar_cambios_fuente(**context):
+    """
+    Compara la huella actual de los archivos fuente con la de la última ejecución
+    exitosa. Si no cambió, omite todas las tareas posteriores
+    (`{"forzar": true}` en la configuración del run ejecuta de todas formas)
+    """
+    try:
+        logging.info("🔎 Verificando cambios en los archivos fuente...")
+        
+        huella_actual = obtener_huella_fuentes(metadatos_fuentes(obtener_almacenamiento()))
+        
+        if obtener_conf(context).get('forzar', False):
+            logging.info("⚠️ Ejecución forzada por configuración; no se compara la huella")
+            return huella_actual
+        
+        huella_registrada = leer_huella_registrada()
+        if huella_registrada == huella_actual:
+            logging.info(f"⏭️ Archivos fuente sin cambios ({len(huella_actual['archivos'])} archivos); "
+                         f"se omite la ejecución")
+            return False
+        
+        registrados = (huella_registrada or {}).get('archivos', [])
+        cambios = [huella['archivo'] for huella in huella_actual['archivos'] if huella not in registrados]
+        logging.info(f"✅ Archivos fuente con cambios: {cambios or 'archivos retirados'}")
+        return huella_actual
+        
+    except Exception as e:
+        logging.error(f"❌ Error verificando cambios en los archivos fuente: {str(e)}")
+        raise
+
+def registrar_huella_fuente(context):
+    """
+    Guarda la huella verificada al inicio del run; solo se llama al terminar con éxito
+    """
+    huella = context['ti'].xcom_pull(task_ids='verificar_cambios_fuente')
+    if huella:
+        Variable.set(VARIABLE_HUELLA_FUENTE, json.dumps(huella))
+        logging.info(f"🔖 Huella de los archivos fuente registrada: {len(huella['archivos'])} archivos")
+    return huella
+
+# ===============================
+# MANIFIESTO DE ARCHIVOS FUENTE
+# ===============================
+
+def leer_manifiesto(almacenamiento):
+    """
+    Manifiesto de archivos fuente ya convertidos a Parquet en staging:
+    {nombre: {'generacion', 'tamano', 'ruta_staging', 'filas', 'cargado', 'carga_previa'}}
+    'cargado' indica que una ejecución exitosa ya llevó sus filas a la bodega y
+    'carga_previa' que se cargó alguna versión anterior del mismo archivo
+    """
+    if not almacenamiento.existe(MANIFIESTO_FUENTES):
+        return {}
+    return json.loads(almacenamiento.descargar_bytes(MANIFIESTO_FUENTES))
+
+def guardar_manifiesto(almacenamiento, manifiesto):
+    almacenamiento.subir_bytes(json.dumps(manifiesto, indent=2, sort_keys=True).encode(), MANIFIESTO_FUENTES)
+
+def compresion_fuente(ruta):
+    """
+    Códec de un archivo fuente descargado según sus primeros bytes (None si es CSV plano)
+    """
+    with open(ruta, 'rb') as archivo:
+        inicio = archivo.read(max(len(firma) for firma in FIRMAS_COMPRESION))
+    return next((codec for firma, codec in FIRMAS_COMPRESION.items() if inicio.startswith(firma)), None)
+
+def abrir_fuente(ruta, compresion):
+    """
+    Flujo de lectura del CSV descargado; los comprimidos se descomprimen a medida
+    que el parser avanza, sin inflar el archivo completo en disco ni en memoria
+    """
+    if compresion is None:
+        return open(ruta, 'rb')
+    return pa.CompressedInputStream(pa.OSFile(ruta), compresion)
+
+def convertir_fuente_a_parquet(almacenamiento, metadatos, directorio):
+    """
+    Descarga un archivo fuente (plano, .gz o .zst) y deja en staging una copia
+    columnar comprimida (Parquet). Devuelve su entrada del manifiesto
+    """
+    ruta_staging = construir_ruta_staging(metadatos['nombre'], metadatos['generacion'])
+    base = os.path.join(directorio, quote(metadatos['nombre'], safe=''))
+    ruta_csv = f'{base}.csv'
+    ruta_parquet = f'{base}.parquet'
+    
+    # Fijar la generación evita mezclar versiones si el archivo cambia a mitad de la descarga
+    almacenamiento.descargar_archivo(metadatos['nombre'], ruta_csv, generacion=metadatos['generacion'])
+    
+    # Solo las columnas que usa alguna tarea, con tipos fijos del esquema de ingesta
+    compresion = compresion_fuente(ruta_csv)
+    with abrir_fuente(ruta_csv, compresion) as flujo:
+        encabezado = pd.read_csv(flujo, nrows=0).columns
+    columnas = [col for col in encabezado if col in COLUMNAS_INGESTA]
+    tipos_lectura = {
+        col: (str if tipo_columna(col) == 'category' else tipo_columna(col)) for col in columnas
+    }
+    esquema = pa.schema([(col, TIPOS_ARROW[tipo_columna(col)]) for col in columnas])
+    
+    # Conversión por lotes: la memoria depende de TAMANO_LOTE_INGESTA, no del archivo
+    total_registros = 0
+    with abrir_fuente(ruta_csv, compresion) as flujo, \
+            pq.ParquetWriter(ruta_parquet, esquema, compression='snappy') as writer:
+        for lote in pd.read_csv(flujo, usecols=columnas, dtype=tipos_lectura,
+                                chunksize=TAMANO_LOTE_INGESTA):
+            writer.write_table(pa.Table.from_pandas(lote, schema=esquema, preserve_index=False))
+            total_registros += len(lote)
+    os.remove(ruta_csv)
+    
+    almacenamiento.subir_archivo(ruta_parquet, ruta_staging)
+    os.remove(ruta_parquet)
+    
+    logging.info(f"📊 {metadatos['nombre']}: {total_registros} registros, {len(columnas)} columnas, "
+                 f"{metadatos['tamano']} bytes")
+    return {
+        'generacion': metadatos['generacion'],
+        'tamano': metadatos['tamano'],
+        'ruta_staging': ruta_staging,
+        'filas': total_registros,
+        'cargado': False,
+        'carga_previa': False
+    }
+
+def extraer_datos_fuente(**context):
+    """
+    Lista los archivos fuente y convierte a Parquet en staging solo los que no
+    están en el manifiesto con la misma generación, con HILOS_INGESTA archivos
+    a la vez. La descarga y la subida quedan dentro de la etapa de parseo
+    porque corren en paralelo con él
+    Con `{"forzar": true}` todas las fuentes quedan pendientes de carga
+    Devuelve {'archivos': artefactos de todas las fuentes,
+              'pendientes': artefactos de las fuentes que aún no se cargaron,
+              'recargados': pendientes con esta u otra versión ya cargada}
+    """
+    try:
+        logging.info("📥 Iniciando extracción de datos fuente...")
+        
+        medidor = MedidorEtapas(context, 'extraer_datos_fuente')
+        almacenamiento = obtener_almacenamiento()
+        fuentes = metadatos_fuentes(almacenamiento)
+        manifiesto = leer_manifiesto(almacenamiento)
+        
+        # Nuevos o con otra generación; los que ya no existen salen del manifiesto
+        nuevos = [
+            metadatos for metadatos in fuentes
+            if manifiesto.get(metadatos['nombre'], {}).get('generacion') != metadatos['generacion']
+        ]
+        vigentes = {metadatos['nombre'] for metadatos in fuentes}
+        obsoletos = [manifiesto.pop(nombre)['ruta_staging'] for nombre in list(manifiesto) if nombre not in vigentes]
+        medidor.cerrar_etapa(EXTRACCION)
+        
+        logging.info(f"🗂️ {len(fuentes)} archivos fuente, {len(nuevos)} nuevos o modificados, "
+                     f"{len(obsoletos)} retirados")
+        
+        total_registros = 0
+        if nuevos:
+            with tempfile.TemporaryDirectory() as directorio_temporal, \
+                    ThreadPoolExecutor(max_workers=HILOS_INGESTA) as executor:
+                futuros = {
+                    executor.submit(convertir_fuente_a_parquet, almacenamiento, metadatos, directorio_temporal):
+                    metadatos['nombre']
+                    for metadatos in nuevos
+                }
+                for futuro in as_completed(futuros):
+                    nombre = futuros[futuro]
+                    anterior = manifiesto.get(nombre)
+                    manifiesto[nombre] = futuro.result()
+                    total_registros += manifiesto[nombre]['filas']
+                    if anterior:
+                        obsoletos.append(anterior['ruta_staging'])
+                        manifiesto[nombre]['carga_previa'] = anterior['cargado'] or anterior.get('carga_previa', False)
+                    
+                    # Cada archivo queda registrado apenas termina: un reintento no lo repite
+                    guardar_manifiesto(almacenamiento, manifiesto)
+        medidor.cerrar_etapa(PARSEO, filas_salida=total_registros)
+        
+        guardar_manifiesto(almacenamiento, manifiesto)
+        almacenamiento.eliminar(obsoletos)
+        medidor.cerrar_etapa(CARGA, filas_entrada=total_registros)
+        
+        forzar = obtener_conf(context).get('forzar', False)
+        if forzar:
+            logging.info("⚠️ Ejecución forzada: todos los archivos fuente quedan pendientes de carga")
+        pendientes = [entrada for _, entrada in sorted(manifiesto.items()) if forzar or not entrada['cargado']]
+        staging = {
+            'archivos': [manifiesto[nombre]['ruta_staging'] for nombre in sorted(manifiesto)],
+            'pendientes': [entrada['ruta_staging'] for entrada in pendientes],
+            'recargados': [
+                entrada['ruta_staging'] for entrada in pendientes
+                if entrada['cargado'] or entrada.get('carga_previa', False)
+            ]
+        }
+        
+        medidor.publicar()
+        logging.info(f"✅ Staging con {len(staging['archivos'])} archivos, "
+                     f"{len(staging['pendientes'])} pendientes de carga")
+        return staging
+        
+    except Exception as e:
+        logging.error(f"❌ Error en extracción de datos fuente: {str(e)}")
+        raise
+
+def marcar_fuentes_cargadas(context):
+    """
+    Marca en el manifiesto las fuentes pendientes de esta ejecución como cargadas;
+    solo se llama al terminar con éxito
+    """
+    staging = context['ti'].xcom_pull(task_ids='extraer_datos_fuente')
+    if not staging or not staging['pendientes']:
+        return []
+    
+    almacenamiento = obtener_almacenamiento()
+    manifiesto = leer_manifiesto(almacenamiento)
+    marcadas = []
+    for nombre, entrada in manifiesto.items():
+        if entrada['ruta_staging'] in staging['pendientes'] and not entrada['cargado']:
+            entrada['cargado'] = True
+            marcadas.append(nombre)
+    
+    guardar_manifiesto(almacenamiento, manifiesto)
+    logging.info(f"🔖 Archivos fuente cargados: {marcadas}")
+    return marcadas
+
+def rutas_staging(context, solo_pendientes=False):
+    """
+    Artefactos Parquet publicados por extraer_datos_fuente; con solo_pendientes,
+    solo los de fuentes que ninguna ejecución exitosa cargó todavía
+    """
+    staging = context['ti'].xcom_pull(task_ids='extraer_datos_fuente')
+    if not staging:
+        raise ValueError("No se encontraron los artefactos de staging en XCom (extraer_datos_fuente)")
+    return staging['pendientes' if solo_pendientes else 'archivos']
+
+def rutas_recargadas(context):
+    """
+    Artefactos pendientes de fuentes con esta u otra versión ya cargada: sus filas
+    hasta la marca de agua ya están en la bodega
+    """
+    staging = context['ti'].xcom_pull(task_ids='extraer_datos_fuente') or {}
+    return staging.get('recargados', [])
+
+def intersectar_columnas(nombres):
+    """
+    Columnas presentes en todas las listas de nombres, en el orden de la primera
+    """
+    if not nombres:
+        return []
+    comunes = [col for col in nombres[0] if all(col in otros for otros in nombres[1:])]
+    if any(len(otros) != len(comunes) for otros in nombres):
+        logging.warning(f"⚠️ Los archivos fuente no tienen las mismas columnas; se usan {comunes}")
+    return comunes
+
+def columnas_comunes(archivos):
+    """
+    Columnas presentes en todos los artefactos, en el orden del primero
+    """
+    return intersectar_columnas([pq.read_schema(archivo).names for archivo in archivos])
+
+def leer_datos_staging(context, columnas=None, solo_pendientes=False):
+    """
+    Lee desde los artefactos de staging solo las columnas que necesita la tarea
+    Las columnas solicitadas que no existen en todos los archivos se ignoran
+    Cada artefacto se reduce a esas columnas apenas se descarga y su contenido se
+    libera: en memoria hay a lo sumo HILOS_INGESTA artefactos completos a la vez
+    """
+    almacenamiento = obtener_almacenamiento()
+    
+    def leer_columnas(ruta):
+        contenido = BytesIO(almacenamiento.descargar_bytes(ruta))
+        nombres = pq.read_schema(contenido).names
+        presentes = [col for col in (nombres if columnas is None else dict.fromkeys(columnas)) if col in nombres]
+        # El texto de baja cardinalidad llega como categórico (diccionario de Arrow)
+        archivo = pq.ParquetFile(contenido, read_dictionary=columnas_categoricas(presentes))
+        return nombres, archivo.read(columns=presentes)
+    
+    with ThreadPoolExecutor(max_workers=HILOS_INGESTA) as executor:
+        leidos = list(executor.map(leer_columnas, rutas_staging(context, solo_pendientes)))
+    
+    disponibles = intersectar_columnas([nombres for nombres, _ in leidos])
+    if columnas is None:
+        columnas = disponibles
+    else:
+        columnas = [col for col in dict.fromkeys(columnas) if col in disponibles]
+    
+    if not leidos:
+        return pd.DataFrame(columns=columnas)
+    return pa.concat_tables([tabla.select(columnas) for _, tabla in leidos]).to_pandas()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Generador de archivos SRI sintéticos a partir de la muestra del repositorio
+
+Aprende de csv_file/VEHICULOS_SRI.csv:
+- el catálogo de vehículos (código, marca, modelo, país, año, clase, subclase,
+  tipo, cilindraje, combustible, categoría y avalúo) y su popularidad
+- las frecuencias de cantón, tipo de transacción, servicio, persona y colores
+- la distribución de fechas de proceso por día de la semana y el desfase
+  entre fecha de compra y fecha de proceso
+
+y escribe archivos con las mismas columnas y formatos, de 10 mil a decenas de
+millones de filas, por bloques (la memoria no depende del tamaño del archivo).
+
+En la muestra el avalúo y la categoría son fijos por vehículo, así que se
+generan por vehículo y no por fila. La cantidad de vehículos distintos crece
+como V0 * (filas / filas_muestra) ^ --exponente-cardinalidad: los vehículos
+nuevos derivan de uno de la muestra (misma marca, clase y tipo), con un modelo
+nuevo en la proporción modelos/vehículos de la muestra y el avalúo perturbado
+con la dispersión observada dentro de cada marca y clase. Marcas y cantones se
+mantienen en los de la muestra.
+
+Uso:
+    python scripts/generar_datos_sinteticos.py --filas 1000000 --salida /tmp/sri_1M.csv
+    python scripts/generar_datos_sinteticos.py --filas 1000000 --salida /tmp/sri_1M.csv.gz
+    python scripts/generar_datos_sinteticos.py --filas 50000000 --salida /tmp/sri_50M.csv \\
+        --fecha-inicio 2020-01-01 --fecha-fin 2024-12-31
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+MUESTRA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'csv_file', 'VEHICULOS_SRI.csv')
+
+COLUMNA_FECHA_PROCESO = 'FECHA PROCESO (DD/MM/AA)'
+COLUMNA_FECHA_COMPRA = 'FECHA COMPRA (DD/MM/AA)'
+FORMATO_FECHA = '%m/%d/%Y'
+
+# Atributos propios del vehículo (se generan por vehículo, no por fila)
+COLUMNAS_CATALOGO = [
+    'CÓDIGO DE VEHÍCULO', 'MARCA', 'MODELO', 'PAÍS', 'AÑO MODELO', 'CLASE', 'SUB CLASE',
+    'TIPO', 'CILINDRAJE', 'TIPO COMBUSTIBLE', 'CATEGORÍA', 'AVALÚO'
+]
+
+# Atributos de cada registro, muestreados con sus frecuencias en la muestra
+COLUMNAS_REGISTRO = [
+    'TIPO TRANSACCIÓN', 'TIPO SERVICIO', 'CANTÓN', 'COLOR 1', 'COLOR 2', 'PERSONA NATURAL - JURÍDICA'
+]
+
+TAMANO_BLOQUE = 500_000
+EXPONENTE_CARDINALIDAD = 0.6
+DISPERSION_AVALUO_MINIMA = 0.05
+
+# Códec según la extensión de --salida (el ETL acepta .csv.gz y .csv.zst)
+COMPRESION_POR_EXTENSION = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def frecuencias(serie):
+    """
+    Valores y probabilidades de una columna (el vacío cuenta como un valor más)
+    """
+    conteos = serie.value_counts()
+    return conteos.index.to_numpy(dtype=object), (conteos / conteos.sum()).to_numpy()
+
+
+def formatear_fechas(fechas):
+    """
+    Fechas en el formato de la muestra: mes/día/año sin ceros a la izquierda
+    """
+    return [f'{fecha.month}/{fecha.day}/{fecha.year}' for fecha in fechas]
+
+
+def aprender_perfil(ruta_muestra=MUESTRA):
+    """
+    Distribuciones de la muestra que usa el generador
+    """
+    df = pd.read_csv(ruta_muestra, dtype=str, keep_default_na=False)
+    df = df[(df['CÓDIGO DE VEHÍCULO'] != '') & (df[COLUMNA_FECHA_PROCESO] != '')]
+    
+    fecha_proceso = pd.to_datetime(df[COLUMNA_FECHA_PROCESO], format=FORMATO_FECHA)
+    fecha_compra = pd.to_datetime(df[COLUMNA_FECHA_COMPRA], format=FORMATO_FECHA, errors='coerce')
+    desfases = (fecha_proceso - fecha_compra).dt.days.dropna().astype('int64')
+    
+    # Catálogo: un vehículo por código, con su cantidad de registros como popularidad
+    catalogo = (
+        df.groupby(COLUMNAS_CATALOGO, sort=False).size().rename('registros').reset_index()
+        .drop_duplicates('CÓDIGO DE VEHÍCULO')
+        .reset_index(drop=True)
+    )
+    
+    # Dispersión del log del avalúo dentro de cada marca y clase
+    avaluo = pd.to_numeric(catalogo['AVALÚO'], errors='coerce')
+    dispersion = np.log(avaluo.where(avaluo > 0)).groupby([catalogo['MARCA'], catalogo['CLASE']]).std()
+    dispersion = float(np.nanmedian(dispersion.to_numpy())) if dispersion.notna().any() else 0.0
+    
+    return {
+        'filas': len(df),
+        'columnas': list(df.columns),
+        'catalogo': catalogo,
+        'proporcion_modelos': catalogo['MODELO'].nunique() / len(catalogo),
+        'dispersion_avaluo': max(dispersion, DISPERSION_AVALUO_MINIMA),
+        'anios_modelo': frecuencias(df['AÑO MODELO']),
+        'registros': {col: frecuencias(df[col]) for col in COLUMNAS_REGISTRO},
+        'dias_semana': np.bincount(fecha_proceso.dt.dayofweek, minlength=7) / len(fecha_proceso),
+        'desfases_compra': frecuencias(desfases),
+        'fecha_inicio': fecha_proceso.min().date(),
+        'fecha_fin': fecha_proceso.max().date(),
+    }
+
+
+def ampliar_catalogo(perfil, filas, rng, exponente=EXPONENTE_CARDINALIDAD):
+    """
+    Catálogo con la cantidad de vehículos esperada para `filas` registros
+    Devuelve el catálogo (texto) y la probabilidad de cada vehículo
+    """
+    base = perfil['catalogo']
+    objetivo = int(len(base) * max(filas / perfil['filas'], 1) ** exponente)
+    objetivo = max(min(objetivo, filas), 1)
+    popularidad = base['registros'].to_numpy(dtype='float64')
+    
+    if objetivo <= len(base):
+        elegidos = np.sort(rng.choice(len(base), size=objetivo, replace=False, p=popularidad / popularidad.sum()))
+        catalogo = base.iloc[elegidos].reset_index(drop=True)
+        pesos = popularidad[elegidos]
+        return catalogo.drop(columns='registros'), pesos / pesos.sum()
+    
+    # Vehículos nuevos derivados de plantillas de la muestra
+    nuevos = objetivo - len(base)
+    plantillas = rng.choice(len(base), size=nuevos, p=popularidad / popularidad.sum())
+    derivados = base.iloc[plantillas].reset_index(drop=True).drop(columns='registros')
+    
+    codigo_maximo = pd.to_numeric(base['CÓDIGO DE VEHÍCULO'], errors='coerce').max()
+    derivados['CÓDIGO DE VEHÍCULO'] = (int(codigo_maximo) + 1 + np.arange(nuevos)).astype(str)
+    
+    # Una parte de los derivados son modelos nuevos, con su propia categoría
+    modelo_nuevo = rng.random(nuevos) < perfil['proporcion_modelos']
+    numero_modelo = np.cumsum(modelo_nuevo)
+    derivados.loc[modelo_nuevo, 'MODELO'] = [
+        f'{modelo} S{numero}' for modelo, numero in zip(derivados.loc[modelo_nuevo, 'MODELO'], numero_modelo[modelo_nuevo])
+    ]
+    categoria_maxima = pd.to_numeric(base['CATEGORÍA'], errors='coerce').max()
+    derivados.loc[modelo_nuevo, 'CATEGORÍA'] = (int(categoria_maxima) + numero_modelo[modelo_nuevo]).astype(str)
+    
+    valores_anio, probabilidades_anio = perfil['anios_modelo']
+    derivados['AÑO MODELO'] = rng.choice(valores_anio, size=nuevos, p=probabilidades_anio)
+    
+    avaluo = pd.to_numeric(derivados['AVALÚO'], errors='coerce').to_numpy()
+    avaluo = avaluo * rng.lognormal(0.0, perfil['dispersion_avaluo'], size=nuevos)
+    derivados['AVALÚO'] = np.where(np.isnan(avaluo), '', np.char.mod('%.2f', np.nan_to_num(avaluo)))
+    
+    # La popularidad de los nuevos sigue la distribución de popularidad de la muestra
+    pesos = np.concatenate([popularidad, rng.choice(popularidad, size=nuevos)])
+    catalogo = pd.concat([base.drop(columns='registros'), derivados], ignore_index=True)
+    return catalogo, pesos / pesos.sum()
+
+
+def generar_bloques(perfil, filas, semilla=7, fecha_inicio=None, fecha_fin=None,
+                    tamano_bloque=TAMANO_BLOQUE, exponente=EXPONENTE_CARDINALIDAD):
+    """
+    Genera el archivo como tablas Arrow de texto de hasta tamano_bloque filas
+    Cada columna se arma tomando índices sobre sus valores únicos
+    """
+    rng = np.random.default_rng(semilla)
+    catalogo, pesos_catalogo = ampliar_catalogo(perfil, filas, rng, exponente)
+    columnas_catalogo = {col: pa.array(catalogo[col].to_numpy(dtype=object), pa.string()) for col in COLUMNAS_CATALOGO}
+    columnas_registro = {
+        col: (pa.array(valores, pa.string()), probabilidades)
+        for col, (valores, probabilidades) in perfil['registros'].items()
+    }
+    
+    # Días del rango pesados según el día de la semana observado
+    dias = pd.date_range(fecha_inicio or perfil['fecha_inicio'], fecha_fin or perfil['fecha_fin'], freq='D')
+    pesos_dias = perfil['dias_semana'][dias.dayofweek] + 1e-9
+    pesos_dias = pesos_dias / pesos_dias.sum()
+    desfases, probabilidades_desfase = perfil['desfases_compra']
+    desfases = desfases.astype('int64')
+    
+    # Fechas de compra posibles: cada día del rango menos cada desfase observado
+    primer_compra = dias[0] - pd.Timedelta(days=int(desfases.max()))
+    dias_compra = pd.date_range(primer_compra, dias[-1] - pd.Timedelta(days=int(desfases.min())), freq='D')
+    texto_dias = pa.array(formatear_fechas(dias), pa.string())
+    texto_dias_compra = pa.array(formatear_fechas(dias_compra), pa.string())
+    desplazamiento = (dias[0] - primer_compra).days
+    
+    codigo_registro = 1
+    for inicio in range(0, filas, tamano_bloque):
+        n = min(tamano_bloque, filas - inicio)
+        vehiculos = pa.array(rng.choice(len(catalogo), size=n, p=pesos_catalogo))
+        indice_dia = rng.choice(len(dias), size=n, p=pesos_dias)
+        indice_compra = indice_dia + desplazamiento - rng.choice(desfases, size=n, p=probabilidades_desfase)
+        
+        columnas = {}
+        for col in perfil['columnas']:
+            if col in columnas_catalogo:
+                columnas[col] = columnas_catalogo[col].take(vehiculos)
+            elif col in columnas_registro:
+                valores, probabilidades = columnas_registro[col]
+                columnas[col] = valores.take(pa.array(rng.choice(len(valores), size=n, p=probabilidades)))
+            elif col == COLUMNA_FECHA_PROCESO:
+                columnas[col] = texto_dias.take(pa.array(indice_dia))
+            elif col == COLUMNA_FECHA_COMPRA:
+                columnas[col] = texto_dias_compra.take(pa.array(indice_compra))
+            else:
+                columnas[col] = pa.array(np.arange(codigo_registro, codigo_registro + n).astype(str))
+        codigo_registro += n
+        
+        yield pa.table(columnas)
+
+
+def escribir_csv(perfil, filas, ruta, **opciones):
+    """
+    Escribe el archivo sintético en `ruta` y devuelve la cantidad de bytes
+    Con extensión .gz o .zst el CSV se comprime a medida que se escribe
+    """
+    codec = COMPRESION_POR_EXTENSION.get(os.path.splitext(ruta)[1])
+    destino = pa.CompressedOutputStream(ruta, codec) if codec else pa.OSFile(ruta, 'wb')
+    escritor = None
+    try:
+        for tabla in generar_bloques(perfil, filas, **opciones):
+            if escritor is None:
+                escritor = pacsv.CSVWriter(destino, tabla.schema)
+            escritor.write_table(tabla)
+    finally:
+        if escritor is not None:
+            escritor.close()
+        destino.close()
+    return os.path.getsize(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, required=True)
+    parser.add_argument('--salida', required=True, help='Ruta del CSV a generar (.csv, .csv.gz o .csv.zst)')
+    parser.add_argument('--muestra', default=MUESTRA)
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--fecha-inicio', default=None, help='Primera fecha de proceso (AAAA-MM-DD)')
+    parser.add_argument('--fecha-fin', default=None, help='Última fecha de proceso (AAAA-MM-DD)')
+    parser.add_argument('--exponente-cardinalidad', type=float, default=EXPONENTE_CARDINALIDAD)
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args()
+    
+    perfil = aprender_perfil(args.muestra)
+    print(f"📊 Muestra: {perfil['filas']} filas, {len(perfil['catalogo'])} vehículos, "
+          f"{perfil['fecha_inicio']} a {perfil['fecha_fin']}")
+    
+    inicio = time.perf_counter()
+    tamano = escribir_csv(
+        perfil, args.filas, args.salida, semilla=args.semilla, fecha_inicio=args.fecha_inicio,
+        fecha_fin=args.fecha_fin, tamano_bloque=args.tamano_bloque, exponente=args.exponente_cardinalidad
+    )
+    segundos = time.perf_counter() - inicio
+    print(f"✅ {args.filas:,} filas en {args.salida} ({tamano / 1024 ** 2:,.1f} MB, {segundos:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,24 @@ Script para configurar automáticamente el entorno de Google Cloud Platform
 """
 
 import yaml
-from google.cloud import bigquery, storage
 import os
+import sys
+
+# Los clientes compartidos viven junto al DAG
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dags'))
+from sri_etl.clientes import obtener_cliente_bigquery, obtener_cliente_storage
 
 def load_config():
     with open('config/variables.yaml', 'r') as file:
         return yaml.safe_load(file)
 
 def setup_bigquery(config):
-    client = bigquery.Client(project=config['project_id'])
+    client = obtener_cliente_bigquery(config['project_id'])
     # Código para crear dataset y tablas
     print("✅ BigQuery configurado")
 
 def setup_storage(config):
-    client = storage.Client()
+    client = obtener_cliente_storage(config['project_id'])
     # Código para crear bucket
     print("✅ Cloud Storage configurado")
 
@@ -0,0 +1,37 @@
+# test_agregados.py
+# Mantenimiento incremental de agg_registros_anio_marca_provincia
+
+from pandas.testing import assert_frame_equal
+
+from conftest import dividir_muestra_por_mes
+
+
+def leer_agregado(entorno, consulta=None):
+    from sri_etl.constantes import TABLA_AGREGADO
+    
+    consulta = consulta or f"SELECT * FROM {entorno.bodega.tabla(TABLA_AGREGADO)}"
+    df = entorno.consultar(consulta)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_reintento_incremental_no_suma_dos_veces(entorno):
+    from sri_etl.agregados import construir_consulta_agregado
+    
+    meses = dividir_muestra_por_mes()
+    ultimo = list(meses)[-1]
+    for mes, datos in meses.items():
+        if mes != ultimo:
+            entorno.publicar_fuente(f'sri_{mes}.csv', datos)
+    entorno.ejecutar()
+    
+    # El último mes entra de forma incremental y la tarea de agregados se reintenta
+    entorno.publicar_fuente(f'sri_{ultimo}.csv', meses[ultimo])
+    context = entorno.ejecutar()
+    assert context['ti'].xcom_pull('etl_fact_registro_vehiculos', key='rango_carga')['modo_carga'] == 'incremental'
+    entorno.ejecutar_tarea(context, 'agregados', 'actualizar_agregados')
+    
+    esperado = leer_agregado(entorno, construir_consulta_agregado(entorno.bodega))
+    assert_frame_equal(leer_agregado(entorno), esperado, check_dtype=False)
+    assert esperado['TotalRegistros'].sum() == entorno.consultar(
+        "SELECT COUNT(*) AS filas FROM fact_registro_vehiculos"
+    )['filas'][0]
@@ -0,0 +1,131 @@
+# test_dimensiones.py
+# Carga solo-agregar de las dimensiones con el backend local
+
+import pandas as pd
+import pytest
+
+from conftest import MUESTRA_SRI, TAREAS_HECHOS, dividir_muestra, dividir_muestra_por_mes
+
+TAREAS_DIMENSIONES = TAREAS_HECHOS[:-1]
+
+DIMENSIONES_SOLO_AGREGAR = {
+    'dim_vehiculo': 'ID_Vehiculo',
+    'dim_transaccion': 'ID_Transaccion',
+    'dim_ubicacion': 'ID_Ubicacion',
+}
+
+
+def leer_dimension(entorno, tabla):
+    columna_id = DIMENSIONES_SOLO_AGREGAR[tabla]
+    return entorno.consultar(f"SELECT * FROM {tabla} ORDER BY {columna_id}").reset_index(drop=True)
+
+
+def cargar_en_dos_ejecuciones(entorno):
+    """
+    Carga la primera mitad de la muestra y luego un archivo nuevo con la segunda;
+    devuelve las dimensiones tras la primera ejecución
+    """
+    primera, segunda = dividir_muestra(2)
+    entorno.publicar_fuente('sri_parte_0.csv', primera)
+    entorno.ejecutar(TAREAS_DIMENSIONES)
+    anteriores = {tabla: leer_dimension(entorno, tabla) for tabla in DIMENSIONES_SOLO_AGREGAR}
+    
+    entorno.publicar_fuente('sri_parte_1.csv', segunda)
+    entorno.ejecutar(TAREAS_DIMENSIONES)
+    return anteriores
+
+
+@pytest.mark.parametrize('tabla', DIMENSIONES_SOLO_AGREGAR)
+def test_archivo_nuevo_solo_agrega_miembros(crear_entorno, tabla):
+    incremental = crear_entorno('incremental')
+    anteriores = cargar_en_dos_ejecuciones(incremental)
+    actual = leer_dimension(incremental, tabla)
+    
+    completa = crear_entorno('completa')
+    for numero, datos in enumerate(dividir_muestra(2)):
+        completa.publicar_fuente(f'sri_parte_{numero}.csv', datos)
+    completa.ejecutar(TAREAS_DIMENSIONES, full_refresh=True)
+    
+    columna_id = DIMENSIONES_SOLO_AGREGAR[tabla]
+    assert actual[columna_id].is_unique
+    assert set(actual[columna_id]) == set(leer_dimension(completa, tabla)[columna_id])
+    
+    # Los miembros existentes conservan su fila completa
+    conservados = actual[actual[columna_id].isin(anteriores[tabla][columna_id])].reset_index(drop=True)
+    pd.testing.assert_frame_equal(conservados, anteriores[tabla], check_dtype=False)
+
+
+def test_sin_cache_el_anti_join_solo_lee_ids(entorno, monkeypatch):
+    primera, segunda = dividir_muestra(2)
+    entorno.publicar_fuente('sri_parte_0.csv', primera)
+    entorno.ejecutar(TAREAS_DIMENSIONES)
+    
+    # Etiquetas que no coinciden con los mapas publicados: las claves se leen de la bodega
+    for tabla in DIMENSIONES_SOLO_AGREGAR:
+        entorno.bodega.actualizar_etiquetas(tabla, {'huella_claves': 'obsoleta'})
+    
+    consultas = []
+    consultar_df = entorno.bodega.consultar_df
+    
+    def registrar_consulta(sql, parametros=None):
+        consultas.append(' '.join(sql.split()))
+        return consultar_df(sql, parametros)
+    
+    monkeypatch.setattr(entorno.bodega, 'consultar_df', registrar_consulta)
+    entorno.publicar_fuente('sri_parte_1.csv', segunda)
+    entorno.ejecutar(TAREAS_DIMENSIONES)
+    
+    for tabla, columna_id in DIMENSIONES_SOLO_AGREGAR.items():
+        lecturas = [sql for sql in consultas if entorno.bodega.tabla(tabla) in sql]
+        assert lecturas == [f"SELECT {columna_id} FROM {entorno.bodega.tabla(tabla)}"]
+        assert leer_dimension(entorno, tabla)[columna_id].is_unique
+    
+    # El mapa se vuelve a publicar, así que la siguiente ejecución usa la caché
+    consultas.clear()
+    from sri_etl.claves import cargar_claves_dimension
+    for tabla in DIMENSIONES_SOLO_AGREGAR:
+        cargar_claves_dimension(entorno.bodega, tabla)
+    assert consultas == []
+
+
+def test_dim_tiempo_solo_lee_las_fechas_de_fuentes_pendientes(entorno, monkeypatch):
+    import sri_etl.dimensiones
+    
+    meses = dividir_muestra_por_mes()
+    *anteriores, ultimo = meses
+    for mes in anteriores:
+        entorno.publicar_fuente(f'sri_{mes}.csv', meses[mes])
+    entorno.ejecutar(TAREAS_DIMENSIONES)
+    
+    lecturas = []
+    leer_datos_staging = sri_etl.dimensiones.leer_datos_staging
+    
+    def registrar_lectura(context, columnas=None, solo_pendientes=False):
+        lecturas.append(solo_pendientes)
+        return leer_datos_staging(context, columnas, solo_pendientes)
+    
+    monkeypatch.setattr(sri_etl.dimensiones, 'leer_datos_staging', registrar_lectura)
+    
+    # Sin fuentes pendientes no se lee staging
+    entorno.ejecutar([('staging', 'extraer_datos_fuente'), ('dimensiones', 'etl_dim_tiempo')])
+    assert lecturas == []
+    
+    # Con un mes nuevo solo se leen las fuentes pendientes y el calendario lo cubre
+    entorno.publicar_fuente(f'sri_{ultimo}.csv', meses[ultimo])
+    entorno.ejecutar([('staging', 'extraer_datos_fuente'), ('dimensiones', 'etl_dim_tiempo')])
+    assert lecturas == [True]
+    
+    calendario = entorno.consultar("SELECT MIN(FechaCompleta) AS inicio, MAX(FechaCompleta) AS fin, "
+                                   "COUNT(*) AS dias FROM dim_tiempo").iloc[0]
+    assert calendario['fin'] >= pd.Timestamp(f'{ultimo}-01')
+    assert calendario['dias'] == (calendario['fin'] - calendario['inicio']).days + 1
+
+
+def test_referencia_cubre_los_cantones_de_la_muestra():
+    from sri_etl.claves import normalizar_valores_clave
+    from sri_etl.dimensiones import cargar_referencia_cantones
+    
+    cantones = pd.read_csv(MUESTRA_SRI, usecols=['CANTÓN'], dtype={'CANTÓN': 'Int64'}, on_bad_lines='skip')
+    codigos = set(normalizar_valores_clave(cantones['CANTÓN'].dropna()))
+    faltantes = sorted(codigos - set(cargar_referencia_cantones()['CodigoCanton']))
+    assert faltantes == [], f"{len(faltantes)} de {len(codigos)} códigos de cantón sin referencia"
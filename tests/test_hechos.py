@@ -0,0 +1,145 @@
+# test_hechos.py
+# Carga de fact_registro_vehiculos con el backend local
+
+import pytest
+
+from conftest import TAREAS_CARGA, TAREAS_HECHOS, dividir_muestra, dividir_muestra_por_mes
+
+MODOS_HECHOS = ['memoria', 'streaming', 'paralelo']
+
+
+def contar_hechos(entorno):
+    return int(entorno.consultar("SELECT COUNT(*) AS filas FROM fact_registro_vehiculos")['filas'][0])
+
+
+def cargar_ids(entorno):
+    return entorno.consultar("SELECT ID_Registro FROM fact_registro_vehiculos")['ID_Registro']
+
+
+def test_modos_generan_los_mismos_id_registro(entorno, monkeypatch):
+    import sri_etl.hechos
+    
+    # Lotes chicos para que streaming procese cada archivo en varios lotes
+    monkeypatch.setattr(sri_etl.hechos, 'TAMANO_LOTE_HECHOS', 100)
+    partes = dividir_muestra(3)
+    for numero, datos in enumerate(partes):
+        entorno.publicar_fuente(f'sri_parte_{numero}.csv', datos)
+    entorno.publicar_fuente('sri_parte_0_copia.csv', partes[0])
+    
+    # El ID depende del artefacto de staging y de la fila: cada modo reconstruye la misma tabla
+    ids_por_modo = {}
+    for modo in MODOS_HECHOS:
+        entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo, procesos_hechos=2, full_refresh=True)
+        ids_por_modo[modo] = cargar_ids(entorno)
+    
+    referencia = set(ids_por_modo['memoria'])
+    for modo, ids in ids_por_modo.items():
+        assert ids.is_unique, f"ID_Registro duplicados en modo {modo}"
+        assert set(ids) == referencia, f"El modo {modo} genera otros ID_Registro"
+
+
+
+def unir_archivos(archivos):
+    """
+    Concatena archivos CSV con el mismo encabezado
+    """
+    return archivos[0] + b''.join(datos.split(b'\n', 1)[1] for datos in archivos[1:])
+
+
+def contar_filas(datos):
+    return len(datos.splitlines()) - 1
+
+
+@pytest.mark.parametrize('modo', MODOS_HECHOS)
+def test_archivo_nuevo_con_fechas_anteriores_se_carga_completo(entorno, modo):
+    meses = dividir_muestra_por_mes()
+    atrasado = '2024-10'
+    for mes, datos in meses.items():
+        if mes != atrasado:
+            entorno.publicar_fuente(f'sri_{mes}.csv', datos)
+    entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo)
+    
+    # El archivo que llega tarde tiene fechas anteriores a la marca de agua
+    entorno.publicar_fuente(f'sri_{atrasado}.csv', meses[atrasado])
+    context = entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo)
+    
+    rango = context['ti'].xcom_pull('etl_fact_registro_vehiculos', key='rango_carga')
+    assert rango['modo_carga'] == 'incremental'
+    assert rango['total_registros'] == contar_filas(meses[atrasado])
+    assert rango['fecha_inicio'].startswith(atrasado)
+    assert contar_hechos(entorno) == sum(contar_filas(datos) for datos in meses.values())
+
+
+@pytest.mark.parametrize('modo', MODOS_HECHOS)
+def test_version_nueva_de_archivo_cargado_agrega_solo_posteriores(entorno, modo):
+    meses = list(dividir_muestra_por_mes().values())
+    entorno.publicar_fuente('sri_acumulado.csv', unir_archivos(meses[:-1]))
+    entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo)
+    
+    # El mismo archivo se republica con un mes más: sus filas previas ya están en la bodega
+    entorno.publicar_fuente('sri_acumulado.csv', unir_archivos(meses))
+    context = entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo)
+    
+    rango = context['ti'].xcom_pull('etl_fact_registro_vehiculos', key='rango_carga')
+    assert rango['total_registros'] == contar_filas(meses[-1])
+    assert contar_hechos(entorno) == sum(contar_filas(datos) for datos in meses)
+    assert cargar_ids(entorno).is_unique
+
+
+
+@pytest.mark.parametrize('modo', MODOS_HECHOS)
+def test_particiones_conserva_filas_de_archivos_ya_cargados(entorno, modo):
+    # Los dos archivos comparten fechas de proceso
+    partes = dividir_muestra(2)
+    for numero, datos in enumerate(partes):
+        entorno.publicar_fuente(f'sri_parte_{numero}.csv', datos)
+    entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo)
+    filas_iniciales = contar_hechos(entorno)
+    
+    # Solo una parte queda pendiente; sus fechas se reemplazan con las filas de ambas
+    entorno.publicar_fuente('sri_parte_1.csv', partes[1])
+    context = entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo, modo_carga='particiones')
+    
+    assert context['ti'].xcom_pull('etl_fact_registro_vehiculos', key='rango_carga')['total_registros'] > 0
+    assert cargar_ids(entorno).is_unique
+    assert contar_hechos(entorno) == filas_iniciales
+
+
+@pytest.mark.parametrize('modo_carga', ['incremental', 'particiones'])
+def test_forzar_vuelve_a_cargar_sin_duplicar(entorno, modo_carga):
+    for mes, datos in dividir_muestra_por_mes().items():
+        entorno.publicar_fuente(f'sri_{mes}.csv', datos)
+    entorno.ejecutar(TAREAS_HECHOS)
+    ids_iniciales = set(cargar_ids(entorno))
+    
+    context = entorno.ejecutar(TAREAS_HECHOS, modo_carga=modo_carga, forzar=True)
+    
+    rango = context['ti'].xcom_pull('etl_fact_registro_vehiculos', key='rango_carga')
+    if modo_carga == 'particiones':
+        assert rango['total_registros'] == len(ids_iniciales)
+    ids = cargar_ids(entorno)
+    assert ids.is_unique
+    assert set(ids) == ids_iniciales
+
+
+@pytest.mark.parametrize('modo', MODOS_HECHOS)
+def test_reintentar_la_carga_incremental_no_duplica_hechos(entorno, modo):
+    primera, segunda = dividir_muestra(2)
+    entorno.publicar_fuente('sri_parte_0.csv', primera)
+    entorno.ejecutar(TAREAS_HECHOS, modo_hechos=modo)
+    
+    # La carga de la segunda parte termina, pero el run falla antes de marcarla cargada
+    entorno.publicar_fuente('sri_parte_1.csv', segunda)
+    context = entorno.nuevo_contexto(modo_hechos=modo)
+    for modulo, tarea in TAREAS_HECHOS:
+        entorno.ejecutar_tarea(context, modulo, tarea)
+    filas = contar_hechos(entorno)
+    
+    # Reintento de la tarea y nuevo run con el archivo todavía pendiente
+    entorno.ejecutar_tarea(context, 'hechos', 'etl_fact_registro_vehiculos')
+    assert contar_hechos(entorno) == filas
+    context = entorno.ejecutar(TAREAS_CARGA, modo_hechos=modo)
+    
+    assert context['ti'].xcom_pull('etl_fact_registro_vehiculos', key='rango_carga')['total_registros'] == 0
+    assert contar_hechos(entorno) == filas
+    assert cargar_ids(entorno).is_unique
@@ -0,0 +1,122 @@
+# test_staging.py
+# Selección de archivos fuente con el manifiesto de staging y lectura de comprimidos
+
+import gzip
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from conftest import MUESTRA_SRI, TAREAS_HECHOS, dividir_muestra
+
+
+def extraer(entorno, **conf):
+    """
+    Solo la extracción, sin marcar nada como cargado: devuelve las fuentes de cada lista
+    """
+    from sri_etl.staging import fuente_artefacto
+    
+    staging = entorno.ejecutar_tarea(entorno.nuevo_contexto(**conf), 'staging', 'extraer_datos_fuente')
+    return {lista: sorted(fuente_artefacto(ruta) for ruta in rutas) for lista, rutas in staging.items()}
+
+
+def test_manifiesto_selecciona_pendientes_y_recargados(entorno):
+    partes = dividir_muestra(3)
+    entorno.publicar_fuente('sri_a.csv', partes[0])
+    entorno.publicar_fuente('sri_b.csv', partes[1])
+    entorno.ejecutar(TAREAS_HECHOS)
+    
+    # Sin cambios no queda nada pendiente
+    assert extraer(entorno) == {'archivos': ['sri_a.csv', 'sri_b.csv'], 'pendientes': [], 'recargados': []}
+    
+    # Un archivo nuevo queda pendiente; una versión nueva de uno cargado, además, recargado
+    entorno.publicar_fuente('sri_b.csv', partes[1] + partes[2].split(b'\n', 1)[1])
+    entorno.publicar_fuente('sri_c.csv', partes[2])
+    seleccion = extraer(entorno)
+    assert seleccion['pendientes'] == ['sri_b.csv', 'sri_c.csv']
+    assert seleccion['recargados'] == ['sri_b.csv']
+    
+    # Forzar deja pendientes todos los archivos
+    seleccion = extraer(entorno, forzar=True)
+    assert seleccion['pendientes'] == seleccion['archivos']
+    assert seleccion['recargados'] == ['sri_a.csv', 'sri_b.csv']
+
+
+def test_copias_plana_y_comprimida_son_fuentes_distintas(crear_entorno):
+    import os
+    
+    with open(MUESTRA_SRI, 'rb') as archivo:
+        datos = archivo.read()
+    
+    una = crear_entorno('una')
+    una.publicar_fuente('sri.csv', datos)
+    una.ejecutar(TAREAS_HECHOS)
+    
+    entorno = crear_entorno('copias')
+    entorno.publicar_fuente('sri.csv', datos)
+    entorno.publicar_fuente('sri.csv.gz', gzip.compress(datos))
+    
+    # Misma generación en ambas copias: solo el nombre completo las distingue
+    for nombre in ['sri.csv', 'sri.csv.gz']:
+        os.utime(entorno.almacenamiento.ruta(f'raw-data/{nombre}'), ns=(10 ** 18, 10 ** 18))
+    
+    assert extraer(entorno)['archivos'] == ['sri.csv', 'sri.csv.gz']
+    entorno.ejecutar(TAREAS_HECHOS)
+    
+    consulta = "SELECT ID_Registro FROM fact_registro_vehiculos"
+    ids = entorno.consultar(consulta)['ID_Registro']
+    assert ids.is_unique
+    assert len(ids) == 2 * len(una.consultar(consulta))
+
+
+def test_lectura_de_staging_usa_las_columnas_comunes(entorno):
+    from sri_etl.staging import leer_datos_staging, leer_manifiesto
+    
+    partes = dividir_muestra(3)
+    sin_color = pd.read_csv(io.BytesIO(partes[2]), dtype=str, on_bad_lines='skip').drop(columns=['COLOR 2'])
+    entorno.publicar_fuente('sri_a.csv', partes[0])
+    entorno.publicar_fuente('sri_b.csv', partes[1])
+    entorno.publicar_fuente('sri_c.csv', sin_color.to_csv(index=False).encode())
+    
+    context = entorno.nuevo_contexto()
+    staging = entorno.ejecutar_tarea(context, 'staging', 'extraer_datos_fuente')
+    df = leer_datos_staging(context, ['MARCA', 'COLOR 2', 'MARCA'])
+    
+    assert list(df.columns) == ['MARCA']
+    assert df['MARCA'].dtype == 'category'
+    assert len(df) == sum(entrada['filas'] for entrada in leer_manifiesto(entorno.almacenamiento).values())
+    assert len(staging['archivos']) == 3
+
+
+def comprimir_zstd(datos):
+    destino = pa.BufferOutputStream()
+    with pa.CompressedOutputStream(destino, 'zstd') as flujo:
+        flujo.write(datos)
+    return destino.getvalue().to_pybytes()
+
+
+# La compresión se reconoce por el contenido: un .csv puede llegar comprimido
+# (Content-Encoding gzip en Cloud Storage) y un .csv.gz ya descomprimido
+@pytest.mark.parametrize('nombre, comprimir', [
+    ('sri.csv.gz', gzip.compress),
+    ('sri.csv.zst', comprimir_zstd),
+    ('sri.csv', gzip.compress),
+    ('sri.csv.gz', lambda datos: datos),
+])
+def test_fuentes_comprimidas_se_leen_igual_que_el_csv_plano(crear_entorno, nombre, comprimir):
+    with open(MUESTRA_SRI, 'rb') as archivo:
+        datos = archivo.read()
+    
+    filas = {}
+    for caso, contenido in [('plano', datos), ('comprimido', comprimir(datos))]:
+        entorno = crear_entorno(caso)
+        entorno.publicar_fuente(nombre if caso == 'comprimido' else 'sri.csv', contenido)
+        entorno.ejecutar(TAREAS_HECHOS)
+        # ID_Registro depende de la generación de cada publicación: se comparan las filas
+        filas[caso] = entorno.consultar(
+            "SELECT * EXCLUDE (ID_Registro) FROM fact_registro_vehiculos ORDER BY ALL"
+        )
+    
+    assert len(filas['comprimido'])
+    pd.testing.assert_frame_equal(filas['comprimido'], filas['plano'])